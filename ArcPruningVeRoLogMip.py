@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Find the arcs of the trucks and technicians that can never be part of a feasible route, before the decision variables
+    are created in create_decisions_variables() of the RunMILPVeRoLogMip file. An arc is not created if
+        - the customer cannot be delivered (x) or installed (y) on the day (the delivery window)
+        - truck arc i to j: the distance from the depot to i, from i to j and from j back to the depot is larger than the
+          truck maximum distance, or the order volume of i and j together is larger than the truck capacity
+        - technician arc i to j: the distance from home to i, from i to j and from j back home is larger than the maximum
+          distance of the technician
+    The distances satisfy the triangle inequality (ceiling of the euclidean distance), so every feasible route only uses
+    arcs that are kept. The arcs that are removed are reported per reason, with the rows of the constraint families that
+    have a row for every arc (truck_used, truck_day and cumulative_load for x, tech_used, tech_day and tech_cumulative_load
+    for y).
+"""
+###########################################################
+### imports
+import logging
+import numpy as np
+###########################################################
+###
+def service_days(DAYS,customer_nodes,start_delivery_window=None,end_delivery_window=None):
+    """
+    Purpose
+        Get the days each customer can be delivered (index t of x) and installed (index t of y, day t+1)
+    Input
+        DAYS, int: number of days in the horizon
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        start_delivery_window, list: start of the delivery window for each customer (None for every day)
+        end_delivery_window, list: end of the delivery window for each customer (None for every day)
+    Output
+        delivery_days, dict: customer node (keys) and the days of x it can be delivered (values)
+        installation_days, dict: customer node (keys) and the days of y it can be installed (values)
+    """
+    if start_delivery_window is None:
+        return {j: range(DAYS-1) for j in customer_nodes},{j: range(DAYS-1) for j in customer_nodes}
+    delivery_days = {j: range(start_delivery_window[j-1],end_delivery_window[j-1]+1) for j in customer_nodes}
+    installation_days = {j: range(start_delivery_window[j-1],DAYS-1) for j in customer_nodes}
+    return delivery_days,installation_days
+###########################################################
+###
+def feasible_truck_arcs(distance_matrix,num_customers,order_volume,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY):
+    """
+    Purpose
+        Find the truck arcs that fit in a trip from the depot
+    Input
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        num_customers, int: number of customers
+        order_volume, numpy array: ordersize times machine size of each customer
+        TRUCK_MAX_DISTANCE, int: truck maximum distance
+        TRUCK_CAPACITY, int: truck capacity
+    Output
+        within_distance, numpy array: boolean matrix over the depot and the customers, True if the trip depot, i, j, depot
+            is within the truck maximum distance
+        within_capacity, numpy array: boolean matrix over the depot and the customers, True if the order volume of i and j
+            fits in the truck
+    """
+    distances = distance_matrix[:num_customers+1,:num_customers+1]
+    within_distance = distances[0][:,None] + distances + distances[:,0][None,:] <= TRUCK_MAX_DISTANCE
+    volume = np.r_[0,np.asarray(order_volume,dtype=np.float64)]
+    within_capacity = volume[:,None] + volume[None,:] <= TRUCK_CAPACITY
+    return within_distance,within_capacity
+###########################################################
+###
+def feasible_tech_arcs(distance_matrix,technicians,num_customers,technician_max_distance):
+    """
+    Purpose
+        Find the technician arcs that fit in a route from home
+    Input
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        technicians, list: technicians in the problem
+        num_customers, int: number of customers
+        technician_max_distance, list: maximum distance each technician can drive daily
+    Output
+        within_distance, list: for each technician a boolean matrix over all nodes, True if the route home, i, j, home is
+            within the maximum distance of the technician
+    """
+    within_distance = []
+    for h in technicians:
+        home = num_customers+1+h
+        within_distance.append(distance_matrix[home][:,None] + distance_matrix + distance_matrix[:,home][None,:] <= technician_max_distance[h])
+    return within_distance
+###########################################################
+###
+def pruning_report(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,delivery_days,installation_days,truck_distance,truck_capacity,tech_distance):
+    """
+    Purpose
+        Count the arcs that are removed by the distance and capacity pruning (on the days the customers can be served) and
+        the rows of the constraint families with a row for every arc
+    Input
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        trucks, list: trucks in the problem
+        x_nodes, dict: nodes (keys) and coordinates (values) related to x variable in the mathematical problem
+        tech_customers, list: sorted customer nodes where each technician can install
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        delivery_days, installation_days, dict: see service_days()
+        truck_distance, truck_capacity, numpy array: see feasible_truck_arcs()
+        tech_distance, list: see feasible_tech_arcs()
+    Output
+        report, dict: number of removed arcs per reason and removed rows per constraint family
+    """
+    report = {"x_distance": 0,"x_capacity": 0,"y_distance": 0,"x_between_customers": 0,"y_between_customers": 0}
+    for t in range(DAYS-1):
+        day_nodes = np.array([i for i in x_nodes if i not in delivery_days or t in delivery_days[i]],dtype=np.int64)
+        off_diagonal = ~np.eye(len(day_nodes),dtype=bool)
+        distance = ~truck_distance[np.ix_(day_nodes,day_nodes)] & off_diagonal
+        capacity = ~truck_capacity[np.ix_(day_nodes,day_nodes)] & ~distance & off_diagonal
+        between = (day_nodes != 0)[:,None] & (day_nodes != 0)[None,:]
+        report["x_distance"] += len(trucks)*int(distance.sum())
+        report["x_capacity"] += len(trucks)*int(capacity.sum())
+        report["x_between_customers"] += len(trucks)*int(((distance | capacity) & between).sum())
+        for h in technicians:
+            home = len(customer_nodes)+1+h
+            day_nodes = np.array([home] + [j for j in tech_customers[h] if t in installation_days[j]],dtype=np.int64)
+            distance = ~tech_distance[h][np.ix_(day_nodes,day_nodes)] & ~np.eye(len(day_nodes),dtype=bool)
+            report["y_distance"] += int(distance.sum())
+            report["y_between_customers"] += int(distance[1:,1:].sum())
+    removed_x = report["x_distance"] + report["x_capacity"]
+    report["rows"] = {"truck_used": removed_x,"truck_day": removed_x,"cumulative_load": report.pop("x_between_customers"),
+                      "tech_used": report["y_distance"],"tech_day": report["y_distance"],"tech_cumulative_load": report.pop("y_between_customers")}
+    return report
+###########################################################
+###
+def prune_arcs(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,customer_order_size,machine_size,customer_machine_types,
+               start_delivery_window,end_delivery_window,technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,trace=None):
+    """
+    Purpose
+        Find the arcs that can be part of a feasible route and report the arcs and rows that are removed
+    Input
+        (the data of the instance, see read_file() in the ReadVeRoLogInstances file)
+        trace, RunTrace: the removed arcs and rows are recorded in the trace (None for no trace)
+    Output
+        truck_arcs, numpy array: boolean matrix over the depot and the customers, True if truck arc i to j is created
+        tech_arcs, list: for each technician a boolean matrix over all nodes, True if technician arc i to j is created
+    """
+    num_customers = len(customer_nodes)
+    order_volume = np.array([customer_order_size[j-1] * machine_size[customer_machine_types[j-1]] for j in customer_nodes],dtype=np.float64)
+    truck_distance,truck_capacity = feasible_truck_arcs(distance_matrix,num_customers,order_volume,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY)
+    tech_arcs = feasible_tech_arcs(distance_matrix,technicians,num_customers,technician_max_distance)
+    delivery_days,installation_days = service_days(DAYS,customer_nodes,start_delivery_window,end_delivery_window)
+    report = pruning_report(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,delivery_days,installation_days,truck_distance,truck_capacity,tech_arcs)
+    print("Removed {0} truck arcs over the maximum distance, {1} over the capacity and {2} technician arcs over the maximum distance".format(
+          report["x_distance"],report["x_capacity"],report["y_distance"]))
+    logging.info("Arc pruning: {0}".format(report))
+    if trace is not None:
+        trace.lap("pruning","arcs",x_distance=report["x_distance"],x_capacity=report["x_capacity"],y_distance=report["y_distance"],rows=sum(report["rows"].values()))
+        for family,rows in report["rows"].items():
+            trace.lap("pruning",family,rows=rows)
+    return truck_distance & truck_capacity,tech_arcs
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Run the MILP for multiple instances in parallel. The instances are taken from a directory (all txt or csv instances) or
+    a manifest (one instance per line with optionally the number of trucks or auto and the time limit), each instance is read, built,
+    solved, written and validated by run_instance() of the RunMILPVeRoLogMip file in a process pool. The cores are divided
+    between the concurrent solves and the CBC threads of each solve, every instance gets its own output directory with its
+    log file and a summary table of all instances is printed and stored at the end.
+
+    Example
+        python BatchRunVeRoLogMip.py instances/ --cores 32 --jobs 4 --max-seconds 7200 -o batch
+        python BatchRunVeRoLogMip.py manifest.txt --trucks 3
+
+    Manifest (fields separated by whitespace or ";", lines starting with # are skipped)
+        VSC2019_ORTEC_Small_04.txt 2 3600
+        VSC2019_ORTEC_Example.txt
+"""
+###########################################################
+### imports
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from SolverConfigVeRoLogMip import add_solver_arguments, solver_config_from_arguments #from local repository
+from FleetSizingVeRoLogMip import truck_count #from local repository
+###########################################################
+###
+def read_instances(source,number_of_trucks,max_seconds):
+    """
+    Purpose
+        Get the instances of a batch from a directory or a manifest
+    Input
+        source, str: directory with instances (txt, or csv if there is no txt with the same name) or manifest file
+        number_of_trucks, int: number of trucks if it is not given in the manifest (None for the fleet sizing)
+        max_seconds, float: time limit of each instance if it is not given in the manifest
+    Output
+        instances, list: (instance file, number of trucks, time limit) of each instance
+    """
+    instances = []
+    if os.path.isdir(source):
+        files = sorted(os.listdir(source))
+        for file_name in files:
+            name,extension = os.path.splitext(file_name)
+            if extension == ".txt" or (extension == ".csv" and name+".txt" not in files):
+                instances.append((os.path.abspath(os.path.join(source,file_name)),number_of_trucks,max_seconds))
+        return instances
+    manifest_dir = os.path.dirname(os.path.abspath(source))
+    with open(source) as manifest:
+        for line in manifest:
+            fields = line.replace(";"," ").split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            instance_file = fields[0] if os.path.isabs(fields[0]) else os.path.join(manifest_dir,fields[0])
+            trucks = truck_count(fields[1]) if len(fields) > 1 else number_of_trucks
+            seconds = float(fields[2]) if len(fields) > 2 else max_seconds
+            instances.append((instance_file,trucks,seconds))
+    return instances
+###########################################################
+###
+def divide_cores(cores,number_of_instances,jobs=None,threads=None):
+    """
+    Purpose
+        Divide the cores between the concurrent solves (jobs) and the CBC threads of each solve
+    Input
+        cores, int: number of cores that can be used
+        number_of_instances, int: number of instances in the batch
+        jobs, int: number of concurrent solves (None to use as many as possible)
+        threads, int: number of CBC threads per solve (None to divide the cores over the jobs)
+    Output
+        jobs, int: number of concurrent solves
+        threads, int: number of CBC threads per solve
+    """
+    if jobs is None:
+        jobs = max(1,min(number_of_instances,cores // (threads or 1)))
+    if threads is None:
+        threads = max(1,cores // jobs)
+    return jobs,threads
+###########################################################
+###
+@contextlib.contextmanager
+def redirect_output(file_name):
+    """
+    Purpose
+        Redirect the standard output and error of the process (including the output of the CBC library) to a file
+    Input
+        file_name, str: name of the file
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1),os.dup(2)]
+    with open(file_name,"w") as out_file:
+        os.dup2(out_file.fileno(),1)
+        os.dup2(out_file.fileno(),2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0],1)
+            os.dup2(saved[1],2)
+            os.close(saved[0])
+            os.close(saved[1])
+###########################################################
+###
+def run_batch_instance(instance_file,number_of_trucks,max_seconds,solver_config,output_dir,warm_start=None,symmetry_breaking=False,compact_linking=False):
+    """
+    Purpose
+        Run one instance of the batch in its own output directory, the output and the log of the run are written to the log
+        file of the instance. Note that this function is executed in a worker process of the pool
+    Input
+        instance_file, str: VeRoLog instance (txt) or csv file
+        number_of_trucks, int: total number of available trucks in optimization problem (None for the fleet sizing, see
+            run_fleet_sizing() in the RunMILPVeRoLogMip file)
+        max_seconds, float: time limit of the optimization
+        solver_config, dict: solver settings of the run (see the SolverConfigVeRoLogMip file)
+        output_dir, str: directory of the batch
+        warm_start, str: start of the optimization (see run_instance() in the RunMILPVeRoLogMip file, None for a cold start)
+        symmetry_breaking, bool: order the identical trucks and the equivalent technicians (see the SymmetryVeRoLogMip file)
+        compact_linking, bool: link u, v, p and q with one row per vehicle and customer instead of one row per arc
+    Output
+        summary, dict: summary of the run (see run_instance() in the RunMILPVeRoLogMip file) with the validation
+    """
+    from ReadVeRoLogInstances import convert_instance_to_csv #from local repository
+    from RunMILPVeRoLogMip import run_instance, run_fleet_sizing #from local repository
+    from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+    from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+    name = os.path.splitext(os.path.basename(instance_file))[0]
+    instance_dir = os.path.abspath(os.path.join(output_dir,name))
+    os.makedirs(instance_dir,exist_ok=True)
+    log_file_name = os.path.join(instance_dir,name+"_logs")
+    summary = {"instance": name,"trucks": number_of_trucks,"max_seconds": max_seconds,"threads": solver_config["threads"],"status": "ERROR",
+               "objective_value": None,"objective_bound": None,"valid": None,"wall": None,"log_file": log_file_name}
+    start = time.time()
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    handler = logging.FileHandler(log_file_name)
+    handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(message)s'))
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+    working_dir = os.getcwd()
+    try:
+        #the lp file, checkpoint and trace of the run are written in the directory of the instance
+        os.chdir(instance_dir)
+        with redirect_output(log_file_name+".out"):
+            txt_file = instance_file if instance_file.endswith(".txt") else os.path.splitext(instance_file)[0]+".txt"
+            if instance_file.endswith(".txt"):
+                csv_file = os.path.join(instance_dir,name+".csv")
+                convert_instance_to_csv(instance_file,csv_file)
+            else:
+                csv_file = instance_file
+            options = {"solver_config": solver_config,"warm_start": warm_start,"instance_file_name": txt_file,"symmetry_breaking": symmetry_breaking,
+                       "compact_linking": compact_linking}
+            if number_of_trucks is None:
+                summary.update(run_fleet_sizing(csv_file,os.path.join(instance_dir,"Solution_"+name),max_seconds,**options))
+            else:
+                summary.update(run_instance(csv_file,os.path.join(instance_dir,"Solution_"+name),number_of_trucks,max_seconds,**options))
+            if summary["solution_file"] is not None and os.path.exists(txt_file):
+                solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(txt_file))
+                summary["valid"] = bool(solution.isValid())
+                summary["cost"] = solution.calcCost.Cost
+                if not summary["valid"]:
+                    logging.error("Invalid solution: " + "; ".join(solution.errorReport))
+    except Exception:
+        logging.exception("Run of instance {0} failed".format(instance_file))
+    finally:
+        os.chdir(working_dir)
+        root_logger.removeHandler(handler)
+        handler.close()
+    summary["instance"] = name
+    summary["threads"] = solver_config["threads"]
+    summary["wall"] = time.time()-start
+    return summary
+###########################################################
+###
+def print_summary(summaries):
+    """
+    Purpose
+        Print the summary table of the batch
+    Input
+        summaries, list: summary of each instance
+    Output
+    """
+    print("{0:<30} {1:>6} {2:>7} {3:>18} {4:>12} {5:>12} {6:>6} {7:>10}".format("instance","trucks","threads","status","objective","bound","valid","wall (s)"))
+    for summary in summaries:
+        objective = "" if summary.get("objective_value") is None else "{0:.1f}".format(summary["objective_value"])
+        bound = "" if summary.get("objective_bound") is None else "{0:.1f}".format(summary["objective_bound"])
+        print("{0:<30} {1:>6} {2:>7} {3:>18} {4:>12} {5:>12} {6:>6} {7:>10.1f}".format(summary["instance"],summary["trucks"],summary["threads"],
+              str(summary["status"])[:18],objective,bound,str(summary.get("valid")),summary["wall"]))
+###########################################################
+### main
+def main():
+    parser = argparse.ArgumentParser(description="Run the VeRoLog MILP for multiple instances in parallel")
+    parser.add_argument("source",help="directory with instances (txt or csv) or manifest file")
+    parser.add_argument("--trucks","-t",type=truck_count,default=2,help="number of trucks, or auto for the fleet sizing (if not given in the manifest)")
+    parser.add_argument("--max-seconds","-s",type=float,default=36*60*60,help="time limit of each instance (if not given in the manifest)")
+    parser.add_argument("--cores",type=int,default=os.cpu_count() or 1,help="number of cores that can be used")
+    parser.add_argument("--jobs","-j",type=int,help="number of concurrent solves (default: divide the cores)")
+    parser.add_argument("--output-dir","-o",default="batch",help="directory of the output of the batch")
+    parser.add_argument("--warm-start",help="start the optimization from the schedule of the greedy heuristic (greedy) or from the best valid solution of the instance in a solution file or directory of solution files, for example the output directory of an earlier batch")
+    parser.add_argument("--symmetry-breaking",action="store_true",help="order the identical trucks and the equivalent technicians")
+    parser.add_argument("--compact-linking",action="store_true",help="link u, v, p and q with one row per vehicle and customer instead of one row per arc")
+    add_solver_arguments(parser)
+    args = parser.parse_args()
+    #without a number of threads (option or config file) the cores are divided over the jobs
+    solver_config = solver_config_from_arguments(args,{"threads": None})
+
+    instances = read_instances(args.source,args.trucks,args.max_seconds)
+    if not instances:
+        parser.error("no instances found in {0}".format(args.source))
+    jobs,threads = divide_cores(args.cores,len(instances),args.jobs,solver_config["threads"])
+    solver_config["threads"] = threads
+    #the workers run in the directory of their instance
+    warm_start = args.warm_start if args.warm_start in (None,"greedy") else os.path.abspath(args.warm_start)
+    os.makedirs(args.output_dir,exist_ok=True)
+    print("Running {0} instances, {1} at a time with {2} CBC threads each".format(len(instances),jobs,threads))
+    start = time.time()
+    summaries = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_batch_instance,instance_file,trucks,seconds,solver_config,args.output_dir,warm_start,args.symmetry_breaking,args.compact_linking) for instance_file,trucks,seconds in instances]
+        for future in concurrent.futures.as_completed(futures):
+            summary = future.result()
+            print("Finished {0} ({1}) at".format(summary["instance"],summary["status"]),time.time()-start)
+            summaries.append(summary)
+    summaries.sort(key=lambda summary: summary["instance"])
+    print_summary(summaries)
+    with open(os.path.join(args.output_dir,"summary.json"),"w") as summary_file:
+        json.dump(summaries,summary_file,indent=1,default=str)
+
+if __name__ == '__main__':
+    main()
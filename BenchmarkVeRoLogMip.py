@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Benchmark the stages of the MILP (reading the instance, pruning the arcs, creating the decision variables, the objective function and the
+    constraints, a time-boxed optimization, writing the solution file and validating it) over a set of instances. For every
+    stage the wall time, CPU time and peak memory are measured, together with the size of the instance and the model. The
+    scaling exponents of each stage against the number of customers, technicians and days are fitted on a log-log scale and
+    the results are stored per commit, so they can be compared between versions of the code.
+
+    Example
+        python BenchmarkVeRoLogMip.py VSC2019_ORTEC_Example.txt VSC2019_ORTEC_Small_04.txt -t 2 -s 60 --compare benchmarks/<file>.json
+"""
+###########################################################
+### imports
+import argparse
+import json
+import os
+import resource
+import time
+import tracemalloc
+import numpy as np
+import mip as mip
+from ReadVeRoLogInstances import read_file, convert_instance_to_csv #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables, create_customer_expressions, create_cost_functions, add_constraints #from local repository
+from WriteSolutionVeRoLogMip import create_solution_file, solution_vector #from local repository
+from InstrumentationVeRoLogMip import RunTrace, git_commit #from local repository
+from ArcPruningVeRoLogMip import prune_arcs #from local repository
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+
+STAGES = ["read","pruning","variables","expressions","objective","constraints","solve","solution_file","validation"]
+SIZE_FEATURES = ["customers","technicians","days"]
+###########################################################
+###
+class StageMeter(object):
+    """
+    Purpose
+        Measure a stage of the benchmark: the wall and CPU time (through the RunTrace), the peak memory allocated by python
+        during the stage (tracemalloc) and the maximum resident memory of the process after the stage
+    Input
+        trace, RunTrace: trace of the benchmark of one instance
+        stage, str: name of the stage
+        measure_memory, bool: measure the python memory with tracemalloc (this slows down the stage)
+    """
+    def __init__(self,trace,stage,measure_memory):
+        self.trace = trace
+        self.stage = stage
+        self.measure_memory = measure_memory
+
+    def __enter__(self):
+        if self.measure_memory:
+            tracemalloc.start()
+            tracemalloc.clear_traces()
+        self.phase = self.trace.phase(self.stage)
+        self.record = self.phase.__enter__()
+        return self.record
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.phase.__exit__(exc_type,exc_value,traceback)
+        if self.measure_memory:
+            self.record["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        self.record["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+        return False
+###########################################################
+###
+def benchmark_instance(instance_file,number_of_trucks,max_seconds,work_dir,measure_memory=True):
+    """
+    Purpose
+        Run all stages of the MILP for one instance
+    Input
+        instance_file, str: VeRoLog instance (txt, converted to csv) or csv file (the solution is then not validated)
+        number_of_trucks, int: total number of available trucks in optimization problem
+        max_seconds, float: time limit of the optimization
+        work_dir, str: directory for the csv and solution files
+        measure_memory, bool: measure the python memory with tracemalloc
+    Output
+        result, dict: size of the instance and the model, and the record (time, memory) of each stage
+    """
+    name = os.path.splitext(os.path.basename(instance_file))[0]
+    if instance_file.endswith(".csv"):
+        csv_file,txt_file = instance_file,None
+    else:
+        csv_file,txt_file = os.path.join(work_dir,name+".csv"),instance_file
+        convert_instance_to_csv(txt_file,csv_file)
+    start = time.time()
+    trace = RunTrace(name)
+    with StageMeter(trace,"read",measure_memory):
+        DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position = read_file(csv_file,number_of_trucks)
+    opt_model = mip.Model(name=name,solver_name=mip.CBC)
+    opt_model.verbose = 0
+    #the same pruned model as run_instance() in the RunMILPVeRoLogMip file
+    with StageMeter(trace,"pruning",measure_memory):
+        truck_arcs,tech_arcs = prune_arcs(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,customer_order_size,machine_size,customer_machine_types,start_delivery_window,end_delivery_window,
+                                          technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix)
+    with StageMeter(trace,"variables",measure_memory):
+        x,y,w,u,v,p,q,z,l = create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,tech_customers,nodes,technician_nodes,customer_nodes,start,
+                                                       start_delivery_window=start_delivery_window,end_delivery_window=end_delivery_window,truck_arcs=truck_arcs,tech_arcs=tech_arcs)
+    with StageMeter(trace,"expressions",measure_memory):
+        delivery_day,installation_day = create_customer_expressions(x,y,DAYS,technicians,trucks,customer_nodes,start)
+    with StageMeter(trace,"objective",measure_memory):
+        cost_functions = create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,distance_matrix,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,customer_nodes,customer_machine_types,delivery_day,installation_day,start)
+        objective_func = mip.xsum(cost_functions)
+        opt_model.objective = mip.minimize(objective_func)
+    with StageMeter(trace,"constraints",measure_memory) as record:
+        opt_model = add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,tech_customers,tech_customer_position,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,LARGE_NUMBER,start)
+    with StageMeter(trace,"solve",False) as record:
+        status = opt_model.optimize(max_seconds=max_seconds)
+        record.update(status=status.name,objective_value=opt_model.objective_value,objective_bound=opt_model.objective_bound)
+    valid = None
+    if opt_model.num_solutions:
+        solution_file = os.path.join(work_dir,name+"_solution")
+        with StageMeter(trace,"solution_file",measure_memory) as record:
+            try:
+                create_solution_file(solution_file,name+".txt",objective_func,cost_functions[-1],x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,distance_matrix,solution_vector(opt_model))
+            except ValueError as error:
+                #the solution is not a set of routes, it is not validated
+                valid = False
+                record["error"] = str(error)
+        if txt_file is not None and valid is None:
+            with StageMeter(trace,"validation",measure_memory) as record:
+                solution = SolutionVerolog2019(solution_file+".txt",InstanceVerolog2019(txt_file))
+                valid = bool(solution.isValid())
+                record.update(valid=valid,cost=solution.calcCost.Cost)
+    result = {"instance": name,"customers": len(customer_nodes),"technicians": len(technicians),"days": DAYS,"trucks": len(trucks),
+              "columns": opt_model.num_cols,"rows": opt_model.num_rows,"nonzeros": opt_model.num_nz,
+              "status": status.name,"objective_value": opt_model.objective_value,"valid": valid,
+              "stages": {record["stage"]: record for record in trace.records}}
+    return result
+###########################################################
+###
+def fit_scaling_exponents(results,stage,value="wall"):
+    """
+    Purpose
+        Fit the scaling exponents of a stage on a log-log scale: log(time) = a + b*log(size), for each size feature
+        separately and, if there are enough instances, for all size features together
+    Input
+        results, list: results of benchmark_instance()
+        stage, str: name of the stage
+        value, str: measured value of the stage ("wall", "cpu", "python_peak_mb", ...)
+    Output
+        exponents, dict: feature (keys) and fitted exponent (values), "joint" holds the exponents of the joint fit
+    """
+    points = [r for r in results if stage in r["stages"] and r["stages"][stage].get(value,0) > 0]
+    exponents = {}
+    if len(points) < 2:
+        return exponents
+    measured = np.log([r["stages"][stage][value] for r in points])
+    features = np.log([[max(r[f],1) for f in SIZE_FEATURES] for r in points])
+    for pos,feature in enumerate(SIZE_FEATURES):
+        if np.ptp(features[:,pos]) > 0:
+            exponents[feature] = float(np.polyfit(features[:,pos],measured,1)[0])
+    varying = [pos for pos in range(len(SIZE_FEATURES)) if np.ptp(features[:,pos]) > 0]
+    if varying and len(points) > len(varying) + 1:
+        design = np.column_stack([np.ones(len(points))] + [features[:,pos] for pos in varying])
+        coefficients = np.linalg.lstsq(design,measured,rcond=None)[0]
+        exponents["joint"] = {SIZE_FEATURES[pos]: float(c) for pos,c in zip(varying,coefficients[1:])}
+    return exponents
+###########################################################
+###
+def print_results(results,baseline=None):
+    """
+    Purpose
+        Print the time and memory of each stage per instance, with the ratio to the baseline if given
+    Input
+        results, list: results of benchmark_instance()
+        baseline, dict: stored benchmark (see main()) to compare with (None for no comparison)
+    Output
+    """
+    baseline_results = {r["instance"]: r for r in baseline["results"]} if baseline else {}
+    print("{0:<30} {1:>8} {2:>8} {3:>8} {4:<14} {5:>10} {6:>10} {7:>10} {8:>8}".format(
+        "instance","columns","rows","nonzeros","stage","wall (s)","cpu (s)","peak (MB)","ratio"))
+    for result in results:
+        for stage in STAGES:
+            if stage not in result["stages"]:
+                continue
+            record = result["stages"][stage]
+            ratio = ""
+            old = baseline_results.get(result["instance"],{}).get("stages",{}).get(stage)
+            if old and old["wall"] > 0:
+                ratio = "{0:.2f}".format(record["wall"]/old["wall"])
+            print("{0:<30} {1:>8} {2:>8} {3:>8} {4:<14} {5:>10.3f} {6:>10.3f} {7:>10.1f} {8:>8}".format(
+                result["instance"],result["columns"],result["rows"],result["nonzeros"],stage,record["wall"],record["cpu"],
+                record.get("python_peak_mb",0.0),ratio))
+###########################################################
+### main
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the VeRoLog MILP over a set of instances")
+    parser.add_argument("instances",nargs="+",help="VeRoLog instances (txt) or csv files")
+    parser.add_argument("--trucks","-t",type=int,default=2,help="number of trucks in the model")
+    parser.add_argument("--max-seconds","-s",type=float,default=60,help="time limit of the optimization of each instance")
+    parser.add_argument("--output-dir","-o",default="benchmarks",help="directory where the results are stored")
+    parser.add_argument("--compare","-c",help="stored results to compare with")
+    parser.add_argument("--no-memory",action="store_true",help="do not measure the python memory (tracemalloc slows down the stages)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir,exist_ok=True)
+    work_dir = os.path.join(args.output_dir,"work")
+    os.makedirs(work_dir,exist_ok=True)
+    results = []
+    for instance_file in args.instances:
+        print("Benchmarking",instance_file)
+        results.append(benchmark_instance(instance_file,args.trucks,args.max_seconds,work_dir,not args.no_memory))
+    scaling = {stage: fit_scaling_exponents(results,stage) for stage in STAGES}
+    commit = git_commit()
+    benchmark = {"commit": commit,"date": time.strftime("%Y-%m-%dT%H:%M:%S"),"trucks": args.trucks,"max_seconds": args.max_seconds,
+                 "results": results,"scaling_exponents": scaling}
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_results(results,baseline)
+    for stage,exponents in scaling.items():
+        if exponents:
+            print("Scaling exponents of {0}: {1}".format(stage,exponents))
+    file_name = os.path.join(args.output_dir,"{0}_{1}.json".format(time.strftime("%Y%m%d_%H%M%S"),(commit or "nocommit")[:10]))
+    with open(file_name,"w") as benchmark_file:
+        json.dump(benchmark,benchmark_file,indent=1,default=str)
+    print("Stored the results in",file_name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Append-only checkpoints of the constraints of the MILP. Every constraint family that is added to the model is appended
+    in binary (compressed sparse row) form to a data file and registered in a manifest, so a checkpoint only writes the rows
+    added since the previous one. When the model building is restarted the families in the checkpoint are loaded back into
+    the model and only the remaining families are built. Note that the checkpoint is used in add_constraints() of the
+    RunMILPVeRoLogMip file and that it is removed when all constraints are added, so only a build that stopped can be resumed.
+"""
+###########################################################
+### imports
+import hashlib
+import json
+import logging
+import os
+import shutil
+import numpy as np
+from ConstraintMatrixVeRoLogMip import ConstraintFamily #from local repository
+###########################################################
+###
+def model_fingerprint(opt_model,instance_file_name=None,options=None):
+    """
+    Purpose
+        Calculate a fingerprint of the model, a checkpoint can only be resumed for the same columns, the same instance data
+        and the same build options (the rows depend on all of them)
+    Input
+        opt_model, mip.model: model we are optimizing (or a ColumnAllocator)
+        instance_file_name, str: filename of the VeRoLog instance the model is built from (None to leave it out)
+        options, dict: the options that change the constraint families, for example the symmetry breaking (None for none)
+    Output
+        fingerprint, str: hash of the number and the names of the columns, the content of the instance file and the options
+    """
+    col_names = opt_model.col_names if hasattr(opt_model,"col_names") else [var.name for var in opt_model.vars]
+    digest = hashlib.sha1(str(len(col_names)).encode("utf-8"))
+    for name in col_names:
+        digest.update(b"\0"+name.encode("utf-8"))
+    if instance_file_name is not None:
+        digest.update(b"\0instance\0")
+        with open(instance_file_name,"rb") as instance_file:
+            for block in iter(lambda: instance_file.read(1 << 20),b""):
+                digest.update(block)
+    if options is not None:
+        digest.update(b"\0options\0"+json.dumps(options,sort_keys=True,default=str).encode("utf-8"))
+    return digest.hexdigest()
+###########################################################
+###
+class ModelCheckpoint(object):
+    """
+    Purpose
+        Append-only checkpoint of constraint families, stored in a directory with three files:
+        header.json (the fingerprint of the model), constraints.bin (the arrays of each family, appended)
+        and manifest.jsonl (one line per family with the offset of its arrays in constraints.bin)
+    Input
+        directory, str: directory of the checkpoint
+        fingerprint, str: fingerprint of the model (see model_fingerprint())
+    """
+    def __init__(self,directory,fingerprint):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.header_file = os.path.join(directory,"header.json")
+        self.data_file = os.path.join(directory,"constraints.bin")
+        self.manifest_file = os.path.join(directory,"manifest.jsonl")
+        self.entries = []
+        if os.path.exists(self.header_file):
+            with open(self.header_file) as header:
+                stored = json.load(header)
+            if stored.get("fingerprint") == fingerprint:
+                self._recover()
+            else:
+                logging.warning("Checkpoint {0} belongs to another model, starting a new checkpoint".format(directory))
+                self.clear()
+        if not os.path.exists(self.header_file):
+            os.makedirs(directory,exist_ok=True)
+            open(self.data_file,"wb").close()
+            open(self.manifest_file,"w").close()
+            with open(self.header_file,"w") as header:
+                json.dump({"fingerprint": fingerprint},header)
+
+    def _recover(self):
+        """
+        Purpose
+            Read the manifest, a family that was not completely written (the process stopped while writing) is removed
+        """
+        data_size = os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+        valid_lines = []
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file) as manifest:
+                for line in manifest:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith("\n") or entry["offset"] + entry["bytes"] > data_size:
+                        break
+                    self.entries.append(entry)
+                    valid_lines.append(line)
+        end = self.entries[-1]["offset"] + self.entries[-1]["bytes"] if self.entries else 0
+        with open(self.data_file,"ab") as data:
+            data.truncate(end)
+        with open(self.manifest_file,"w") as manifest:
+            manifest.write("".join(valid_lines))
+        logging.info("Resuming checkpoint {0} with {1} constraint families".format(self.directory,len(self.entries)))
+
+    def keys(self):
+        """
+        Purpose
+            Get the (name,day) of the families in the checkpoint
+        """
+        return set((entry["name"],entry["day"]) for entry in self.entries)
+
+    def append(self,family):
+        """
+        Purpose
+            Append a constraint family to the checkpoint, the manifest line is only written after the arrays are on disk
+        """
+        arrays = (family.indptr.astype(np.int64),family.indices.astype(np.int32),family.data.astype(np.float64),family.rhs.astype(np.float64))
+        with open(self.data_file,"ab") as data:
+            offset = data.tell()
+            for array in arrays:
+                data.write(array.tobytes())
+            data.flush()
+            os.fsync(data.fileno())
+        entry = {"name": family.name,"day": family.day,"sense": family.sense,"num_rows": family.num_rows,"num_nz": family.num_nz,
+                 "offset": offset,"bytes": sum(array.nbytes for array in arrays)}
+        with open(self.manifest_file,"a") as manifest:
+            manifest.write(json.dumps(entry)+"\n")
+            manifest.flush()
+            os.fsync(manifest.fileno())
+        self.entries.append(entry)
+
+    def families(self):
+        """
+        Purpose
+            Read the constraint families in the checkpoint, in the order they were appended (generator)
+        """
+        with open(self.data_file,"rb") as data:
+            for entry in self.entries:
+                data.seek(entry["offset"])
+                indptr = np.fromfile(data,dtype=np.int64,count=entry["num_rows"]+1)
+                indices = np.fromfile(data,dtype=np.int32,count=entry["num_nz"])
+                values = np.fromfile(data,dtype=np.float64,count=entry["num_nz"])
+                rhs = np.fromfile(data,dtype=np.float64,count=entry["num_rows"])
+                yield ConstraintFamily.from_csr(entry["name"],entry["day"],indptr,indices,values,entry["sense"],rhs)
+
+    def clear(self):
+        """
+        Purpose
+            Remove the checkpoint
+        """
+        self.entries = []
+        shutil.rmtree(self.directory,ignore_errors=True)
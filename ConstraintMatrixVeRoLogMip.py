@@ -0,0 +1,556 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Assemble the constraints of the MILP as sparse matrices instead of adding them one by one as mip linear expressions.
+    Each constraint family (for example the cumulative load of the trucks on one day) is built with numpy as a matrix in
+    compressed sparse row format over the column indices of the decision variables and its rows are then streamed into the
+    solver straight from the arrays (see add_constraint_family()). Note that the functions in this file are called from add_constraints() in the RunMILPVeRoLogMip file.
+"""
+###########################################################
+### imports
+import numpy as np
+import mip as mip
+try:
+    from mip.cbc import SolverCbc, cbclib, ffi
+except (ImportError, AttributeError): #the CBC library of python-mip could not be loaded
+    SolverCbc = None
+###########################################################
+###
+def coo_to_csr(rows,cols,vals,num_rows):
+    """
+    Purpose
+        Transform a sparse matrix in coordinate format to compressed sparse row format, entries with the same row and column
+        are summed and entries that sum to zero are removed
+    Input
+        rows, numpy array: row of each entry
+        cols, numpy array: column of each entry
+        vals, numpy array: value of each entry
+        num_rows, int: number of rows in the matrix
+    Output
+        indptr, numpy array: the entries of row r are found at indptr[r] until indptr[r+1]
+        indices, numpy array: column of each entry
+        data, numpy array: value of each entry
+    """
+    rows = np.asarray(rows,dtype=np.int64)
+    cols = np.asarray(cols,dtype=np.int64)
+    vals = np.asarray(vals,dtype=np.float64)
+    order = np.lexsort((cols,rows))
+    rows,cols,vals = rows[order],cols[order],vals[order]
+    if len(rows) > 0:
+        first = np.ones(len(rows),dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        first = np.flatnonzero(first)
+        vals = np.add.reduceat(vals,first)
+        rows,cols = rows[first],cols[first]
+        nonzero = vals != 0
+        rows,cols,vals = rows[nonzero],cols[nonzero],vals[nonzero]
+    indptr = np.zeros(num_rows+1,dtype=np.int64)
+    np.cumsum(np.bincount(rows,minlength=num_rows),out=indptr[1:])
+    return indptr,cols.astype(np.int32),vals
+###########################################################
+###
+class ConstraintFamily(object):
+    """
+    Purpose
+        A family of constraints with the same sense, stored as a sparse matrix in compressed sparse row format
+    Input
+        name, str: name of the constraint family
+        day, int: index of the day of the family (None if the family is not built per day)
+        rows, numpy array: row of each entry (coordinate format)
+        cols, numpy array: column index of the decision variable of each entry (coordinate format)
+        vals, numpy array: coefficient of each entry (coordinate format)
+        sense, str: sense of the constraints (mip.LESS_OR_EQUAL, mip.GREATER_OR_EQUAL or mip.EQUAL)
+        rhs, numpy array: right hand side of each row
+    """
+    def __init__(self,name,day,rows,cols,vals,sense,rhs):
+        self.name = name
+        self.day = day
+        self.sense = sense
+        self.rhs = np.asarray(rhs,dtype=np.float64)
+        self.indptr,self.indices,self.data = coo_to_csr(rows,cols,vals,len(self.rhs))
+
+    @classmethod
+    def from_csr(cls,name,day,indptr,indices,data,sense,rhs):
+        """
+        Purpose
+            Create a constraint family from a matrix that is already in compressed sparse row format
+        """
+        family = cls.__new__(cls)
+        family.name = name
+        family.day = day
+        family.sense = sense
+        family.rhs = np.asarray(rhs,dtype=np.float64)
+        family.indptr = np.asarray(indptr,dtype=np.int64)
+        family.indices = np.asarray(indices,dtype=np.int32)
+        family.data = np.asarray(data,dtype=np.float64)
+        return family
+
+    @property
+    def num_rows(self):
+        return len(self.rhs)
+
+    @property
+    def num_nz(self):
+        return len(self.data)
+
+    def row_prefix(self):
+        """
+        Purpose
+            Get the prefix of the row names of the family
+        """
+        return self.name if self.day is None else "{0}_{1}".format(self.name,self.day)
+
+    def row_names(self):
+        """
+        Purpose
+            Get a unique name for each row of the family
+        """
+        prefix = self.row_prefix()
+        return ["{0}_{1}".format(prefix,r) for r in range(self.num_rows)]
+
+    def activity(self,values):
+        """
+        Purpose
+            Calculate the left hand side of each row for the given values of the decision variables
+        Input
+            values, numpy array: value of each decision variable (indexed by column index)
+        Output
+            activity, numpy array: left hand side of each row
+        """
+        products = self.data * np.asarray(values,dtype=np.float64)[self.indices]
+        activity = np.zeros(self.num_rows)
+        row_of_entry = np.repeat(np.arange(self.num_rows),np.diff(self.indptr))
+        np.add.at(activity,row_of_entry,products)
+        return activity
+###########################################################
+###
+class ColumnIndex(object):
+    """
+    Purpose
+        Numpy arrays with the column index of each decision variable in the model, these are used to build the constraint
+        matrices. The arcs of x and y are stored as arrays of (t, k or h, i, j, column index)
+    Input
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
+        w, mip.Var: decision variable indicating if on day t technician h has worked for 5 days in a row
+        u, mip.Var: decision variable for calculation of the number of trucks used in the problem
+        v, mip.Var: decision variable for calculation of the number of truck days in the problem
+        p, mip.Var: decision variable for calculation of the number of technicians used in the problem
+        q, mip.Var: decision variable for calculation of the number of technician days in the problem
+        z, mip.Var: decision variable for cumulative load on day t, in truck k, delivering to customer j
+        l, mip.Var: decision variable for cumulative load on day t, for technician h, installing at customer j
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        trucks, list: trucks in the problem
+        tech_customers, list: sorted customer nodes where each technician can install
+        nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
+    """
+    def __init__(self,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,tech_customers,nodes):
+        self.num_nodes = len(nodes)
+        self.x = x.arrays()
+        self.y = y.arrays()
+        self.x_days = [np.flatnonzero(self.x[0] == t) for t in range(DAYS-1)]
+        self.y_days = [np.flatnonzero(self.y[0] == t) for t in range(DAYS-1)]
+        self.u = np.array([var.idx for var in u],dtype=np.int64)
+        self.v = np.array([[var.idx for var in v_t] for v_t in v],dtype=np.int64).reshape(DAYS-1,len(trucks))
+        self.p = np.array([var.idx for var in p],dtype=np.int64)
+        self.q = np.array([[var.idx for var in q_t] for q_t in q],dtype=np.int64).reshape(DAYS-1,len(technicians))
+        self.w = np.array([[var.idx for var in w_t] for w_t in w],dtype=np.int64).reshape(len(w),len(technicians))
+        #the model can be built without trucks or technicians (see the DecompositionVeRoLogMip file)
+        self.z = np.array([[[var.idx for var in z_tk] for z_tk in z_t] for z_t in z],dtype=np.int64).reshape(DAYS-1,len(trucks),-1 if trucks else 0)
+        #l is indexed by node, -1 if the technician cannot install at the node
+        self.l = np.full((DAYS-1,len(technicians),self.num_nodes),-1,dtype=np.int64)
+        for t in range(DAYS-1):
+            for h in technicians:
+                for pos,j in enumerate(tech_customers[h]):
+                    if pos < len(l[t][h]):
+                        self.l[t,h,j] = l[t][h][pos].idx
+
+    def arcs(self,var_name,t):
+        """
+        Purpose
+            Get the arcs of x or y on day t
+        Input
+            var_name, str: "x" or "y"
+            t, int: index of the day
+        Output
+            k_h, numpy array: truck or technician of each arc
+            i, numpy array: node we are leaving
+            j, numpy array: node we are entering
+            col, numpy array: column index of the variable of each arc
+        """
+        arcs,days = (self.x,self.x_days) if var_name == "x" else (self.y,self.y_days)
+        index = days[t]
+        return arcs[1][index],arcs[2][index],arcs[3][index],arcs[4][index]
+###########################################################
+###
+def _gather_groups(group_keys,query_keys):
+    """
+    Purpose
+        For each query key, find all the positions in group_keys with the same key (for example all arcs entering a node)
+    Input
+        group_keys, numpy array: key of each element
+        query_keys, numpy array: keys that are searched
+    Output
+        query_pos, numpy array: position in query_keys of each match
+        group_pos, numpy array: position in group_keys of each match
+    """
+    order = np.argsort(group_keys,kind="stable")
+    sorted_keys = group_keys[order]
+    first = np.searchsorted(sorted_keys,query_keys,side="left")
+    lengths = np.searchsorted(sorted_keys,query_keys,side="right") - first
+    query_pos = np.repeat(np.arange(len(query_keys)),lengths)
+    offsets = np.arange(len(query_pos)) - np.repeat(np.cumsum(lengths)-lengths,lengths)
+    group_pos = order[np.repeat(first,lengths) + offsets]
+    return query_pos,group_pos
+###########################################################
+###
+def linking_families(columns,t):
+    """
+    Purpose
+        Constraints that set u, v, p and q to 1 if a truck or technician travels any arc (on day t)
+    """
+    for var_name,family_used,family_day,used,day in (("x","truck_used","truck_day",columns.u,columns.v),
+                                                     ("y","tech_used","tech_day",columns.p,columns.q)):
+        k_h,i,j,col = columns.arcs(var_name,t)
+        rows = np.arange(len(col))
+        ones = np.ones(len(col))
+        yield ConstraintFamily(family_used,t,np.r_[rows,rows],np.r_[used[k_h],col],np.r_[ones,-ones],mip.GREATER_OR_EQUAL,np.zeros(len(col)))
+        yield ConstraintFamily(family_day,t,np.r_[rows,rows],np.r_[day[t][k_h],col],np.r_[ones,-ones],mip.GREATER_OR_EQUAL,np.zeros(len(col)))
+###########################################################
+###
+def compact_linking_families(columns,t,customer_nodes):
+    """
+    Purpose
+        Constraints that set v and q to 1 if a truck or technician enters any customer and u and p to 1 if the truck or
+        technician works on day t. A customer is entered at most once, so one row per vehicle and customer (the sum of the
+        arcs entering the customer) replaces the rows of all these arcs, the arcs into the depot or home follow from the
+        flow conservation (node_ent_leave_x and node_ent_leave_tech)
+    """
+    num_customers = len(customer_nodes)
+    for var_name,family_used,family_day,used,day in (("x","truck_used","truck_day",columns.u,columns.v),
+                                                     ("y","tech_used","tech_day",columns.p,columns.q)):
+        k_h,i,j,col = columns.arcs(var_name,t)
+        to_customer = (j >= 1) & (j <= num_customers)
+        keys,rows = np.unique(k_h[to_customer]*columns.num_nodes+j[to_customer],return_inverse=True)
+        vehicles = keys // columns.num_nodes
+        yield ConstraintFamily(family_day,t,np.r_[np.arange(len(keys)),rows],np.r_[day[t][vehicles],col[to_customer]],
+                               np.r_[np.ones(len(keys)),-np.ones(len(rows))],mip.GREATER_OR_EQUAL,np.zeros(len(keys)))
+        vehicles = np.arange(len(used))
+        yield ConstraintFamily(family_used,t,np.r_[vehicles,vehicles],np.r_[used,day[t]],
+                               np.r_[np.ones(len(used)),-np.ones(len(used))],mip.GREATER_OR_EQUAL,np.zeros(len(used)))
+###########################################################
+###
+def distance_families(columns,t,trucks,technicians,customer_nodes,technician_max_visits,technician_max_distance,TRUCK_MAX_DISTANCE,distance_matrix):
+    """
+    Purpose
+        Constraints on the daily driving distance of the trucks and technicians and on the number of technician visits
+    """
+    k,i,j,col = columns.arcs("x",t)
+    yield ConstraintFamily("truck_dist",t,k,col,distance_matrix[i,j],mip.LESS_OR_EQUAL,np.full(len(trucks),TRUCK_MAX_DISTANCE))
+    h,i,j,col = columns.arcs("y",t)
+    yield ConstraintFamily("tech_dist",t,h,col,distance_matrix[i,j],mip.LESS_OR_EQUAL,technician_max_distance)
+    to_customer = (j >= 1) & (j <= len(customer_nodes))
+    yield ConstraintFamily("tech_visit",t,h[to_customer],col[to_customer],np.ones(to_customer.sum()),mip.LESS_OR_EQUAL,technician_max_visits)
+###########################################################
+###
+def customer_families(columns,DAYS,customer_nodes,start_delivery_window,end_delivery_window,delivery_customers=None,installation_customers=None):
+    """
+    Purpose
+        Constraints that every customer is delivered and installed once, within the delivery window and the horizon and
+        at least one day after delivery. If only some customers are delivered or installed in the model (for example in a
+        window of the RollingHorizonVeRoLogMip file), the other customers are delivered or installed zero times
+    """
+    num_customers = len(customer_nodes)
+    nodes = np.arange(1,num_customers+1)
+    deliver = np.ones(num_customers) if delivery_customers is None else np.isin(nodes,list(delivery_customers)).astype(np.float64)
+    install = np.ones(num_customers) if installation_customers is None else np.isin(nodes,list(installation_customers)).astype(np.float64)
+    x_t,x_k,x_i,x_j,x_col = columns.x
+    y_t,y_h,y_i,y_j,y_col = columns.y
+    x_in = (x_j >= 1) & (x_j <= num_customers)
+    y_in = (y_j >= 1) & (y_j <= num_customers)
+    x_t,x_j,x_col = x_t[x_in],x_j[x_in]-1,x_col[x_in]
+    y_t,y_j,y_col = y_t[y_in],y_j[y_in]-1,y_col[y_in]
+    start_window = np.asarray(start_delivery_window)
+    end_window = np.asarray(end_delivery_window)
+    ones = np.ones(num_customers)
+    yield ConstraintFamily("cust_delivery",None,x_j,x_col,np.ones(len(x_col)),mip.EQUAL,deliver)
+    yield ConstraintFamily("tech_delivery",None,y_j,y_col,np.ones(len(y_col)),mip.EQUAL,install)
+    yield ConstraintFamily("start_delivery_window",None,x_j,x_col,start_window[x_j]-x_t,mip.LESS_OR_EQUAL,np.zeros(num_customers))
+    yield ConstraintFamily("end_delivery_window",None,x_j,x_col,x_t,mip.LESS_OR_EQUAL,end_window)
+    #the index t of y is day t+1
+    yield ConstraintFamily("start_installation_window",None,np.r_[x_j,y_j],np.r_[x_col,y_col],np.r_[x_t,-(y_t+1)],mip.LESS_OR_EQUAL,-install)
+    yield ConstraintFamily("end_installation_window",None,y_j,y_col,y_t+1,mip.LESS_OR_EQUAL,(DAYS-1)*ones)
+###########################################################
+###
+def node_enter_leave_families(columns,t):
+    """
+    Purpose
+        Constraints that a truck or technician leaves every node it enters (on day t)
+    """
+    for var_name,family in (("x","node_ent_leave_x"),("y","node_ent_leave_tech")):
+        k_h,i,j,col = columns.arcs(var_name,t)
+        node_keys,rows = np.unique(np.r_[k_h*columns.num_nodes+j,k_h*columns.num_nodes+i],return_inverse=True)
+        yield ConstraintFamily(family,t,rows,np.r_[col,col],np.r_[np.ones(len(col)),-np.ones(len(col))],mip.EQUAL,np.zeros(len(node_keys)))
+###########################################################
+###
+def truck_capacity_families(columns,t,trucks,customer_nodes,order_volume,TRUCK_CAPACITY):
+    """
+    Purpose
+        Constraints that set the cumulative load z of a truck at a customer to at least the ordersize of the customer and
+        at most the truck capacity (on day t)
+    """
+    num_customers = len(customer_nodes)
+    k,i,j,col = columns.arcs("x",t)
+    to_customer = (j >= 1) & (j <= num_customers)
+    z_rows = np.arange(len(trucks)*num_customers)
+    z_col = columns.z[t].reshape(-1)
+    rows = np.r_[k[to_customer]*num_customers + j[to_customer]-1,z_rows]
+    cols = np.r_[col[to_customer],z_col]
+    vals = np.r_[order_volume[j[to_customer]-1],-np.ones(len(z_col))]
+    yield ConstraintFamily("truck_capacity_lower",t,rows,cols,vals,mip.LESS_OR_EQUAL,np.zeros(len(z_rows)))
+    yield ConstraintFamily("truck_capacity_upper",t,z_rows,z_col,np.ones(len(z_col)),mip.LESS_OR_EQUAL,np.full(len(z_rows),TRUCK_CAPACITY))
+###########################################################
+###
+def cumulative_load_family(columns,t,customer_nodes,order_volume,TRUCK_CAPACITY):
+    """
+    Purpose
+        Constraints on the cumulative load of the trucks (on day t): if truck k drives from customer i to customer j, the
+        load at j is at least the load at i plus the ordersize of j. These big M constraints also eliminate the subtours,
+        they are not replaced by lazy subtour cuts because the lazy constraints of the CBC library of python-mip do not
+        stop at the time limit
+    """
+    num_customers = len(customer_nodes)
+    k,i,j,col = columns.arcs("x",t)
+    between = (i != 0) & (j != 0) & (i != j)
+    a_k,a_i,a_j,a_col = k[between],i[between],j[between],col[between]
+    num_rows = len(a_col)
+    rows = np.arange(num_rows)
+    #ordersize of j that is delivered by truck k (all arcs entering j)
+    to_customer = (j >= 1) & (j <= num_customers)
+    in_k,in_j,in_col = k[to_customer],j[to_customer],col[to_customer]
+    query_pos,group_pos = _gather_groups(in_k*columns.num_nodes+in_j,a_k*columns.num_nodes+a_j)
+    rows = np.r_[rows,rows,rows,query_pos]
+    cols = np.r_[columns.z[t][a_k,a_j-1],columns.z[t][a_k,a_i-1],a_col,in_col[group_pos]]
+    vals = np.r_[np.ones(num_rows),-np.ones(num_rows),np.full(num_rows,-TRUCK_CAPACITY),-order_volume[a_j[query_pos]-1]]
+    return ConstraintFamily("cumulative_load",t,rows,cols,vals,mip.GREATER_OR_EQUAL,np.full(num_rows,-TRUCK_CAPACITY))
+###########################################################
+###
+def tech_capacity_families(columns,t,technician_max_visits):
+    """
+    Purpose
+        Constraints that set the cumulative load l of a technician at a customer to at least 1 if the customer is visited
+        and at most the maximum number of visits (on day t)
+    """
+    l_h,l_j = np.nonzero(columns.l[t] >= 0)
+    l_col = columns.l[t][l_h,l_j]
+    row_of_node = np.full(columns.l[t].shape,-1,dtype=np.int64)
+    row_of_node[l_h,l_j] = np.arange(len(l_col))
+    h,i,j,col = columns.arcs("y",t)
+    visit_rows = row_of_node[h,j]
+    visit = visit_rows >= 0
+    rows = np.r_[visit_rows[visit],np.arange(len(l_col))]
+    cols = np.r_[col[visit],l_col]
+    vals = np.r_[np.ones(visit.sum()),-np.ones(len(l_col))]
+    yield ConstraintFamily("tech_capacity_lower",t,rows,cols,vals,mip.LESS_OR_EQUAL,np.zeros(len(l_col)))
+    yield ConstraintFamily("tech_capacity_upper",t,np.arange(len(l_col)),l_col,np.ones(len(l_col)),mip.LESS_OR_EQUAL,np.asarray(technician_max_visits)[l_h])
+###########################################################
+###
+def tech_cumulative_load_family(columns,t,technician_max_visits):
+    """
+    Purpose
+        Constraints on the cumulative load of the technicians (on day t): if technician h drives from customer i to
+        customer j, the number of visits at j is at least the number of visits at i plus 1
+    """
+    h,i,j,col = columns.arcs("y",t)
+    l_t = columns.l[t]
+    is_customer_i = l_t[h,i] >= 0
+    is_customer_j = l_t[h,j] >= 0
+    between = is_customer_i & is_customer_j & (i != j)
+    a_h,a_i,a_j,a_col = h[between],i[between],j[between],col[between]
+    num_rows = len(a_col)
+    rows = np.arange(num_rows)
+    max_visits = np.asarray(technician_max_visits,dtype=np.float64)[a_h]
+    #all arcs entering j for technician h
+    in_h,in_j,in_col = h[is_customer_j],j[is_customer_j],col[is_customer_j]
+    query_pos,group_pos = _gather_groups(in_h*columns.num_nodes+in_j,a_h*columns.num_nodes+a_j)
+    rows = np.r_[rows,rows,rows,query_pos]
+    cols = np.r_[l_t[a_h,a_j],l_t[a_h,a_i],a_col,in_col[group_pos]]
+    vals = np.r_[np.ones(num_rows),-np.ones(num_rows),-max_visits,-np.ones(len(query_pos))]
+    return ConstraintFamily("tech_cumulative_load",t,rows,cols,vals,mip.GREATER_OR_EQUAL,-max_visits)
+###########################################################
+###
+def consecutive_days_families(columns,DAYS,technicians,LARGE_NUMBER):
+    """
+    Purpose
+        Constraints that a technician has two days off after working five days in a row, w is 1 if the technician worked
+        the five days starting at day t
+    """
+    if DAYS <= 6:
+        return
+    set_1 = ([],[],[])
+    set_0 = ([],[],[])
+    days_t = ([],[],[])
+    days_t1 = ([],[],[])
+    row = 0
+    for t in range(0,DAYS-6):
+        for h in technicians:
+            window = columns.q[t:t+5,h].tolist()
+            set_1[0].extend([row]*6); set_1[1].extend([columns.w[t,h]]+window); set_1[2].extend([1]+[-1]*5)
+            set_0[0].extend([row]*6); set_0[1].extend([columns.w[t,h]]+window); set_0[2].extend([5]+[-1]*5)
+            days_t[0].extend([row]*2); days_t[1].extend([columns.w[t,h],columns.q[t+5,h]]); days_t[2].extend([1-LARGE_NUMBER,-1])
+            row += 1
+    num_rows = row
+    row = 0
+    for t in range(0,DAYS-6-1):
+        for h in technicians:
+            days_t1[0].extend([row]*2); days_t1[1].extend([columns.w[t,h],columns.q[t+6,h]]); days_t1[2].extend([1-LARGE_NUMBER,-1])
+            row += 1
+    yield ConstraintFamily("set_w_to_1",None,set_1[0],set_1[1],set_1[2],mip.GREATER_OR_EQUAL,np.full(num_rows,-4))
+    yield ConstraintFamily("set_w_to_0",None,set_0[0],set_0[1],set_0[2],mip.LESS_OR_EQUAL,np.zeros(num_rows))
+    yield ConstraintFamily("consecutive_days_t",None,days_t[0],days_t[1],days_t[2],mip.GREATER_OR_EQUAL,np.full(num_rows,1-LARGE_NUMBER))
+    yield ConstraintFamily("consecutive_days_t+1",None,days_t1[0],days_t1[1],days_t1[2],mip.GREATER_OR_EQUAL,np.full(row,1-LARGE_NUMBER))
+###########################################################
+###
+def symmetry_families(columns,DAYS,trucks,customer_nodes,order_volume,technician_classes):
+    """
+    Purpose
+        Constraints that break the symmetry of the identical trucks and of equivalent technicians (see the SymmetryVeRoLogMip
+        file): truck k is used before truck k+1, on every day truck k is used before truck k+1 and delivers at least its
+        order volume, and an equivalent technician with a lower number is used before and works at least as many days
+    """
+    num_customers = len(customer_nodes)
+    pairs = np.arange(len(trucks)-1)
+    if len(pairs):
+        yield ConstraintFamily("truck_used_order",None,np.r_[pairs,pairs],np.r_[columns.u[pairs],columns.u[pairs+1]],
+                               np.r_[np.ones(len(pairs)),-np.ones(len(pairs))],mip.GREATER_OR_EQUAL,np.zeros(len(pairs)))
+        for t in range(DAYS-1):
+            yield ConstraintFamily("truck_day_order",t,np.r_[pairs,pairs],np.r_[columns.v[t][pairs],columns.v[t][pairs+1]],
+                                   np.r_[np.ones(len(pairs)),-np.ones(len(pairs))],mip.GREATER_OR_EQUAL,np.zeros(len(pairs)))
+        for t in range(DAYS-1):
+            k,i,j,col = columns.arcs("x",t)
+            to_customer = (j >= 1) & (j <= num_customers)
+            k,j,col = k[to_customer],j[to_customer],col[to_customer]
+            first,second = k < len(trucks)-1,k >= 1
+            yield ConstraintFamily("truck_load_order",t,np.r_[k[first],k[second]-1],np.r_[col[first],col[second]],
+                                   np.r_[order_volume[j[first]-1],-order_volume[j[second]-1]],mip.GREATER_OR_EQUAL,np.zeros(len(pairs)))
+    tech_pairs = np.array([(a,b) for members in technician_classes for a,b in zip(members[:-1],members[1:])],dtype=np.int64).reshape(-1,2)
+    if len(tech_pairs):
+        rows = np.arange(len(tech_pairs))
+        yield ConstraintFamily("tech_used_order",None,np.r_[rows,rows],np.r_[columns.p[tech_pairs[:,0]],columns.p[tech_pairs[:,1]]],
+                               np.r_[np.ones(len(rows)),-np.ones(len(rows))],mip.GREATER_OR_EQUAL,np.zeros(len(rows)))
+        days = columns.q.shape[0]
+        yield ConstraintFamily("tech_days_order",None,np.r_[np.repeat(rows,days),np.repeat(rows,days)],
+                               np.r_[columns.q[:,tech_pairs[:,0]].T.reshape(-1),columns.q[:,tech_pairs[:,1]].T.reshape(-1)],
+                               np.r_[np.ones(len(rows)*days),-np.ones(len(rows)*days)],mip.GREATER_OR_EQUAL,np.zeros(len(rows)))
+###########################################################
+###
+def constraint_families(columns,DAYS,technicians,trucks,customer_nodes,order_volume,start_delivery_window,end_delivery_window,
+                        technician_max_visits,technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,LARGE_NUMBER,skip=frozenset(),
+                        delivery_customers=None,installation_customers=None,technician_classes=None,compact_linking=False):
+    """
+    Purpose
+        Generate all the constraint families of the MILP in the order they are added to the model
+    Input
+        columns, ColumnIndex: column index of each decision variable
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        trucks, list: trucks in the problem
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        order_volume, numpy array: ordersize times machine size of each customer
+        start_delivery_window, list: start of the delivery window for each customer
+        end_delivery_window, list: end of the delivery window for each customer
+        technician_max_visits, list: maximum number of customers each technician can visit daily
+        technician_max_distance, list: maximum distance each technician can drive daily
+        TRUCK_MAX_DISTANCE, int: truck maximum distance
+        TRUCK_CAPACITY, int: truck capacity
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        LARGE_NUMBER, int: large number used in one of the constraints (set to 1000)
+        skip, set: (name,day) of the families that are not generated (for example because they are in a checkpoint)
+        delivery_customers, set: customer nodes that are delivered in the model (None for all customers)
+        installation_customers, set: customer nodes that are installed in the model (None for all customers)
+        technician_classes, list: the classes of equivalent technicians for the symmetry breaking constraints (None for no
+            symmetry breaking constraints)
+        compact_linking, bool: link v and q to the arcs entering each customer and u and p to v and q (see
+            compact_linking_families()) instead of linking u, v, p and q to every arc
+    Output
+        family, ConstraintFamily: the constraint families (generator)
+    """
+    days = range(DAYS-1)
+    #(names of the families, day, function that builds the families)
+    if compact_linking:
+        steps = [(("truck_day","truck_used","tech_day","tech_used"),t,lambda t=t: compact_linking_families(columns,t,customer_nodes)) for t in days]
+    else:
+        steps = [(("truck_used","truck_day","tech_used","tech_day"),t,lambda t=t: linking_families(columns,t)) for t in days]
+    steps += [(("truck_dist","tech_dist","tech_visit"),t,lambda t=t: distance_families(columns,t,trucks,technicians,customer_nodes,technician_max_visits,
+                                                                                            technician_max_distance,TRUCK_MAX_DISTANCE,distance_matrix)) for t in days]
+    steps += [(("cust_delivery","tech_delivery","start_delivery_window","end_delivery_window","start_installation_window","end_installation_window"),None,
+               lambda: customer_families(columns,DAYS,customer_nodes,start_delivery_window,end_delivery_window,delivery_customers,installation_customers))]
+    steps += [(("node_ent_leave_x","node_ent_leave_tech"),t,lambda t=t: node_enter_leave_families(columns,t)) for t in days]
+    steps += [(("truck_capacity_lower","truck_capacity_upper"),t,lambda t=t: truck_capacity_families(columns,t,trucks,customer_nodes,order_volume,TRUCK_CAPACITY)) for t in days]
+    steps += [(("cumulative_load",),t,lambda t=t: [cumulative_load_family(columns,t,customer_nodes,order_volume,TRUCK_CAPACITY)]) for t in days]
+    steps += [(("tech_capacity_lower","tech_capacity_upper"),t,lambda t=t: tech_capacity_families(columns,t,technician_max_visits)) for t in days]
+    steps += [(("tech_cumulative_load",),t,lambda t=t: [tech_cumulative_load_family(columns,t,technician_max_visits)]) for t in days]
+    steps += [(("set_w_to_1","set_w_to_0","consecutive_days_t","consecutive_days_t+1"),None,lambda: consecutive_days_families(columns,DAYS,technicians,LARGE_NUMBER))]
+    if technician_classes is not None:
+        steps += [(("truck_used_order","truck_day_order","truck_load_order","tech_used_order","tech_days_order"),None,
+                   lambda: symmetry_families(columns,DAYS,trucks,customer_nodes,order_volume,technician_classes))]
+    for names,day,build in steps:
+        if all((name,day) in skip for name in names):
+            continue
+        for family in build():
+            if (family.name,family.day) not in skip:
+                yield family
+###########################################################
+###
+def add_constraint_family(opt_model,family):
+    """
+    Purpose
+        Load a constraint family into the model. This is row streaming, not a bulk load: the rows are added one by one.
+        For CBC each row is passed straight from the numpy arrays to Cbc_addRow, no mip linear expressions are created.
+        The row names are built once per family. Note that opt_model.constrs is not updated for CBC, call
+        update_constraint_list() after the last family was added
+    Input
+        opt_model, mip.model: model we are optimizing
+        family, ConstraintFamily: the constraint family that is added
+    Output
+    """
+    names = family.row_names()
+    indptr = family.indptr.tolist()
+    rhs = family.rhs.tolist()
+    if SolverCbc is not None and isinstance(opt_model.solver,SolverCbc):
+        indices = np.ascontiguousarray(family.indices,dtype=np.intc)
+        data = np.ascontiguousarray(family.data,dtype=np.float64)
+        cols_ptr = ffi.cast("int *",ffi.from_buffer(indices))
+        vals_ptr = ffi.cast("double *",ffi.from_buffer(data))
+        empty_col = ffi.new("int[1]",[0])
+        empty_val = ffi.new("double[1]",[0.0])
+        sense = family.sense.encode("utf-8")
+        cbc_model = opt_model.solver._model
+        row_names = [name.encode("utf-8") for name in names]
+        for r in range(family.num_rows):
+            start,end = indptr[r],indptr[r+1]
+            if end > start:
+                cbclib.Cbc_addRow(cbc_model,row_names[r],end-start,cols_ptr+start,vals_ptr+start,sense,rhs[r])
+            else: #empty row, same as python-mip: add a dummy entry
+                cbclib.Cbc_addRow(cbc_model,row_names[r],1,empty_col,empty_val,sense,rhs[r])
+    else:
+        model_vars = opt_model.vars
+        indices = family.indices.tolist()
+        data = family.data.tolist()
+        for r in range(family.num_rows):
+            start,end = indptr[r],indptr[r+1]
+            expr = mip.LinExpr([model_vars[c] for c in indices[start:end]],data[start:end],-rhs[r],family.sense)
+            opt_model.add_constr(expr,names[r])
+###########################################################
+###
+def update_constraint_list(opt_model):
+    """
+    Purpose
+        Synchronize the list of constraints of the mip model with the rows that were streamed to the solver
+    Input
+        opt_model, mip.model: model we are optimizing
+    Output
+    """
+    if opt_model.solver.num_rows() != len(opt_model.constrs):
+        opt_model.constrs.update_constrs(opt_model.solver.num_rows())
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Solve a VeRoLog instance in two stages instead of with the monolithic MILP. The first stage is the delivery model
+    (x, z, u and v): the trucks deliver every customer within its delivery window, the idle machine cost is approximated by
+    rewarding later deliveries with the daily penalty of the customer and the deliveries are spread with an installation
+    capacity constraint. The second stage is the installation model (y, l, p, q and w) with the delivery days of the first
+    stage fixed. Both stages are built with create_decisions_variables(), create_cost_functions() and add_constraints() of
+    the RunMILPVeRoLogMip file, without the constraint families of the other stage.
+
+    After each iteration a feedback cut is added to the delivery model: a customer is delivered at least one day before its
+    installation day of the last iteration. The installation schedule of the last iteration stays feasible, so the total
+    cost does not increase. If the installation model is infeasible, the installation capacity of the delivery model is
+    halved. A warm start (the greedy heuristic or an existing solution file) is used as iteration 0: its installation days
+    give the first feedback cut instead of the installation capacity and both models start from its routes. The best
+    schedule is written as solution file (see the ScheduleVeRoLog file).
+
+    Example
+        python DecompositionVeRoLogMip.py -i VSC2019_ORTEC_Example.csv -o DecompositionExample -t 2 --iterations 3 --warm-start greedy
+"""
+###########################################################
+### imports
+import argparse
+import logging
+import os
+import time
+import numpy as np
+import mip as mip
+from ReadVeRoLogInstances import read_file #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables, create_customer_expressions, create_cost_functions, add_constraints #from local repository
+from ConstraintMatrixVeRoLogMip import ColumnIndex, ConstraintFamily, add_constraint_family, update_constraint_list #from local repository
+from InstrumentationVeRoLogMip import RunTrace #from local repository
+from SolverConfigVeRoLogMip import default_solver_config, apply_solver_config, add_solver_arguments, solver_config_from_arguments #from local repository
+from ScheduleVeRoLog import Schedule #from local repository
+from ArcPruningVeRoLogMip import prune_arcs #from local repository
+from WarmStartVeRoLogMip import start_schedule, schedule_to_values, set_start #from local repository
+
+#constraint families of each stage, the installation window links the stages and is replaced by the fixed delivery days
+DELIVERY_FAMILIES = ("truck_used","truck_day","truck_dist","cust_delivery","start_delivery_window","end_delivery_window","node_ent_leave_x",
+                     "truck_capacity_lower","truck_capacity_upper","cumulative_load")
+INSTALLATION_FAMILIES = ("tech_used","tech_day","tech_dist","tech_visit","tech_delivery","end_installation_window","node_ent_leave_tech",
+                         "tech_capacity_lower","tech_capacity_upper","tech_cumulative_load","set_w_to_1","set_w_to_0","consecutive_days_t","consecutive_days_t+1")
+###########################################################
+###
+def stage_skip(families,DAYS):
+    """
+    Purpose
+        Get the constraint families that are not added to the model of a stage
+    Input
+        families, tuple: names of the constraint families of the stage
+        DAYS, int: number of days in the horizon
+    Output
+        skip, set: (name,day) of the constraint families of the other stage and of the installation window
+    """
+    names = set(DELIVERY_FAMILIES + INSTALLATION_FAMILIES + ("start_installation_window",)) - set(families)
+    return {(name,day) for name in names for day in [None] + list(range(DAYS-1))}
+###########################################################
+###
+def delivery_arcs(columns,customer_nodes):
+    """
+    Purpose
+        Get the arcs of the trucks that enter a customer
+    Input
+        columns, ColumnIndex: column index of each decision variable
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+    Output
+        t, numpy array: index of the day of each arc
+        j, numpy array: customer that is entered
+        col, numpy array: column index of the variable of each arc
+    """
+    x_t,x_k,x_i,x_j,x_col = columns.x
+    to_customer = (x_j >= 1) & (x_j <= len(customer_nodes))
+    return x_t[to_customer],x_j[to_customer],x_col[to_customer]
+###########################################################
+###
+def installation_capacity_family(columns,DAYS,customer_nodes,technician_max_visits,factor,iteration):
+    """
+    Purpose
+        Constraints that the customers delivered on day t or later can be installed on the days after t, with the maximum
+        number of visits of all technicians times a factor per day
+    Input
+        columns, ColumnIndex: column index of each decision variable of the delivery model
+        DAYS, int: number of days in the horizon
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        technician_max_visits, list: maximum number of customers each technician can visit daily
+        factor, float: part of the maximum number of visits that is available for installations
+        iteration, int: iteration of the decomposition (the day of the family)
+    Output
+        family, ConstraintFamily: a row for each day 1 until DAYS-2
+    """
+    x_t,x_j,x_col = delivery_arcs(columns,customer_nodes)
+    days = np.arange(1,DAYS-1)
+    rows,arcs = np.nonzero(x_t[np.newaxis,:] >= days[:,np.newaxis])
+    rhs = np.floor(factor * sum(technician_max_visits) * (DAYS-1-days))
+    return ConstraintFamily("installation_capacity",iteration,rows,x_col[arcs],np.ones(len(arcs)),mip.LESS_OR_EQUAL,rhs)
+###########################################################
+###
+def feedback_family(columns,customer_nodes,installation_day,iteration):
+    """
+    Purpose
+        Feedback cut of an iteration: every customer is delivered at least one day before its installation day
+    Input
+        columns, ColumnIndex: column index of each decision variable of the delivery model
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        installation_day, dict: customer node (keys) and day of installation (values)
+        iteration, int: iteration of the decomposition (the day of the family)
+    Output
+        family, ConstraintFamily: a row for each customer
+    """
+    x_t,x_j,x_col = delivery_arcs(columns,customer_nodes)
+    rhs = np.array([installation_day[j] - 1 for j in customer_nodes],dtype=np.float64)
+    return ConstraintFamily("installation_feedback",iteration,x_j-1,x_col,x_t,mip.LESS_OR_EQUAL,rhs)
+###########################################################
+###
+def solution_route(arcs,start_node):
+    """
+    Purpose
+        Follow the arcs of a truck or technician in the solution from the depot or home
+    Input
+        arcs, list: arcs (i,j,mip.Var) of the truck or technician on a day
+        start_node, int: depot or home location
+    Output
+        route, list: nodes in the order they are visited, a return to the start node in the route is start_node
+    """
+    successors = {}
+    for i,j,var in arcs:
+        if var.x is not None and var.x > 0.5:
+            successors.setdefault(i,[]).append(j)
+    route = []
+    node = start_node
+    while successors.get(node):
+        node = successors[node].pop()
+        route.append(node)
+    return route[:-1]
+###########################################################
+###
+def solve_stage(opt_model,max_seconds,trace,stage,iteration):
+    """
+    Purpose
+        Optimize the model of a stage and record the result in the trace
+    Input
+        opt_model, mip.model: model of the stage
+        max_seconds, float: time limit of the optimization
+        trace, RunTrace: trace of the run
+        stage, str: name of the stage
+        iteration, int: iteration of the decomposition
+    Output
+        solved, bool: True if a solution was found
+    """
+    with trace.phase(stage,opt_model.name,iteration,columns=opt_model.num_cols,rows=opt_model.num_rows,nonzeros=opt_model.num_nz) as record:
+        status = opt_model.optimize(max_seconds=max_seconds)
+        record.update(status=status.name,solutions=opt_model.num_solutions,objective_value=opt_model.objective_value,objective_bound=opt_model.objective_bound)
+    logging.info("Iteration {0}, {1} model: {2}, objective value {3}".format(iteration,stage,status.name,opt_model.objective_value))
+    return status in (mip.OptimizationStatus.OPTIMAL,mip.OptimizationStatus.FEASIBLE) and opt_model.num_solutions > 0
+###########################################################
+###
+def start_from_solution(opt_model):
+    """
+    Purpose
+        Start the next optimization of a model from its current solution
+    Input
+        opt_model, mip.model: model with a solution
+    Output
+    """
+    set_start(opt_model,np.array([var.x if var.x is not None else 0.0 for var in opt_model.vars]))
+###########################################################
+###
+def run_decomposition(input_file_name,output_file_name,number_of_trucks,max_run_time,solver_config=None,iterations=3,stage_seconds=None,warm_start=None,instance_file_name=None):
+    """
+    Purpose
+        Read an instance, solve the delivery and installation models alternately and write the solution file of the best
+        schedule
+    Input
+        input_file_name, str: filename of the VeRoLog instance in csv form
+        output_file_name, str: filename of the solution file (without the txt extension)
+        number_of_trucks, int: total number of available trucks in optimization problem
+        max_run_time, float: time limit of all iterations in seconds
+        solver_config, dict: solver settings of both stages (see the SolverConfigVeRoLogMip file, None for the default
+            settings), the cutoff is not used because the objective of a stage is not the total cost
+        iterations, int: maximum number of iterations, the iterations stop earlier if the delivery days do not change
+        stage_seconds, float: time limit of the optimization of each stage (None for the time that is left)
+        warm_start, str: "greedy", a solution file or a directory with solution files (see start_schedule() in the
+            WarmStartVeRoLogMip file, None to start without a schedule)
+        instance_file_name, str: filename of the VeRoLog instance in txt form, used to check the solution files of the
+            warm start (None for input_file_name with the txt extension)
+    Output
+        summary, dict: status, total cost, solution file, number of iterations and wall time of the run
+    """
+    start = time.time()
+    name = os.path.splitext(os.path.basename(input_file_name))[0]
+    if solver_config is None:
+        solver_config = default_solver_config()
+    stage_config = dict(solver_config,cutoff=None)
+    trace = RunTrace(name,{"input_file_name": input_file_name,"number_of_trucks": number_of_trucks,"max_run_time": max_run_time,"solver_config": solver_config,
+                           "mode": "decomposition","iterations": iterations,"warm_start": warm_start})
+    trace_file_name = output_file_name+'_trace.json'
+    DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position = read_file(input_file_name,number_of_trucks)
+    print("Finished reading data at",time.time()-start)
+    trace.lap("read",input_file_name,days=DAYS,customers=len(customer_nodes),technicians=len(technicians),trucks=len(trucks))
+    #arcs that can never be part of a feasible route are not created
+    truck_arcs,tech_arcs = prune_arcs(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,customer_order_size,machine_size,customer_machine_types,start_delivery_window,end_delivery_window,
+                                      technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,trace)
+
+    #delivery model, without technicians the penalty cost rewards every day a customer is delivered later
+    delivery_model = mip.Model(name=name+"_delivery",solver_name=mip.CBC)
+    x,y,w,u,v,p,q,z,l = create_decisions_variables(delivery_model,DAYS,[],trucks,x_nodes,tech_customers,nodes,technician_nodes,customer_nodes,start,trace,
+                                                   start_delivery_window=start_delivery_window,end_delivery_window=end_delivery_window,truck_arcs=truck_arcs)
+    delivery_day,installation_day = create_customer_expressions(x,y,DAYS,[],trucks,customer_nodes,start,trace)
+    costs = create_cost_functions(x,y,u,v,p,q,DAYS,[],trucks,distance_matrix,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,
+                                  TECHNICIAN_COST,machine_penalty,customer_order_size,customer_nodes,customer_machine_types,delivery_day,installation_day,start,trace)
+    delivery_model.objective = mip.minimize(mip.xsum(costs))
+    apply_solver_config(delivery_model,stage_config)
+    add_constraints(delivery_model,x,y,w,u,v,p,q,z,l,DAYS,[],trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,end_delivery_window,
+                    technician_max_visits,technician_max_distance,tech_customers,tech_customer_position,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,technician_nodes,
+                    nodes,x_nodes,distance_matrix,LARGE_NUMBER,start,trace=trace,skip=stage_skip(DELIVERY_FAMILIES,DAYS))
+    delivery_columns = ColumnIndex(x,y,w,u,v,p,q,z,l,DAYS,[],trucks,tech_customers,nodes)
+    print("Finished building the delivery model at",time.time()-start)
+
+    #installation model, the delivery days are fixed by the bounds of the arcs of the technicians
+    installation_model = mip.Model(name=name+"_installation",solver_name=mip.CBC)
+    x2,y2,w2,u2,v2,p2,q2,z2,l2 = create_decisions_variables(installation_model,DAYS,technicians,[],x_nodes,tech_customers,nodes,technician_nodes,customer_nodes,start,trace,
+                                                            start_delivery_window=start_delivery_window,end_delivery_window=end_delivery_window,tech_arcs=tech_arcs)
+    delivery_day2,installation_day2 = create_customer_expressions(x2,y2,DAYS,technicians,[],customer_nodes,start,trace)
+    fixed_delivery_day = {j: 0 for j in customer_nodes}
+    costs2 = create_cost_functions(x2,y2,u2,v2,p2,q2,DAYS,technicians,[],distance_matrix,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,
+                                   TECHNICIAN_COST,machine_penalty,customer_order_size,customer_nodes,customer_machine_types,fixed_delivery_day,installation_day2,start,trace)
+    #the penalty cost is relative to delivery on day 0, the delivery days are added to the total cost of the schedule
+    installation_model.objective = mip.minimize(mip.xsum(costs2))
+    apply_solver_config(installation_model,stage_config)
+    add_constraints(installation_model,x2,y2,w2,u2,v2,p2,q2,z2,l2,DAYS,technicians,[],machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,
+                    end_delivery_window,technician_max_visits,technician_max_distance,tech_customers,tech_customer_position,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,
+                    technician_nodes,nodes,x_nodes,distance_matrix,LARGE_NUMBER,start,trace=trace,skip=stage_skip(INSTALLATION_FAMILIES,DAYS))
+    print("Finished building the installation model at",time.time()-start)
+
+    home = {h: len(customer_nodes)+1+h for h in technicians}
+    factor = 1.0
+    best_schedule,best_cost = None,None
+    if warm_start is not None:
+        with trace.phase("warm_start",warm_start) as record:
+            try:
+                if instance_file_name is None:
+                    instance_file_name = os.path.splitext(input_file_name)[0] + '.txt'
+                best_schedule = start_schedule(warm_start,instance_file_name,DAYS,technicians,trucks,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,
+                                               start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,
+                                               distance_matrix,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,record)
+                #the routes of the trucks and the technicians are the start of the delivery and the installation model
+                order_volume = np.array([customer_order_size[j-1] * machine_size[customer_machine_types[j-1]] for j in customer_nodes],dtype=np.float64)
+                truck_schedule,tech_schedule = Schedule(DAYS),Schedule(DAYS)
+                truck_schedule.truck_routes,tech_schedule.tech_routes = best_schedule.truck_routes,best_schedule.tech_routes
+                delivery_values = schedule_to_values(truck_schedule,delivery_model.num_cols,x,y,w,u,v,p,q,z,l,DAYS,[],trucks,customer_nodes,order_volume,tech_customer_position)
+                installation_values = schedule_to_values(tech_schedule,installation_model.num_cols,x2,y2,w2,u2,v2,p2,q2,z2,l2,DAYS,technicians,[],customer_nodes,order_volume,tech_customer_position)
+                best_cost = best_schedule.calculate_cost(technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,distance_matrix,
+                                                         TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+                record["total_cost"] = best_cost["TOTAL_COST"]
+            except ValueError as error:
+                logging.warning("No start solution: {0}".format(error))
+                print("No start solution:",error)
+                best_schedule,best_cost = None,None
+    if best_schedule is not None:
+        print("Start from a schedule with total cost {0}".format(best_cost["TOTAL_COST"]))
+        add_constraint_family(delivery_model,feedback_family(delivery_columns,customer_nodes,best_schedule.installation_days(),0))
+        set_start(delivery_model,delivery_values)
+        set_start(installation_model,installation_values)
+    else:
+        add_constraint_family(delivery_model,installation_capacity_family(delivery_columns,DAYS,customer_nodes,technician_max_visits,factor,0))
+    update_constraint_list(delivery_model)
+    previous_delivery = None
+    iteration = 0
+    for iteration in range(1,iterations+1):
+        time_left = max_run_time - (time.time()-start)
+        if time_left <= 0:
+            break
+        if not solve_stage(delivery_model,time_left if stage_seconds is None else min(stage_seconds,time_left),trace,"delivery",iteration):
+            print("No delivery schedule found in iteration",iteration)
+            break
+        schedule = Schedule(DAYS)
+        for t in range(DAYS-1):
+            for k in trucks:
+                route = solution_route(x.arcs(t,k),0)
+                if route:
+                    schedule.truck_routes[t][k] = route
+        delivery = schedule.delivery_days()
+        print("Finished delivery model of iteration {0} at".format(iteration),time.time()-start)
+        if delivery == previous_delivery:
+            print("The delivery days did not change in iteration",iteration)
+            break
+        previous_delivery = delivery
+        #the technicians cannot install before the day after delivery (the index t of y is day t+1)
+        for (t,h,i,j),var in y2:
+            if j in delivery:
+                var.ub = 1.0 if t >= delivery[j] else 0.0
+        time_left = max_run_time - (time.time()-start)
+        if time_left <= 0 or not solve_stage(installation_model,time_left if stage_seconds is None else min(stage_seconds,time_left),trace,"installation",iteration):
+            #the customers are delivered too late to install them, deliver them earlier
+            factor /= 2
+            print("No installation schedule found in iteration {0}, the installation capacity is reduced to {1}".format(iteration,factor))
+            add_constraint_family(delivery_model,installation_capacity_family(delivery_columns,DAYS,customer_nodes,technician_max_visits,factor,iteration))
+            update_constraint_list(delivery_model)
+            continue
+        for t in range(DAYS-1):
+            for h in technicians:
+                route = [j for j in solution_route(y2.arcs(t,h),home[h]) if j != home[h]]
+                if route:
+                    schedule.tech_routes[t+1][h] = route
+        cost = schedule.calculate_cost(technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,distance_matrix,
+                                       TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+        trace.add("iteration",None,iteration,total_cost=cost["TOTAL_COST"])
+        print("Finished iteration {0} with total cost {1} at".format(iteration,cost["TOTAL_COST"]),time.time()-start)
+        logging.info("Iteration {0}: total cost {1}".format(iteration,cost["TOTAL_COST"]))
+        if best_cost is None or cost["TOTAL_COST"] < best_cost["TOTAL_COST"]:
+            best_schedule,best_cost = schedule,cost
+        #both models start the next iteration from their solution, which stays feasible with the feedback cut
+        add_constraint_family(delivery_model,feedback_family(delivery_columns,customer_nodes,schedule.installation_days(),iteration))
+        update_constraint_list(delivery_model)
+        start_from_solution(delivery_model)
+        start_from_solution(installation_model)
+
+    status = "NO_SOLUTION_FOUND"
+    if best_schedule is not None:
+        status = "FEASIBLE"
+        with trace.phase("solution_file",output_file_name):
+            best_schedule.write_solution_file(output_file_name,name+".txt",best_cost)
+        print("Created a solution file with total cost {0} at".format(best_cost["TOTAL_COST"]),time.time()-start)
+    else:
+        print('No feasible solution was found')
+    trace.write_json(trace_file_name)
+    print("Wrote the trace of the run to",trace_file_name)
+    return {"instance": input_file_name,"status": status,"objective_value": None if best_cost is None else best_cost["TOTAL_COST"],"objective_bound": None,
+            "solution_file": output_file_name+".txt" if best_schedule is not None else None,"iterations": iteration,"solver_config": solver_config,"wall": time.time()-start}
+###########################################################
+### main
+def main():
+    parser = argparse.ArgumentParser(description="Solve a VeRoLog instance with the delivery and installation models in two stages")
+    parser.add_argument("--input","-i",dest="input_file_name",default="VSC2019_ORTEC_Small_04.csv",help="VeRoLog instance in csv form")
+    parser.add_argument("--output","-o",dest="output_file_name",default="DecompositionInstance_Small_04",help="solution file (without the txt extension)")
+    parser.add_argument("--trucks","-t",dest="number_of_trucks",type=int,default=2,help="number of trucks")
+    parser.add_argument("--max-seconds","-s",dest="max_run_time",type=float,default=60*60,help="time limit of all iterations in seconds")
+    parser.add_argument("--stage-seconds",type=float,help="time limit of the optimization of each stage in seconds (default: the time that is left)")
+    parser.add_argument("--iterations",type=int,default=3,help="maximum number of iterations")
+    parser.add_argument("--warm-start",help="start from the schedule of the greedy heuristic (greedy) or from the best valid solution in a solution file or directory of solution files")
+    add_solver_arguments(parser)
+    args = parser.parse_args()
+    solver_config = solver_config_from_arguments(args)
+    logging.basicConfig(filename=os.path.splitext(args.input_file_name)[0]+'_logs', level=logging.INFO,format='%(asctime)s:%(levelname)s:%(message)s')
+    logging.info("Solver settings: {0}".format(solver_config))
+    summary = run_decomposition(args.input_file_name,args.output_file_name,args.number_of_trucks,args.max_run_time,solver_config,args.iterations,args.stage_seconds,args.warm_start)
+    instance_file_name = os.path.splitext(args.input_file_name)[0] + '.txt'
+    if summary["solution_file"] is not None and os.path.exists(instance_file_name):
+        from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+        from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+        solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(instance_file_name))
+        if solution.isValid():
+            print("The solution is valid, cost:",solution.calcCost.Cost)
+        else:
+            print("The solution is not valid:\n\t" + "\n\t".join(solution.errorReport))
+            logging.error("Invalid decomposition solution: " + "; ".join(solution.errorReport))
+    return
+
+if __name__ == '__main__':
+    main()
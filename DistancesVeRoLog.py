@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Calculate the distances between the locations of a VeRoLog instance. The distance between two locations is the ceiling of
+    the euclidean distance between the coordinates, all distances are calculated in one vectorized pass and stored in a dense
+    matrix. Note that the functions in this file are used by the ReadVeRoLogInstances, RunMILPVeRoLogMip,
+    WriteSolutionVeRoLogMip and InstanceVerolog2019 files.
+"""
+###########################################################
+### imports
+import numpy as np
+###########################################################
+###
+def calc_distance_matrix(coordinates):
+    """
+    Purpose
+        Calculate the ceiling of the euclidean distance between every pair of coordinates
+    Input
+        coordinates, list: (x,y) coordinates of each location, the position in the list is the index in the matrix
+    Output
+        distance_matrix, numpy array: integer matrix where distance_matrix[i][j] is the distance from location i to j
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    #squared distances are integers, so they are exact in float64 and the ceiling equals the one of math.sqrt
+    distance_matrix = np.subtract.outer(coordinates[:, 0], coordinates[:, 0])
+    distance_matrix *= distance_matrix
+    dist_y = np.subtract.outer(coordinates[:, 1], coordinates[:, 1])
+    dist_y *= dist_y
+    distance_matrix += dist_y
+    del dist_y
+    np.sqrt(distance_matrix, out=distance_matrix)
+    np.ceil(distance_matrix, out=distance_matrix)
+    return distance_matrix.astype(np.int64)
+###########################################################
+###
+def get_distance_matrix(nodes):
+    """
+    Purpose
+        Calculate the distance matrix for the nodes in the MILP, note that the nodes are numbered 0 (depot),
+        1 until the number of customers (customers) and the remaining nodes are the technician home locations
+    Input
+        nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
+    Output
+        distance_matrix, numpy array: integer matrix where distance_matrix[i][j] is the cost to travel from node i to node j
+    """
+    return calc_distance_matrix([nodes[n] for n in range(len(nodes))])
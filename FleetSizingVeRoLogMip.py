@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Choose the number of trucks of the MILP instead of a number given by the user. Too many trucks make x, z, u and v (and
+    the symmetric schedules) larger, too few trucks make the MILP infeasible. The number of trucks is bounded by
+     - lower bound: the customers whose delivery window is within days a to b must be delivered by the trucks of these
+       days. A truck drives at most TRUCK_MAX_DISTANCE a day, so the truck days of the customers are at least their
+       distance divided by TRUCK_MAX_DISTANCE. The distance is at least
+         - the radial distance: a trip that delivers customer j drives at least twice the distance of the depot to j and
+           delivers at most TRUCK_CAPACITY, so the customers cost at least 2 * distance(0,j) * volume(j) / TRUCK_CAPACITY
+         - the number of trips (bin packing: the total volume divided by the capacity, or the number of customers with
+           more than half the capacity) times twice the distance of the depot to the nearest customer
+       The lower bound is the largest number of truck days divided by the number of days over all windows of days
+     - upper bound: the largest number of trucks on a day in the schedule of the greedy heuristic (see the
+       GreedyHeuristicVeRoLog file), the MILP is feasible with this number of trucks
+    run_fleet_sizing() in the RunMILPVeRoLogMip file solves the MILP with the lower bound and only adds a truck if CBC
+    proves that the MILP is infeasible.
+
+    Example
+        python RunMILPVeRoLogMip.py -i VSC2019_ORTEC_Example.csv -o SolutionExample -t auto
+"""
+###########################################################
+### imports
+import argparse
+import logging
+import math as math
+import numpy as np
+from GreedyHeuristicVeRoLog import greedy_schedule #from local repository
+###########################################################
+###
+def truck_count(value):
+    """
+    Purpose
+        Read the number of trucks of a command line option
+    Input
+        value, str: a number of trucks or "auto" for the fleet sizing
+    Output
+        number_of_trucks, int: number of trucks (None for the fleet sizing)
+    """
+    if value == "auto":
+        return None
+    try:
+        number_of_trucks = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid number of trucks: {0} (a number or auto)".format(value))
+    if number_of_trucks < 1:
+        raise argparse.ArgumentTypeError("invalid number of trucks: {0} (at least 1)".format(value))
+    return number_of_trucks
+###########################################################
+###
+def truck_days_needed(volume,depot_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY):
+    """
+    Purpose
+        Lower bound of the number of truck days to deliver a set of customers
+    Input
+        volume, numpy array: order volume of each customer of the set
+        depot_distance, numpy array: distance of the depot to each customer of the set
+        TRUCK_MAX_DISTANCE, int: truck maximum distance
+        TRUCK_CAPACITY, int: truck capacity
+    Output
+        truck_days, int: lower bound of the number of truck days
+    """
+    if len(volume) == 0:
+        return 0
+    trips = max(math.ceil(volume.sum()/TRUCK_CAPACITY - 1e-9),int((2*volume > TRUCK_CAPACITY).sum()))
+    radial = (2*depot_distance*volume).sum()/TRUCK_CAPACITY
+    distance = max(radial,trips*2*depot_distance.min())
+    return max(1,math.ceil(distance/TRUCK_MAX_DISTANCE - 1e-9))
+###########################################################
+###
+def fleet_lower_bound(DAYS,customer_nodes,order_volume,start_delivery_window,end_delivery_window,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix):
+    """
+    Purpose
+        Lower bound of the number of trucks over all windows of days (see the description of this file)
+    Input
+        DAYS, int: number of days in the horizon
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        order_volume, numpy array: ordersize times machine size of each customer
+        start_delivery_window, list: start of the delivery window for each customer
+        end_delivery_window, list: end of the delivery window for each customer
+        TRUCK_MAX_DISTANCE, int: truck maximum distance
+        TRUCK_CAPACITY, int: truck capacity
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+    Output
+        lower_bound, int: lower bound of the number of trucks
+        daily, list: for each day the largest lower bound of the windows of days with the day
+    """
+    nodes = np.array(list(customer_nodes),dtype=np.int64)
+    start = np.asarray(start_delivery_window,dtype=np.int64)[nodes-1]
+    end = np.asarray(end_delivery_window,dtype=np.int64)[nodes-1]
+    volume = np.asarray(order_volume,dtype=np.float64)
+    depot_distance = np.asarray(distance_matrix[0],dtype=np.float64)[nodes]
+    daily = [0]*(DAYS-1)
+    for a in range(DAYS-1):
+        for b in range(a,DAYS-1):
+            inside = (start >= a) & (end <= b)
+            trucks = math.ceil(truck_days_needed(volume[inside],depot_distance[inside],TRUCK_MAX_DISTANCE,TRUCK_CAPACITY)/(b-a+1))
+            for t in range(a,b+1):
+                daily[t] = max(daily[t],trucks)
+    return max(daily+[1]),daily
+###########################################################
+###
+def fleet_upper_bound(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                      end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                      TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST):
+    """
+    Purpose
+        Upper bound of the number of trucks: the largest number of trucks on a day of the greedy schedule
+    Input
+        (the data of the instance, see greedy_schedule() in the GreedyHeuristicVeRoLog file)
+    Output
+        upper_bound, int: number of trucks of a feasible schedule (None if the greedy heuristic found no schedule)
+    """
+    try:
+        schedule = greedy_schedule(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                                   end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                                   TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+    except ValueError as error:
+        logging.warning("Fleet sizing without upper bound: {0}".format(error))
+        return None
+    return max([len(schedule.truck_routes[t]) for t in range(DAYS)] + [1])
+###########################################################
+###
+def fleet_size(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+               end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+               TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,trace=None):
+    """
+    Purpose
+        Get the lower and upper bound of the number of trucks
+    Input
+        (the data of the instance, see read_file() in the ReadVeRoLogInstances file)
+        trace, RunTrace: the bounds are recorded in the trace (None for no trace)
+    Output
+        lower_bound, int: smallest number of trucks that can be feasible
+        upper_bound, int: number of trucks that is feasible (None if the greedy heuristic found no schedule)
+    """
+    order_volume = np.array([customer_order_size[j-1] * machine_size[customer_machine_types[j-1]] for j in customer_nodes],dtype=np.float64)
+    lower_bound,daily = fleet_lower_bound(DAYS,customer_nodes,order_volume,start_delivery_window,end_delivery_window,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix)
+    upper_bound = fleet_upper_bound(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                                    end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                                    TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+    if upper_bound is not None:
+        lower_bound = min(lower_bound,upper_bound)
+    print("Fleet sizing: at least {0} trucks (per day {1}), the greedy schedule uses {2} trucks".format(lower_bound,daily,upper_bound))
+    logging.info("Fleet sizing: lower bound {0}, daily {1}, upper bound {2}".format(lower_bound,daily,upper_bound))
+    if trace is not None:
+        trace.lap("fleet","bounds",lower_bound=lower_bound,upper_bound=upper_bound,daily=daily)
+    return lower_bound,upper_bound
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Construct a feasible schedule for a VeRoLog instance in seconds with a greedy heuristic, without solving the MILP. The
+    heuristic works on the data of read_file() of the ReadVeRoLogInstances file and plans day by day:
+     - Trucks: a request is delivered at the latest on the last day of its delivery window. The requests that must be
+       delivered on a day are inserted (largest order first) at the cheapest position in the trips of the trucks under
+       the truck capacity and the truck maximum distance, a truck returns to the depot for a new trip or a new truck is
+       used if needed. Requests with a later end of their window are added if they fit in the trips that are driven anyway.
+     - Technicians: a request is installed as soon as possible after its delivery (largest idle penalty first) at the
+       cheapest position in the route of an eligible technician, respecting the maximum number of installations, the
+       maximum distance and the rule that a technician has two days off after working five days in a row. Starting the
+       route of a technician on a day costs the technician day cost (and the technician cost for the first day).
+     - Requests that cannot be delivered on their latest day of delivery (with a maximum number of trucks) or that cannot
+       be installed within the horizon get a latest delivery day one day earlier and the schedule is planned again.
+    The schedule is written in the same format as create_solution_file() of the WriteSolutionVeRoLogMip file and checked by
+    the SolutionVerolog2019 file.
+
+    Example
+        python GreedyHeuristicVeRoLog.py VSC2019_ORTEC_Example.txt -o HeuristicSolutionExample
+"""
+###########################################################
+### imports
+import argparse
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+from ReadVeRoLogInstances import read_file, convert_instance_to_csv #from local repository
+from ScheduleVeRoLog import Schedule #from local repository
+###########################################################
+###
+def cheapest_insertion(route,j,start,end,distance_matrix):
+    """
+    Purpose
+        Find the cheapest position to insert node j in a route from start to end
+    Input
+        route, list: nodes of the route (without start and end)
+        j, int: node that is inserted
+        start, int: first node of the route (depot or technician home)
+        end, int: last node of the route (depot or technician home)
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+    Output
+        position, int: position in route where j is inserted
+        delta, int: increase of the distance of the route
+    """
+    path = [start] + route + [end]
+    deltas = [distance_matrix[path[n]][j] + distance_matrix[j][path[n+1]] - distance_matrix[path[n]][path[n+1]] for n in range(len(path)-1)]
+    position = int(np.argmin(deltas))
+    return position,int(deltas[position])
+###########################################################
+###
+def plan_deliveries(schedule,DAYS,customer_nodes,order_volume,start_delivery_window,latest_delivery,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,max_trucks=None):
+    """
+    Purpose
+        Plan the truck routes of all days (see the description of this file)
+    Input
+        schedule, Schedule: the truck routes are added to the schedule
+        DAYS, int: number of days in the horizon
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        order_volume, numpy array: ordersize times machine size of each customer
+        start_delivery_window, list: start of the delivery window for each customer
+        latest_delivery, list: latest day of delivery for each customer (at most the end of the delivery window)
+        TRUCK_MAX_DISTANCE, int: truck maximum distance
+        TRUCK_CAPACITY, int: truck capacity
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        max_trucks, int: maximum number of trucks on a day (None for no maximum)
+    Output
+        not_delivered, list: customer nodes that could not be delivered on their latest day of delivery
+    """
+    delivered = set()
+    not_delivered = []
+    for t in range(DAYS-1):
+        #trips (list of customer nodes and load) of each truck on day t
+        trips = []
+        distance = []
+        def insert(j,new_trips):
+            best = None
+            for k in range(len(trips)):
+                for n,(trip,load) in enumerate(trips[k]):
+                    if load + order_volume[j-1] > TRUCK_CAPACITY:
+                        continue
+                    position,delta = cheapest_insertion(trip,j,0,0,distance_matrix)
+                    if distance[k] + delta <= TRUCK_MAX_DISTANCE and (best is None or delta < best[0]):
+                        best = (delta,k,n,position)
+                if new_trips and distance[k] + 2*distance_matrix[0][j] <= TRUCK_MAX_DISTANCE and (best is None or 2*distance_matrix[0][j] < best[0]):
+                    best = (2*distance_matrix[0][j],k,None,None)
+            if best is None and new_trips and (max_trucks is None or len(trips) < max_trucks):
+                trips.append([])
+                distance.append(0)
+                best = (2*distance_matrix[0][j],len(trips)-1,None,None)
+            if best is None:
+                return False
+            delta,k,n,position = best
+            if n is None:
+                trips[k].append(([j],order_volume[j-1]))
+            else:
+                trip,load = trips[k][n]
+                trips[k][n] = (trip[:position]+[j]+trip[position:],load+order_volume[j-1])
+            distance[k] += delta
+            return True
+        due = [j for j in customer_nodes if j not in delivered and latest_delivery[j-1] <= t]
+        for j in sorted(due,key=lambda j: -order_volume[j-1]):
+            if insert(j,True):
+                delivered.add(j)
+            elif j not in not_delivered:
+                not_delivered.append(j)
+        #requests that can also be delivered later are only added to the trips that are driven anyway
+        optional = [j for j in customer_nodes if j not in delivered and start_delivery_window[j-1] <= t < latest_delivery[j-1]]
+        for j in sorted(optional,key=lambda j: (latest_delivery[j-1],-order_volume[j-1])):
+            if insert(j,False):
+                delivered.add(j)
+        for k in range(len(trips)):
+            route = []
+            for trip,load in trips[k]:
+                route += ([0] if route else []) + trip
+            schedule.truck_routes[t][k] = route
+    return not_delivered
+###########################################################
+###
+def can_work(worked,t):
+    """
+    Purpose
+        Check if a technician can work on day t given the days worked before t: a technician works at most five days in a
+        row and has two days off after working five days in a row
+    Input
+        worked, list: 1 if the technician works on the day (index)
+        t, int: day
+    Output
+        can_work, bool: True if the technician can work on day t
+    """
+    if t >= 5 and sum(worked[t-5:t]) == 5:
+        return False
+    if t >= 6 and sum(worked[t-6:t-1]) == 5:
+        return False
+    return True
+###########################################################
+###
+def plan_installations(schedule,DAYS,technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,technician_max_visits,
+                       technician_max_distance,eligibility,distance_matrix,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST):
+    """
+    Purpose
+        Plan the technician routes of all days after the truck routes are planned (see the description of this file)
+    Input
+        schedule, Schedule: the technician routes are added to the schedule
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        customer_machine_types, list: machine type of each customer order/request
+        machine_penalty, list: daily penalty for idle machines (delivered but not yet installed)
+        customer_order_size, list: size of each customer order/request
+        technician_max_visits, list: maximum number of customers each technician can visit daily
+        technician_max_distance, list: maximum distance each technician can drive daily
+        eligibility, numpy array: boolean matrix, eligibility[h][c] indicates if technician h can install at customer c (node c+1)
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        TECHNICIAN_DISTANCE_COST, int: technician distance cost
+        TECHNICIAN_DAY_COST, int: technician day cost
+        TECHNICIAN_COST, int: technician cost
+    Output
+        not_installed, list: customer nodes that could not be installed within the horizon
+    """
+    delivery_day = schedule.delivery_days()
+    home = {h: len(customer_nodes)+1+h for h in technicians}
+    worked = {h: [0]*DAYS for h in technicians}
+    installed = set()
+    for t in range(1,DAYS):
+        routes = {}
+        distance = {}
+        pending = [j for j in customer_nodes if j not in installed and delivery_day[j] < t]
+        for j in sorted(pending,key=lambda j: (-machine_penalty[customer_machine_types[j-1]]*customer_order_size[j-1],delivery_day[j],j)):
+            best = None
+            for h in technicians:
+                if not eligibility[h][j-1]:
+                    continue
+                if h in routes:
+                    if len(routes[h]) >= technician_max_visits[h]:
+                        continue
+                    position,delta = cheapest_insertion(routes[h],j,home[h],home[h],distance_matrix)
+                    extra = 0
+                else:
+                    if not can_work(worked[h],t):
+                        continue
+                    position,delta = 0,2*int(distance_matrix[home[h]][j])
+                    extra = TECHNICIAN_DAY_COST + (TECHNICIAN_COST if sum(worked[h]) == 0 else 0)
+                if distance.get(h,0) + delta > technician_max_distance[h]:
+                    continue
+                cost = delta*TECHNICIAN_DISTANCE_COST + extra
+                if best is None or cost < best[0]:
+                    best = (cost,h,position,delta)
+            if best is None:
+                continue
+            cost,h,position,delta = best
+            route = routes.setdefault(h,[])
+            route.insert(position,j)
+            distance[h] = distance.get(h,0) + delta
+            worked[h][t] = 1
+            installed.add(j)
+        for h in routes:
+            schedule.tech_routes[t][h] = routes[h]
+    return [j for j in customer_nodes if j not in installed]
+###########################################################
+###
+def greedy_schedule(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                    end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                    TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,max_trucks=None):
+    """
+    Purpose
+        Construct a feasible schedule with the greedy heuristic, the input is the output of read_file()
+    Input
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        customer_machine_types, list: machine type of each customer order/request
+        machine_size, list: size of each machine
+        machine_penalty, list: daily penalty for idle machines (delivered but not yet installed)
+        customer_order_size, list: size of each customer order/request
+        start_delivery_window, list: start of the delivery window for each customer
+        end_delivery_window, list: end of the delivery window for each customer
+        technician_max_visits, list: maximum number of customers each technician can visit daily
+        technician_max_distance, list: maximum distance each technician can drive daily
+        eligibility, numpy array: boolean matrix, eligibility[h][c] indicates if technician h can install at customer c (node c+1)
+        TRUCK_MAX_DISTANCE, int: truck maximum distance
+        TRUCK_CAPACITY, int: truck capacity
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        TECHNICIAN_DISTANCE_COST, int: technician distance cost
+        TECHNICIAN_DAY_COST, int: technician day cost
+        TECHNICIAN_COST, int: technician cost
+        max_trucks, int: maximum number of trucks on a day (None for no maximum, use the number of trucks of the MILP to
+            start the MILP from the schedule)
+    Output
+        schedule, Schedule: the truck and technician routes
+    """
+    order_volume = np.asarray(machine_size)[np.asarray(customer_machine_types,dtype=int)] * np.asarray(customer_order_size)
+    latest_delivery = list(end_delivery_window)
+    while True:
+        schedule = Schedule(DAYS)
+        not_delivered = plan_deliveries(schedule,DAYS,customer_nodes,order_volume,start_delivery_window,latest_delivery,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,max_trucks)
+        if not_delivered:
+            #deliver the requests that did not fit in the trucks earlier
+            earlier = [j for j in not_delivered if latest_delivery[j-1] > start_delivery_window[j-1]]
+            if not earlier:
+                raise ValueError("Unable to deliver customers {0} with {1} trucks".format([int(j) for j in not_delivered],max_trucks))
+            for j in earlier:
+                latest_delivery[j-1] -= 1
+            logging.info("Greedy heuristic: delivering customers {0} earlier".format([int(j) for j in earlier]))
+            continue
+        not_installed = plan_installations(schedule,DAYS,technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,technician_max_visits,
+                                           technician_max_distance,eligibility,distance_matrix,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+        if not not_installed:
+            return schedule
+        #deliver the requests that were not installed earlier, so there are more days to install them
+        delivery_day = schedule.delivery_days()
+        earlier = [j for j in not_installed if delivery_day[j] > start_delivery_window[j-1]]
+        if not earlier:
+            raise ValueError("Unable to install customers {0} within the horizon".format([int(j) for j in not_installed]))
+        for j in earlier:
+            latest_delivery[j-1] = delivery_day[j] - 1
+        logging.info("Greedy heuristic: delivering customers {0} earlier".format([int(j) for j in earlier]))
+###########################################################
+### main
+def main():
+    parser = argparse.ArgumentParser(description="Construct a feasible VeRoLog schedule with a greedy heuristic")
+    parser.add_argument("instance",help="VeRoLog instance (txt, the solution is validated) or csv file")
+    parser.add_argument("--output","-o",help="solution file (without the txt extension, default: HeuristicSolution_<instance>)")
+    parser.add_argument("--max-trucks","-t",type=int,help="maximum number of trucks on a day (default: no maximum)")
+    args = parser.parse_args()
+
+    start = time.time()
+    name = os.path.splitext(os.path.basename(args.instance))[0]
+    output_file_name = args.output if args.output else "HeuristicSolution_" + name
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_file = args.instance
+        if args.instance.endswith(".txt"):
+            csv_file = os.path.join(work_dir,name+".csv")
+            convert_instance_to_csv(args.instance,csv_file)
+        DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position = read_file(csv_file,args.max_trucks or 1)
+    print("Finished reading data at",time.time()-start)
+    schedule = greedy_schedule(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                               end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                               TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,args.max_trucks)
+    cost = schedule.calculate_cost(technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,distance_matrix,
+                                   TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+    print("Finished greedy schedule with total cost {0} at".format(cost["TOTAL_COST"]),time.time()-start)
+    schedule.write_solution_file(output_file_name,name+".txt",cost)
+    print("Created a solution file at",time.time()-start)
+    if args.instance.endswith(".txt"):
+        from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+        from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+        solution = SolutionVerolog2019(output_file_name+".txt",InstanceVerolog2019(args.instance))
+        if solution.isValid():
+            print("The solution is valid, cost:",solution.calcCost.Cost)
+        else:
+            print("The solution is not valid:\n\t" + "\n\t".join(solution.errorReport))
+            logging.error("Invalid heuristic solution: " + "; ".join(solution.errorReport))
+
+if __name__ == '__main__':
+    main()
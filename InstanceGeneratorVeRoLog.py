@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Generate synthetic VeRoLog 2019 instances from parameters (number of requests, technicians, machine types and days, the
+    spatial distribution of the locations, the width of the delivery windows and the density of the technician skills).
+    The generator is seeded and deterministic, the same parameters and seed always give the same instance. The instance is
+    built as an InstanceVerolog2019 object, written with its writeInstance() and also written in the csv form that is read
+    by read_file() of the ReadVeRoLogInstances file, so the MILP can be measured on instances of a controlled size.
+
+    Example
+        python InstanceGeneratorVeRoLog.py --requests 20 --technicians 4 --days 7 --seed 1 --scale 1 2 5 10 -o generated
+"""
+###########################################################
+### imports
+import argparse
+import math
+import os
+import random
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from DistancesVeRoLog import calc_distance_matrix #from local repository
+from ReadVeRoLogInstances import convert_instance_to_csv #from local repository
+###########################################################
+###
+def generate_coordinates(rng,number_of_locations,distribution,grid_size,number_of_clusters):
+    """
+    Purpose
+        Generate integer coordinates in the square [0,grid_size] x [0,grid_size]
+    Input
+        rng, random.Random: seeded random number generator
+        number_of_locations, int: number of coordinates
+        distribution, str: "uniform" (uniformly spread) or "clustered" (normally spread around cluster centers)
+        grid_size, int: size of the square
+        number_of_clusters, int: number of cluster centers (only for the clustered distribution)
+    Output
+        coordinates, list: (x,y) of each location
+    """
+    if distribution == "uniform":
+        return [(rng.randint(0,grid_size),rng.randint(0,grid_size)) for i in range(number_of_locations)]
+    if distribution == "clustered":
+        centers = [(rng.uniform(0,grid_size),rng.uniform(0,grid_size)) for c in range(number_of_clusters)]
+        spread = grid_size / (4.0 * math.sqrt(number_of_clusters))
+        coordinates = []
+        for i in range(number_of_locations):
+            center_x,center_y = centers[rng.randrange(number_of_clusters)]
+            coordinates.append((min(max(int(round(rng.gauss(center_x,spread))),0),grid_size),
+                                min(max(int(round(rng.gauss(center_y,spread))),0),grid_size)))
+        return coordinates
+    raise ValueError("Unknown spatial distribution: {0}".format(distribution))
+###########################################################
+###
+def generate_instance(number_of_requests,number_of_technicians,number_of_machine_types,days,seed,distribution="uniform",
+                      grid_size=100,number_of_clusters=3,min_window_width=2,max_window_width=4,skill_density=0.5,
+                      max_machine_size=5,max_order_amount=3,max_idle_penalty=50,min_technician_visits=2,max_technician_visits=5,
+                      technician_range=1.0,truck_capacity=None,truck_max_distance=None,truck_distance_cost=1,truck_day_cost=100,
+                      truck_cost=1000,technician_distance_cost=1,technician_day_cost=50,technician_cost=500,name=None):
+    """
+    Purpose
+        Generate a valid VeRoLog instance: every order fits in a truck, every customer can be reached by a truck, every
+        machine type can be installed by at least one technician and every customer can be reached by an eligible technician
+    Input
+        number_of_requests, int: number of requests (each request has its own customer location)
+        number_of_technicians, int: number of technicians (each technician has its own home location)
+        number_of_machine_types, int: number of machine types
+        days, int: number of days in the horizon
+        seed, int: seed of the random number generator
+        distribution, str: spatial distribution of the customers and technician homes ("uniform" or "clustered")
+        grid_size, int: the locations are in the square [0,grid_size] x [0,grid_size], the depot is in the center
+        number_of_clusters, int: number of clusters of the clustered distribution
+        min_window_width, int: minimum number of days in a delivery window (at least 2)
+        max_window_width, int: maximum number of days in a delivery window
+        skill_density, float: probability that a technician can install a machine type
+        max_machine_size, int: the size of a machine type is between 1 and max_machine_size
+        max_order_amount, int: the number of machines in a request is between 1 and max_order_amount
+        max_idle_penalty, int: the idle penalty of a machine type is between 1 and max_idle_penalty
+        min_technician_visits, int: minimum of the maximum number of installations of a technician per day
+        max_technician_visits, int: maximum of the maximum number of installations of a technician per day
+        technician_range, float: the maximum daily distance of a technician is between 0.5 and 1 times technician_range
+            times the grid diagonal (increased where needed to reach a customer)
+        truck_capacity, int: truck capacity (None for twice the largest order)
+        truck_max_distance, int: truck maximum distance (None for the smallest distance that reaches every customer)
+        truck_distance_cost, ..., technician_cost, int: the costs of the instance
+        name, str: name of the instance (None for a name based on the parameters)
+    Output
+        instance, InstanceVerolog2019: the generated instance
+    """
+    if days < 3:
+        raise ValueError("An instance needs at least 3 days (delivery window of 2 days and installation after delivery)")
+    rng = random.Random(seed)
+    instance = InstanceVerolog2019()
+    instance.Dataset = "VeRoLog solver challenge 2019"
+    instance.Name = name if name else "synthetic_r{0}_t{1}_m{2}_d{3}_s{4}".format(number_of_requests,number_of_technicians,number_of_machine_types,days,seed)
+    instance.Days = days
+    #machine types
+    for m in range(number_of_machine_types):
+        instance.Machines.append(InstanceVerolog2019.Machine(m+1,rng.randint(1,max_machine_size),rng.randint(1,max_idle_penalty)))
+    #locations: depot (1), customers (2 until number_of_requests+1), technician homes
+    coordinates = [(grid_size//2,grid_size//2)] + generate_coordinates(rng,number_of_requests+number_of_technicians,distribution,grid_size,number_of_clusters)
+    for loc,(x,y) in enumerate(coordinates):
+        instance.Locations.append(InstanceVerolog2019.Location(loc+1,x,y))
+    distances = calc_distance_matrix(coordinates)
+    #requests, the delivery window ends at least one day before the end of the horizon (installation is after delivery)
+    max_window_width = max(min(max_window_width,days-1),2)
+    min_window_width = min(max(min_window_width,2),max_window_width)
+    for r in range(number_of_requests):
+        width = rng.randint(min_window_width,max_window_width)
+        from_day = rng.randint(1,days-width)
+        instance.Requests.append(InstanceVerolog2019.Request(r+1,r+2,from_day,from_day+width-1,rng.randint(1,number_of_machine_types),rng.randint(1,max_order_amount)))
+    #technician skills, every machine type can be installed by at least one technician
+    capabilities = [[1 if rng.random() < skill_density else 0 for m in range(number_of_machine_types)] for h in range(number_of_technicians)]
+    for m in range(number_of_machine_types):
+        if not any(capabilities[h][m] for h in range(number_of_technicians)):
+            capabilities[rng.randrange(number_of_technicians)][m] = 1
+    diagonal = grid_size * math.sqrt(2)
+    max_day_distance = [int(rng.uniform(0.5,1.0) * technician_range * diagonal) for h in range(number_of_technicians)]
+    home = [number_of_requests+1+h for h in range(number_of_technicians)] #index of the home location in coordinates
+    #every customer can be reached (home - customer - home) by an eligible technician, otherwise the nearest one gets a larger range
+    for request in instance.Requests:
+        customer = request.customerLocID - 1
+        eligible = [h for h in range(number_of_technicians) if capabilities[h][request.machineID-1]]
+        if not any(2*distances[home[h]][customer] < max_day_distance[h] for h in eligible):
+            nearest = min(eligible,key=lambda h: distances[home[h]][customer])
+            max_day_distance[nearest] = int(2*distances[home[nearest]][customer]) + 1
+    for h in range(number_of_technicians):
+        instance.Technicians.append(InstanceVerolog2019.Technician(h+1,home[h]+1,max_day_distance[h],
+                                    rng.randint(min_technician_visits,max_technician_visits),capabilities[h]))
+    #trucks, every order fits in a truck and every customer can be reached from the depot
+    largest_order = max(instance.Machines[request.machineID-1].size * request.amount for request in instance.Requests) if instance.Requests else 1
+    instance.TruckCapacity = max(truck_capacity if truck_capacity else 2*largest_order,largest_order)
+    furthest_customer = max(int(distances[0][request.customerLocID-1]) for request in instance.Requests) if instance.Requests else 0
+    instance.TruckMaxDistance = max(truck_max_distance if truck_max_distance else 0,2*furthest_customer)
+    instance.TruckDistanceCost = truck_distance_cost
+    instance.TruckDayCost = truck_day_cost
+    instance.TruckCost = truck_cost
+    instance.TechnicianDistanceCost = technician_distance_cost
+    instance.TechnicianDayCost = technician_day_cost
+    instance.TechnicianCost = technician_cost
+    return instance
+###########################################################
+###
+def write_generated_instance(instance,txt_file,csv_file=None):
+    """
+    Purpose
+        Write a generated instance as VeRoLog instance (txt) and in the csv form that is read by read_file()
+    Input
+        instance, InstanceVerolog2019: the generated instance
+        txt_file, str: filename of the VeRoLog instance
+        csv_file, str: filename of the csv file (None for the txt filename with the csv extension)
+    Output
+        txt_file, str: filename of the VeRoLog instance
+        csv_file, str: filename of the csv file
+    """
+    if csv_file is None:
+        csv_file = os.path.splitext(txt_file)[0] + ".csv"
+    instance.writeInstance(txt_file,False)
+    convert_instance_to_csv(txt_file,csv_file)
+    return txt_file,csv_file
+###########################################################
+### main
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic VeRoLog 2019 instances")
+    parser.add_argument("--requests","-r",type=int,default=10,help="number of requests")
+    parser.add_argument("--technicians","-t",type=int,default=3,help="number of technicians")
+    parser.add_argument("--machine-types","-m",type=int,default=2,help="number of machine types")
+    parser.add_argument("--days","-d",type=int,default=6,help="number of days in the horizon")
+    parser.add_argument("--seed","-s",type=int,default=0,help="seed of the random number generator")
+    parser.add_argument("--distribution",choices=["uniform","clustered"],default="uniform",help="spatial distribution of the locations")
+    parser.add_argument("--grid-size",type=int,default=100,help="size of the square with the locations")
+    parser.add_argument("--clusters",type=int,default=3,help="number of clusters of the clustered distribution")
+    parser.add_argument("--min-window",type=int,default=2,help="minimum width of the delivery windows (days)")
+    parser.add_argument("--max-window",type=int,default=4,help="maximum width of the delivery windows (days)")
+    parser.add_argument("--skill-density",type=float,default=0.5,help="probability that a technician can install a machine type")
+    parser.add_argument("--scale",type=float,nargs="+",default=[1],help="scale factors for the number of requests and technicians, one instance per factor")
+    parser.add_argument("--output-dir","-o",default=".",help="directory of the generated instances")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir,exist_ok=True)
+    for scale in args.scale:
+        requests = max(int(round(args.requests*scale)),1)
+        technicians = max(int(round(args.technicians*scale)),1)
+        instance = generate_instance(requests,technicians,args.machine_types,args.days,args.seed,args.distribution,args.grid_size,args.clusters,
+                                     args.min_window,args.max_window,args.skill_density)
+        write_generated_instance(instance,os.path.join(args.output_dir,instance.Name+".txt"))
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,8 @@
 #! /usr/bin/env python
 
 import argparse
-import math
 import baseParser as base
+from DistancesVeRoLog import calc_distance_matrix
 
 class InstanceVerolog2019(base.BaseParser):
     parsertype = 'instance'
@@ -180,14 +180,7 @@ class InstanceVerolog2019(base.BaseParser):
     def calculateDistances(self):
         if not self.isValid() or self.calcDistance is not None:
             return
-        numLocs = len(self.Locations)
-        self.calcDistance = [[0 for x in range(numLocs)] for x in range(numLocs)]
-        for i in range(numLocs): 
-            cI = self.Locations[i]
-            for j in range(i,numLocs):
-                cJ = self.Locations[j]
-                dist = math.ceil( math.sqrt( pow(cI.X-cJ.X,2) + pow(cI.Y-cJ.Y,2) ) )
-                self.calcDistance[i][j] = self.calcDistance[j][i] = int(dist)
+        self.calcDistance = calc_distance_matrix([(loc.X,loc.Y) for loc in self.Locations]).tolist()
                 
     def isValid(self):
         return not hasattr(self, 'errorReport') or not self.errorReport
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Record the wall time, the CPU time and counters (for example the number of columns, rows and nonzeros that were added)
+    of each phase of a run: reading the instance, creating the decision variables, the objective function, every constraint
+    family per day, the optimization and writing the solution file. The records are written as a JSON trace per run, so
+    runs on different instances and different versions of the code can be compared. Note that a RunTrace is passed to the
+    functions of the RunMILPVeRoLogMip file.
+"""
+###########################################################
+### imports
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import time
+###########################################################
+###
+def git_commit():
+    """
+    Purpose
+        Get the commit of the code that is running, None if it is not a git repository
+    """
+    try:
+        return subprocess.check_output(["git","rev-parse","HEAD"],cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL,universal_newlines=True).strip()
+    except (OSError,subprocess.CalledProcessError):
+        return None
+###########################################################
+###
+class RunTrace(object):
+    """
+    Purpose
+        Trace of the phases of one run, each phase is a record with the stage (for example "constraints"), the name (for
+        example "tech_cumulative_load"), the day, the wall time, the CPU time and counters
+    Input
+        name, str: name of the run (for example the name of the instance)
+        metadata, dict: information about the run that is stored in the trace (for example the number of trucks)
+    """
+    def __init__(self,name,metadata=None):
+        self.name = name
+        self.metadata = dict(metadata or {})
+        self.records = []
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.mark()
+
+    def mark(self):
+        """
+        Purpose
+            Start the clock of split() and lap()
+        """
+        self.split_wall,self.split_cpu = time.perf_counter(),time.process_time()
+
+    def split(self):
+        """
+        Purpose
+            Get the wall and CPU time since the previous mark(), split() or lap() and restart the clock
+        """
+        wall,cpu = time.perf_counter(),time.process_time()
+        split = (wall-self.split_wall,cpu-self.split_cpu)
+        self.split_wall,self.split_cpu = wall,cpu
+        return split
+
+    def lap(self,stage,name=None,day=None,**counters):
+        """
+        Purpose
+            Add a record with the wall and CPU time since the previous mark(), split() or lap(), this can be placed next to
+            the existing progress messages without changing the structure of the code
+        """
+        wall,cpu = self.split()
+        return self.add(stage,name,day,wall,cpu,**counters)
+
+    @contextlib.contextmanager
+    def phase(self,stage,name=None,day=None,**counters):
+        """
+        Purpose
+            Measure the wall and CPU time of the code in the with-block, counters can be added to the yielded record
+        Input
+            stage, str: stage of the run ("read", "variables", "objective", "constraints", "solve", "solution_file", ...)
+            name, str: name within the stage (for example the name of the decision variable or constraint family)
+            day, int: index of the day (None if the phase is not per day)
+            counters, int: counters of the phase
+        Output
+            record, dict: the record of the phase
+        """
+        record = self._new_record(stage,name,day,counters)
+        wall,cpu = time.perf_counter(),time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall"] += time.perf_counter() - wall
+            record["cpu"] += time.process_time() - cpu
+            self.records.append(record)
+
+    def add(self,stage,name=None,day=None,wall=0.0,cpu=0.0,**counters):
+        """
+        Purpose
+            Add a record of a phase that was measured elsewhere (for example a family that is built in a generator)
+        """
+        record = self._new_record(stage,name,day,counters)
+        record["wall"],record["cpu"] = wall,cpu
+        self.records.append(record)
+        return record
+
+    def _new_record(self,stage,name,day,counters):
+        record = {"stage": stage,"name": name,"day": day,"wall": 0.0,"cpu": 0.0,"elapsed": time.perf_counter()-self.start_wall}
+        record.update(counters)
+        return record
+
+    def totals(self,stage=None):
+        """
+        Purpose
+            Sum the wall time, CPU time and counters over the records with the same stage and name
+        Input
+            stage, str: only sum the records of this stage (None for all stages)
+        Output
+            totals, dict: (stage,name) (keys) and the summed record (values)
+        """
+        totals = {}
+        for record in self.records:
+            if stage is not None and record["stage"] != stage:
+                continue
+            total = totals.setdefault((record["stage"],record["name"]),{"records": 0})
+            total["records"] += 1
+            for key,value in record.items():
+                if key in ("stage","name","day","elapsed") or isinstance(value,bool) or not isinstance(value,(int,float)):
+                    continue
+                total[key] = total.get(key,0) + value
+        return totals
+
+    def to_dict(self):
+        """
+        Purpose
+            Get the trace as a dictionary that can be written as JSON
+        """
+        metadata = {"python": platform.python_version(),"platform": platform.platform(),"commit": git_commit()}
+        try:
+            import mip
+            metadata["mip"] = getattr(mip,"__version__",None)
+        except ImportError:
+            pass
+        metadata.update(self.metadata)
+        totals = [dict(stage=stage,name=name,**total) for (stage,name),total in self.totals().items()]
+        return {"name": self.name,"started_at": self.started_at,"metadata": metadata,
+                "wall": time.perf_counter()-self.start_wall,"cpu": time.process_time()-self.start_cpu,
+                "totals": totals,"records": self.records}
+
+    def write_json(self,file_name):
+        """
+        Purpose
+            Write the trace to a JSON file
+        Input
+            file_name, str: name of the JSON file
+        Output
+        """
+        with open(file_name,"w") as trace_file:
+            json.dump(self.to_dict(),trace_file,indent=1,default=str)
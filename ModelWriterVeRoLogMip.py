@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Write the MILP straight to a LP or MPS file (optionally gzip compressed) while it is generated, without building the
+    python-mip model. The decision variables are created by create_decisions_variables() of the RunMILPVeRoLogMip file with a
+    ColumnAllocator instead of a mip model, the constraint families of the ConstraintMatrixVeRoLogMip file are written as
+    soon as they are built. The file can then be solved by the cbc executable as a subprocess, so instances that are too
+    large to build in memory can still be solved.
+"""
+###########################################################
+### imports
+import gzip
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import numpy as np
+import mip as mip
+from InstrumentationVeRoLogMip import RunTrace #from local repository
+from ConstraintMatrixVeRoLogMip import ColumnIndex, constraint_families, coo_to_csr #from local repository
+###########################################################
+###
+class Column(object):
+    """
+    Purpose
+        Light weight replacement of mip.Var, only the index and the name of the column are stored
+    """
+    __slots__ = ("idx","name")
+
+    def __init__(self,idx,name):
+        self.idx = idx
+        self.name = name
+###########################################################
+###
+class ColumnAllocator(object):
+    """
+    Purpose
+        Replacement of the mip model in create_decisions_variables(), add_var() gives each variable the next column index
+        and keeps the name, type and bounds of the column
+    Input
+        name, str: name of the model
+    """
+    def __init__(self,name):
+        self.name = name
+        self.col_names = []
+        self.var_types = []
+        self.lower_bounds = []
+        self.upper_bounds = []
+
+    def add_var(self,name="",lb=0.0,ub=mip.INF,var_type=mip.CONTINUOUS):
+        if var_type == mip.BINARY:
+            lb,ub = max(lb,0.0),min(ub,1.0)
+        column = Column(len(self.col_names),name if name else "var({0})".format(len(self.col_names)))
+        self.col_names.append(column.name)
+        self.var_types.append(var_type)
+        self.lower_bounds.append(lb)
+        self.upper_bounds.append(ub)
+        return column
+
+    @property
+    def num_cols(self):
+        return len(self.col_names)
+###########################################################
+###
+def objective_coefficients(columns,num_cols,distance_matrix,customer_nodes,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,
+                           TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,customer_machine_types):
+    """
+    Purpose
+        Calculate the objective coefficient of each column, this is the same objective function as the one of
+        create_cost_functions() in the RunMILPVeRoLogMip file
+    Input
+        columns, ColumnIndex: column index of each decision variable
+        num_cols, int: number of columns in the model
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        TRUCK_DISTANCE_COST, int: truck distance cost
+        TRUCK_DAY_COST, int: truck day cost
+        TRUCK_COST, int: truck cost
+        TECHNICIAN_DISTANCE_COST, int: technician distance cost
+        TECHNICIAN_DAY_COST, int: technician day cost
+        TECHNICIAN_COST, int: technician cost
+        machine_penalty, list: daily penalty for idle machines (delivered but not yet installed)
+        customer_order_size, list: size of each customer order/request
+        customer_machine_types, list: machine type of each customer order/request
+    Output
+        objective, numpy array: objective coefficient of each column
+        objective_const, float: constant of the objective function (and of the penalty cost)
+        penalty_objective, numpy array: coefficient of each column in the penalty cost of idle machines
+    """
+    objective = np.zeros(num_cols)
+    penalty = np.array([machine_penalty[customer_machine_types[j-1]] * customer_order_size[j-1] for j in customer_nodes],dtype=np.float64)
+    x_t,x_k,x_i,x_j,x_col = columns.x
+    y_t,y_h,y_i,y_j,y_col = columns.y
+    np.add.at(objective,x_col,TRUCK_DISTANCE_COST * distance_matrix[x_i,x_j])
+    np.add.at(objective,y_col,TECHNICIAN_DISTANCE_COST * distance_matrix[y_i,y_j])
+    np.add.at(objective,columns.u,TRUCK_COST)
+    np.add.at(objective,columns.v.reshape(-1),TRUCK_DAY_COST)
+    np.add.at(objective,columns.p,TECHNICIAN_COST)
+    np.add.at(objective,columns.q.reshape(-1),TECHNICIAN_DAY_COST)
+    #penalty * (installation day - delivery day - 1), the index t of y is day t+1
+    x_in = (x_j >= 1) & (x_j <= len(customer_nodes))
+    y_in = (y_j >= 1) & (y_j <= len(customer_nodes))
+    penalty_objective = np.zeros(num_cols)
+    np.add.at(penalty_objective,x_col[x_in],-penalty[x_j[x_in]-1] * x_t[x_in])
+    np.add.at(penalty_objective,y_col[y_in],penalty[y_j[y_in]-1] * (y_t[y_in]+1))
+    return objective+penalty_objective,-penalty.sum(),penalty_objective
+###########################################################
+###
+def _open_text(file_name,mode):
+    """
+    Purpose
+        Open a text file, the file is gzip compressed if the name ends with .gz
+    """
+    if file_name.endswith(".gz"):
+        return gzip.open(file_name,mode+"t")
+    return open(file_name,mode)
+###########################################################
+###
+def _number(value):
+    return "{0:.15g}".format(value)
+###########################################################
+###
+class LPStreamWriter(object):
+    """
+    Purpose
+        Write a model in LP format, the objective function must be written before the first row and the columns after the
+        last row. Every column is in the objective function (with coefficient 0 if needed) so the order of the columns in
+        the file is the order of the column indices
+    Input
+        file_name, str: name of the file (.lp or .lp.gz)
+        name, str: name of the model
+    """
+    TERMS_PER_LINE = 8
+    SENSE = {mip.LESS_OR_EQUAL: "<=", mip.GREATER_OR_EQUAL: ">=", mip.EQUAL: "="}
+
+    def __init__(self,file_name,name):
+        self.file = _open_text(file_name,"w")
+        self.file.write("\\Problem name: {0}\n\n".format(name))
+        self.num_rows = 0
+        self.num_nz = 0
+
+    def _write_terms(self,coefs,names):
+        terms = ["{0} {1} {2}".format("-" if c < 0 else "+",_number(abs(c)),n) for c,n in zip(coefs,names)]
+        for pos in range(0,len(terms),self.TERMS_PER_LINE):
+            self.file.write(" "+" ".join(terms[pos:pos+self.TERMS_PER_LINE])+"\n")
+
+    def write_objective(self,objective,objective_const,col_names):
+        self.col_names = col_names
+        self.file.write("Minimize\nOBJROW:\n")
+        self._write_terms(objective.tolist(),col_names)
+        if objective_const != 0:
+            self.file.write(" {0} {1}\n".format("-" if objective_const < 0 else "+",_number(abs(objective_const))))
+        self.file.write("Subject To\n")
+
+    def write_family(self,family):
+        names = family.row_names()
+        indptr = family.indptr.tolist()
+        indices = family.indices.tolist()
+        data = family.data.tolist()
+        rhs = family.rhs.tolist()
+        col_names = self.col_names
+        sense = self.SENSE[family.sense]
+        for r in range(family.num_rows):
+            start,end = indptr[r],indptr[r+1]
+            self.file.write("{0}:\n".format(names[r]))
+            if end > start:
+                self._write_terms(data[start:end],[col_names[c] for c in indices[start:end]])
+            else: #empty row, same as python-mip: add a dummy entry
+                self.file.write(" + 0 {0}\n".format(col_names[0]))
+            self.file.write(" {0} {1}\n".format(sense,_number(rhs[r])))
+        self.num_rows += family.num_rows
+        self.num_nz += family.num_nz
+
+    def write_columns(self,var_types,lower_bounds,upper_bounds):
+        col_names = self.col_names
+        self.file.write("Bounds\n")
+        for c,name in enumerate(col_names):
+            lb,ub = lower_bounds[c],upper_bounds[c]
+            if var_types[c] == mip.BINARY or (lb == 0.0 and ub >= mip.INF):
+                continue
+            lower = "-inf" if lb <= -mip.INF else _number(lb)
+            upper = "+inf" if ub >= mip.INF else _number(ub)
+            self.file.write(" {0} <= {1} <= {2}\n".format(lower,name,upper))
+        for section,var_type in (("Binaries",mip.BINARY),("Generals",mip.INTEGER)):
+            integer_names = [name for name,t in zip(col_names,var_types) if t == var_type]
+            if integer_names:
+                self.file.write(section+"\n")
+                for pos in range(0,len(integer_names),self.TERMS_PER_LINE):
+                    self.file.write(" "+" ".join(integer_names[pos:pos+self.TERMS_PER_LINE])+"\n")
+        self.file.write("End\n")
+
+    def close(self):
+        self.file.close()
+###########################################################
+###
+class MPSStreamWriter(object):
+    """
+    Purpose
+        Write a model in (free) MPS format. The MPS format is column oriented, so the rows are written to a temporary file
+        and the matrix entries are spooled to binary files on disk, one file per range of columns. When the model is
+        complete the entries of each range are sorted by column and written, only one range is in memory at a time
+    Input
+        file_name, str: name of the file (.mps or .mps.gz)
+        name, str: name of the model
+        cols_per_bucket, int: number of columns in each range of spooled entries
+    """
+    ENTRY = np.dtype([("col",np.int64),("row",np.int64),("val",np.float64)])
+    SENSE = {mip.LESS_OR_EQUAL: "L", mip.GREATER_OR_EQUAL: "G", mip.EQUAL: "E"}
+
+    def __init__(self,file_name,name,cols_per_bucket=100000):
+        self.file_name = file_name
+        self.name = name
+        self.cols_per_bucket = cols_per_bucket
+        self.spool_dir = tempfile.mkdtemp(prefix="mps_",dir=os.path.dirname(os.path.abspath(file_name)))
+        self.rows_file = open(os.path.join(self.spool_dir,"rows"),"w")
+        self.rhs_file = open(os.path.join(self.spool_dir,"rhs"),"w")
+        self.row_block_start = [] #first row of each constraint family
+        self.row_block_name = [] #name prefix of each constraint family
+        self.num_rows = 0
+        self.num_nz = 0
+
+    def _spool(self,cols,rows,vals):
+        entries = np.empty(len(cols),dtype=self.ENTRY)
+        entries["col"],entries["row"],entries["val"] = cols,rows,vals
+        buckets = entries["col"] // self.cols_per_bucket
+        for bucket in np.unique(buckets):
+            with open(os.path.join(self.spool_dir,"bucket_{0}".format(bucket)),"ab") as bucket_file:
+                entries[buckets == bucket].tofile(bucket_file)
+
+    def write_objective(self,objective,objective_const,col_names):
+        self.col_names = col_names
+        self.objective_const = objective_const
+        nonzero = np.flatnonzero(objective)
+        self._spool(nonzero,np.full(len(nonzero),-1),objective[nonzero])
+
+    def write_family(self,family):
+        names = family.row_names()
+        self.rows_file.write("".join(" {0} {1}\n".format(self.SENSE[family.sense],n) for n in names))
+        self.rhs_file.write("".join("    RHS {0} {1}\n".format(n,_number(b)) for n,b in zip(names,family.rhs.tolist()) if b != 0))
+        self.row_block_start.append(self.num_rows)
+        self.row_block_name.append(family.row_prefix())
+        rows = self.num_rows + np.repeat(np.arange(family.num_rows),np.diff(family.indptr))
+        self._spool(family.indices,rows,family.data)
+        self.num_rows += family.num_rows
+        self.num_nz += family.num_nz
+
+    def _row_names(self,rows):
+        block_start = np.array(self.row_block_start,dtype=np.int64)
+        blocks = np.searchsorted(block_start,rows,side="right") - 1
+        return ["OBJROW" if r < 0 else "{0}_{1}".format(self.row_block_name[b],r-block_start[b]) for r,b in zip(rows.tolist(),blocks.tolist())]
+
+    def write_columns(self,var_types,lower_bounds,upper_bounds):
+        self.rows_file.close()
+        self.rhs_file.close()
+        num_cols = len(self.col_names)
+        with _open_text(self.file_name,"w") as mps_file:
+            mps_file.write("NAME {0} FREE\nROWS\n N OBJROW\n".format(self.name))
+            with open(self.rows_file.name) as rows_file:
+                shutil.copyfileobj(rows_file,mps_file)
+            mps_file.write("COLUMNS\n")
+            integer = False
+            for bucket in range((num_cols + self.cols_per_bucket - 1) // self.cols_per_bucket):
+                bucket_name = os.path.join(self.spool_dir,"bucket_{0}".format(bucket))
+                entries = np.fromfile(bucket_name,dtype=self.ENTRY) if os.path.exists(bucket_name) else np.empty(0,dtype=self.ENTRY)
+                indptr,rows,vals = coo_to_csr(entries["col"] - bucket*self.cols_per_bucket,entries["row"],entries["val"],min(self.cols_per_bucket,num_cols-bucket*self.cols_per_bucket))
+                row_names = self._row_names(rows)
+                vals = vals.tolist()
+                indptr = indptr.tolist()
+                lines = []
+                for pos in range(len(indptr)-1):
+                    c = bucket*self.cols_per_bucket + pos
+                    if (var_types[c] != mip.CONTINUOUS) != integer:
+                        integer = not integer
+                        lines.append("    MARKER 'MARKER' '{0}'\n".format("INTORG" if integer else "INTEND"))
+                    start,end = indptr[pos],indptr[pos+1]
+                    if end > start:
+                        lines.extend("    {0} {1} {2}\n".format(self.col_names[c],row_names[e],_number(vals[e])) for e in range(start,end))
+                    else: #every column must be in the COLUMNS section
+                        lines.append("    {0} OBJROW 0\n".format(self.col_names[c]))
+                mps_file.write("".join(lines))
+            if integer:
+                mps_file.write("    MARKER 'MARKER' 'INTEND'\n")
+            mps_file.write("RHS\n")
+            if self.objective_const != 0:
+                mps_file.write("    RHS OBJROW {0}\n".format(_number(-self.objective_const)))
+            with open(self.rhs_file.name) as rhs_file:
+                shutil.copyfileobj(rhs_file,mps_file)
+            mps_file.write("BOUNDS\n")
+            for c,name in enumerate(self.col_names):
+                lb,ub = lower_bounds[c],upper_bounds[c]
+                if var_types[c] == mip.BINARY:
+                    mps_file.write(" BV BND {0}\n".format(name))
+                    continue
+                if lb != 0.0:
+                    mps_file.write(" MI BND {0}\n".format(name) if lb <= -mip.INF else " LO BND {0} {1}\n".format(name,_number(lb)))
+                if ub < mip.INF:
+                    mps_file.write(" UP BND {0} {1}\n".format(name,_number(ub)))
+            mps_file.write("ENDATA\n")
+
+    def close(self):
+        shutil.rmtree(self.spool_dir,ignore_errors=True)
+###########################################################
+###
+def write_model_stream(file_name,create_decisions_variables,DAYS,technicians,trucks,customer_machine_types,machine_size,machine_penalty,customer_order_size,
+                       start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,tech_customers,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,
+                       LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,
+                       customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,start,trace=None,truck_arcs=None,tech_arcs=None,compact_linking=False):
+    """
+    Purpose
+        Write the MILP to a LP or MPS file without building the python-mip model, each constraint family is written as soon
+        as it is built
+    Input
+        file_name, str: name of the model file, the format follows from the extension (.lp, .mps, .lp.gz or .mps.gz)
+        create_decisions_variables, function: create_decisions_variables() of the RunMILPVeRoLogMip file
+        (the remaining input is the data of the instance, see read_file() in the ReadVeRoLogInstances file)
+        start, float: start time of algorithm
+        trace, RunTrace: the time, rows and nonzeros of each written constraint family are recorded in the trace (None for no trace)
+        truck_arcs, tech_arcs: the arcs that are created (see prune_arcs() in the ArcPruningVeRoLogMip file, None for all arcs)
+        compact_linking, bool: write the compact linking formulation (see add_constraints() in the RunMILPVeRoLogMip file)
+    Output
+        allocator, ColumnAllocator: the names, types and bounds of the columns in the file
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j (with Column objects)
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j (with Column objects)
+        u, v, p, q, list: Column objects of the decision variables for the number of trucks, truck days, technicians and
+            technician days
+        objective, numpy array: objective coefficient of each column
+        objective_const, float: constant of the objective function (and of the penalty cost)
+        penalty_objective, numpy array: coefficient of each column in the penalty cost of idle machines
+    """
+    model_name = os.path.basename(file_name).split(".")[0]
+    if file_name.endswith(".lp") or file_name.endswith(".lp.gz"):
+        writer = LPStreamWriter(file_name,model_name)
+    elif file_name.endswith(".mps") or file_name.endswith(".mps.gz"):
+        writer = MPSStreamWriter(file_name,model_name)
+    else:
+        raise ValueError("Unknown model file format: {0}".format(file_name))
+    if trace is None:
+        trace = RunTrace(None)
+    allocator = ColumnAllocator(model_name)
+    x,y,w,u,v,p,q,z,l = create_decisions_variables(allocator,DAYS,technicians,trucks,x_nodes,tech_customers,nodes,technician_nodes,customer_nodes,start,trace,
+                                                   start_delivery_window=start_delivery_window,end_delivery_window=end_delivery_window,truck_arcs=truck_arcs,tech_arcs=tech_arcs,
+                                                   integral_days=compact_linking)
+    columns = ColumnIndex(x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,tech_customers,nodes)
+    try:
+        objective,objective_const,penalty_objective = objective_coefficients(columns,allocator.num_cols,distance_matrix,customer_nodes,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,
+                                                           TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,customer_machine_types)
+        writer.write_objective(objective,objective_const,allocator.col_names)
+        print("Finished writing objective function at",time.time()-start)
+        trace.lap("write","objective",columns=allocator.num_cols)
+        order_volume = np.array([customer_order_size[j-1] * machine_size[customer_machine_types[j-1]] for j in customer_nodes],dtype=np.float64)
+        families = constraint_families(columns,DAYS,technicians,trucks,customer_nodes,order_volume,start_delivery_window,end_delivery_window,
+                                       technician_max_visits,technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,LARGE_NUMBER,
+                                       compact_linking=compact_linking)
+        trace.mark()
+        for family in families:
+            writer.write_family(family)
+            trace.lap("write",family.name,family.day,rows=family.num_rows,nonzeros=family.num_nz)
+            logging.info("Finished writing {0} constraints for day {1} ({2} rows, {3} nonzeros) at ".format(family.name,family.day,family.num_rows,family.num_nz) + str(time.time()-start))
+        writer.write_columns(allocator.var_types,allocator.lower_bounds,allocator.upper_bounds)
+        trace.lap("write","columns",columns=allocator.num_cols,rows=writer.num_rows,nonzeros=writer.num_nz)
+    finally:
+        writer.close()
+    print("Finished writing model file {0} ({1} columns, {2} rows, {3} nonzeros) at".format(file_name,allocator.num_cols,writer.num_rows,writer.num_nz),time.time()-start)
+    return allocator,x,y,u,v,p,q,objective,objective_const,penalty_objective
+###########################################################
+###
+def solve_with_cbc(model_file,solution_file,max_seconds,threads=1,cbc_path="cbc",options=None):
+    """
+    Purpose
+        Solve a model file with the cbc executable in a subprocess
+    Input
+        model_file, str: name of the LP or MPS file
+        solution_file, str: name of the file the cbc solution is written to
+        max_seconds, float: time limit of the solver
+        threads, int: number of threads of the solver (-1 for all cores)
+        cbc_path, str: path of the cbc executable
+        options, list: other options of the cbc executable (see cbc_arguments() in the SolverConfigVeRoLogMip file)
+    Output
+        returncode, int: the return code of the cbc process
+    """
+    if shutil.which(cbc_path) is None:
+        raise FileNotFoundError("The cbc executable ({0}) was not found".format(cbc_path))
+    if threads == -1:
+        threads = os.cpu_count() or 1
+    command = [cbc_path,model_file,"-sec",str(max_seconds),"-threads",str(threads)] + list(options or []) + ["-solve","-solu",solution_file]
+    logging.info("Running " + " ".join(command))
+    completed = subprocess.run(command,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,universal_newlines=True)
+    logging.info(completed.stdout)
+    return completed.returncode
+###########################################################
+###
+def read_cbc_solution(solution_file,num_cols):
+    """
+    Purpose
+        Read a solution file written by the cbc executable
+    Input
+        solution_file, str: name of the cbc solution file
+        num_cols, int: number of columns in the model
+    Output
+        status, str: first line of the file (for example "Optimal - objective value 1955.00000000")
+        values, numpy array: value of each column
+    """
+    values = np.zeros(num_cols)
+    with open(solution_file) as sol_file:
+        status = sol_file.readline().strip()
+        for line in sol_file:
+            fields = line.split()
+            if fields and fields[0] == "**": #cbc marks infeasible values
+                fields = fields[1:]
+            if len(fields) >= 3:
+                values[int(fields[0])] = float(fields[2])
+    return status,values
+###########################################################
+###
+def cbc_solution_found(status):
+    """
+    Purpose
+        Check if the cbc executable found an integer solution
+    Input
+        status, str: first line of the cbc solution file (see read_cbc_solution())
+    Output
+        found, bool: True if the solution file contains an integer solution
+    """
+    return status.startswith("Optimal") or (status.startswith("Stopped") and "no integer solution" not in status)
@@ -9,18 +9,17 @@ Purpose:
 """
 ###########################################################
 ### imports
-import math as math
 import pandas as pd
 import numpy as np
 import csv as csv
 import logging
-from networkx import nx
+from DistancesVeRoLog import get_distance_matrix #from local repository
 ###########################################################
 ###
 def data_checks(technicians,customers,machines,technician_nodes,customer_nodes,technician_max_visits,
                technician_max_distance,technician_skill_set,customer_machine_types,customer_order_size,
                start_delivery_window,end_delivery_window,machine_size,machine_penalty,
-                TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,DAYS,edges_index,cost_edges):
+                TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,DAYS,distance_matrix,eligibility):
     """
     Purpose:
         Some checks to see if the data has been succesfully read from the file
@@ -42,8 +41,8 @@ def data_checks(technicians,customers,machines,technician_nodes,customer_nodes,t
         TRUCK_MAX_DISTANCE, int: max driving distance for each truck
         TRUCK_CAPACITY, int: truck max capacity
         DAYS, int: number of days in the horizon
-        edges_index, dict: containing the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: containing the cost for each edge 
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        eligibility, numpy array: boolean matrix, eligibility[h][c] indicates if technician h can install at customer c (node c+1)
     Output:
     """
     if not len(technicians) == len(technician_nodes) == len(technician_max_visits) == len(technician_max_distance) == len(technician_skill_set):
@@ -66,101 +65,44 @@ def data_checks(technicians,customers,machines,technician_nodes,customer_nodes,t
             logging.error("ERROR: the end of delivery window is outside horizon")
 
     for i in range(len(customer_nodes)):
-        if 2*cost_edges[0][i]> TRUCK_MAX_DISTANCE:
+        if 2*distance_matrix[0][i+1]> TRUCK_MAX_DISTANCE:
             logging.error("ERROR: trucks can't reach customer {0}".format(i))
 
     for i, machine_type in enumerate(customer_machine_types):
         if machine_size[machine_type] * customer_order_size[i] > TRUCK_CAPACITY:
             logging.error("ERROR: customer order is to large for truck capacity")         
 
-    tech_dist_check = [0 for i in customers]
-    for i in customers:
-        MachineType = customer_machine_types[i]
-        for tech in technicians:
-            if technician_skill_set[tech][MachineType] == 1:
-                edge_index = edges_index[(tech+len(customers)+1,i+1)]
-                if 2*cost_edges[edge_index[0]][edge_index[1]] < technician_max_distance[tech]:
-                    tech_dist_check[i] = 1
+    #a customer can be installed if an eligible technician can drive from home to the customer and back
+    tech_home_nodes = [tech+len(customers)+1 for tech in technicians]
+    tech_round_trip = 2*distance_matrix[np.ix_(tech_home_nodes,[i+1 for i in customers])]
+    tech_dist_check = (eligibility & (tech_round_trip < np.asarray(technician_max_distance)[:,None])).any(axis=0)
     if min(tech_dist_check) == 0:
         logging.error("ERROR: customer location is located too far from technicians") 
         
     return
 ###########################################################
 ###
-def get_edges_cost(nodes,x_nodes,technician_skill_set,technician_nodes,customer_nodes,technicians,customer_machine_types):
-    """
-    Purpose
-        Get the edge cost in the problem (ceiling of the euclidean distance between the coordinates), the index of each edge 
-        in cost_edges is returned as well in a dictionary. Note that the graph is directed. We have edges that connect the
-        depot to each customer and each customer to each customer. We have edges that connect the technician home locations 
-        to each customer where the technician can install. The cost for travelling over edge i is found 
-        by cost_edges[edges_index[i][0]][edges_index[i][1]].
-    Input
-        nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
-        x_nodes, dict: nodes (keys) and coordinates (values) related to x variable in the mathematical problem
-        technician_skill_set, list: the skillset of each technician
-        technician_nodes, dict: nodes of technicians
-        customer_nodes, dict: nodes of customers
-        technicians, list: technicians in the problem
-        customer_machine_types, list: machine type of each customer order/request        
-    Output
-        cost_edges, list: containing the cost for each edge 
-        edges_index, dict: containing the index in cost_edges (values) for each edge (keys)
-    """
-    # we first want the edges that connect the depot to each customer and each customer to each customer
-    count_0 = 0
-    count_1 = 0    
-    edges_index = {}
-    cost_edges = [[] for i in nodes]
-    for i in x_nodes:
-        count_1 = 0
-        for j in x_nodes:
-            if i!=j:
-                edges_index[(i,j)] = (count_0,count_1)
-                cost_edges[i].append(math.ceil(math.sqrt((x_nodes[i][0] - x_nodes[j][0])**2+(x_nodes[i][1]-x_nodes[j][1])**2)))
-                count_1 +=1
-        count_0 +=1
-        
-    # we now want to connect the technician home locations to each customer where it can install
-    for h in technicians:
-        tech_node = h+len(customer_nodes)+1
-        G_tech_h = tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types)
-        G_tech_h.remove_node(tech_node)
-        count_1 = 0
-        for cust_node in G_tech_h.nodes:
-            edges_index[(tech_node,cust_node)] = (count_0,count_1)
-            edges_index[(cust_node,tech_node)] = (count_0,count_1+1)
-            cost_edges[tech_node].append(math.ceil(math.sqrt((technician_nodes[tech_node][0]-customer_nodes[cust_node][0])**2+(technician_nodes[tech_node][1]-customer_nodes[cust_node][1])**2)))
-            cost_edges[tech_node].append(math.ceil(math.sqrt((customer_nodes[cust_node][0]-technician_nodes[tech_node][0])**2+(customer_nodes[cust_node][1]-technician_nodes[tech_node][1])**2)))
-            count_1 += 2
-        count_0 +=1
-    return cost_edges,edges_index
-###########################################################
-###
-def tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types):
+def get_technician_eligibility(technicians,customers,technician_skill_set,customer_machine_types):
     """
     Purpose,
-        Create a graph that includes the technician node and all the customer location where the technician can install
+        Get the customers where each technician can install, based on the skill set of the technician and the machine type
+        ordered by the customer. This index is built once when reading the file and is reused while building the model
     Input,
-        h, int: technician under consideration
+        technicians, list: technicians in the problem
+        customers, list: customers in the problem
         technician_skill_set, list: the skillset of each technician
-        technician_nodes, dict: nodes of technicians
-        customer_nodes, dict: nodes of customers
         customer_machine_types, list: machine type of each customer order/request
     Output,
-        G_tech_h, networkx DiGraph for technician h
+        eligibility, numpy array: boolean matrix, eligibility[h][c] indicates if technician h can install at customer c (node c+1)
+        tech_customers, list: sorted customer nodes where each technician can install
+        tech_customer_position, list: for each technician the position (values) of each customer node (keys) in tech_customers
     """
-    G_tech_h = nx.DiGraph()
-    G_tech_h.add_nodes_from({key: technician_nodes[key] for key in [len(customer_nodes)+1+h]})
-    
-    customers_to_add = []
-    for i in customer_nodes:
-        if technician_skill_set[h][customer_machine_types[i-1]]:
-            customers_to_add.append(i)
+    skill_set = np.asarray(technician_skill_set,dtype=bool).reshape(len(technicians),-1)
+    eligibility = skill_set[:,np.asarray(customer_machine_types,dtype=int)].reshape(len(technicians),len(customers))
+    tech_customers = [(np.flatnonzero(eligibility[h])+1).tolist() for h in technicians]
+    tech_customer_position = [{j: pos for pos, j in enumerate(tech_customers[h])} for h in technicians]
     
-    G_tech_h.add_nodes_from({key: customer_nodes[key] for key in customers_to_add})
-    
-    return G_tech_h
+    return eligibility,tech_customers,tech_customer_position
 ###########################################################
 ###
 def get_nodes(data,total_requests,total_technicians,locations_index,requests_index,technicians_index):
@@ -346,8 +288,10 @@ def read_file(filename,number_of_trucks):
         technician_nodes, dict: nodes (keys) and coordinates (values) of the technicians
         nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
         x_nodes, dict: nodes (keys) and coordinates (values) related to x variable in the mathematical problem
-        edges_index, dict: containing the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: containing the cost for each edge
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        eligibility, numpy array: boolean matrix, eligibility[h][c] indicates if technician h can install at customer c (node c+1)
+        tech_customers, list: sorted customer nodes where each technician can install
+        tech_customer_position, list: for each technician the position (values) of each customer node (keys) in tech_customers
     """
     data= pd.read_csv(filename, sep=";", header=None)
     
@@ -371,14 +315,34 @@ def read_file(filename,number_of_trucks):
     technicians,technician_max_distance,technician_max_visits,technician_skill_set = get_technician_data(data,total_technicians,technicians_index,total_machines)
     
     depot_node,customer_nodes,technician_nodes,nodes,x_nodes = get_nodes(data,total_requests,total_technicians,locations_index,requests_index,technicians_index)
-    cost_edges,edges_index = get_edges_cost(nodes,x_nodes,technician_skill_set,technician_nodes,customer_nodes,technicians,customer_machine_types) 
+    distance_matrix = get_distance_matrix(nodes)
+    eligibility,tech_customers,tech_customer_position = get_technician_eligibility(technicians,customers,technician_skill_set,customer_machine_types)
     
     data_checks(technicians,customers,machines,technician_nodes,customer_nodes,technician_max_visits,
                technician_max_distance,technician_skill_set,customer_machine_types,customer_order_size,
                start_delivery_window,end_delivery_window,machine_size,machine_penalty,
-                TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,DAYS,edges_index,cost_edges)
+                TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,DAYS,distance_matrix,eligibility)
     
-    return DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,edges_index,cost_edges
+    return DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position
+###########################################################
+###
+def convert_instance_to_csv(instance_file,csv_file):
+    """
+    Purpose
+        Transform a VeRoLog instance (txt file) into the csv file that is read by read_file(), the fields of each line are
+        separated by ";", empty lines are removed and all lines are padded with empty fields to the same number of fields
+    Input
+        instance_file, str: filename of the VeRoLog instance (txt)
+        csv_file, str: filename of the csv file that is created
+    Output
+    """
+    with open(instance_file) as txt_file:
+        rows = [line.split() for line in txt_file if line.strip()]
+    number_of_fields = max(len(row) for row in rows)
+    with open(csv_file,"w",newline="") as out_file:
+        writer = csv.writer(out_file,delimiter=";",lineterminator="\n")
+        for row in rows:
+            writer.writerow(row + [""]*(number_of_fields-len(row)))
 ###########################################################
 ### main
 def main():
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Solve a VeRoLog instance with a rolling horizon: the MILP is built and solved for a window of days, the decisions of
+    the first days of the window are committed and the window moves to the first day that is not committed. A window is
+    the monolithic model of the RunMILPVeRoLogMip file over fewer days and customers:
+        - the customers that are not delivered yet and whose delivery window starts before the last day of the window
+          are delivered from the first day of the window or the start of their delivery window
+        - the customers that were delivered on a committed day (carried) are only installed in the window, their delivery
+          day is fixed data in the penalty cost
+        - before the last window a customer whose delivery window ends after the window can also be delivered later and
+          every customer can be installed later (see add_later_arcs()), at the estimated cost of a round trip
+        - the trucks and technicians that were used on a committed day are fixed as used (no truck or technician cost)
+        - the work streak of each technician at the start of the window is fixed data: the days off after 5 days in a row
+          that fall in the window and the days the technician can still work before the 2 days off
+    The day before the window is the first day of the model (without deliveries), so installations can start on the first
+    day of the window. The size of each MILP depends on the number of days in the window instead of the horizon.
+
+    Example
+        python RollingHorizonVeRoLogMip.py -i VSC2019_ORTEC_Example.csv -o RollingExample -t 2 --window-days 4 --commit-days 2
+"""
+###########################################################
+### imports
+import argparse
+import logging
+import os
+import time
+import mip as mip
+from ReadVeRoLogInstances import read_file #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables, create_customer_expressions, create_cost_functions, add_constraints #from local repository
+from ConstraintMatrixVeRoLogMip import ConstraintFamily, add_constraint_family, update_constraint_list #from local repository
+from InstrumentationVeRoLogMip import RunTrace #from local repository
+from SolverConfigVeRoLogMip import default_solver_config, apply_solver_config, add_solver_arguments, solver_config_from_arguments #from local repository
+from ScheduleVeRoLog import Schedule #from local repository
+from ArcPruningVeRoLogMip import prune_arcs #from local repository
+from DecompositionVeRoLogMip import solution_route #from local repository
+###########################################################
+###
+def work_history(schedule,technicians,first_day):
+    """
+    Purpose
+        Get the work streak of each technician before the first day of a window from the committed schedule
+    Input
+        schedule, Schedule: the committed routes
+        technicians, list: technicians in the problem
+        first_day, int: first day of the window
+    Output
+        rest_days, dict: technician (keys) and the days from first_day on that are days off after 5 days in a row (values)
+        streak, dict: technician (keys) and the number of days in a row (less than 5) worked until first_day (values)
+    """
+    rest_days = {}
+    streak = {}
+    for h in technicians:
+        worked = [h in schedule.tech_routes[t] for t in range(first_day)]
+        rest_days[h] = sorted({day for r in range(4,first_day) if all(worked[r-4:r+1]) for day in (r+1,r+2) if day >= first_day})
+        days = 0
+        while days < first_day and worked[first_day-1-days]:
+            days += 1
+        streak[h] = days if days < 5 else 0
+    return rest_days,streak
+###########################################################
+###
+def work_streak_family(q,technicians,rest_days,streak,first_day,offset):
+    """
+    Purpose
+        Constraints on the technician days q of a window that continue the work streaks of the committed days: no work on
+        the days off and if a technician that worked c days in a row also works the next 5-c days, the 2 days after that
+        are days off
+    Input
+        q, mip.Var: decision variable for calculation of the number of technician days in the window
+        technicians, list: technicians in the problem
+        rest_days, dict: technician (keys) and the days off in the window (values), see work_history()
+        streak, dict: technician (keys) and the number of days in a row worked until the window (values)
+        first_day, int: first day of the window
+        offset, int: day of the horizon of the first day of the model (the index t of q is day offset+t+1)
+    Output
+        family, ConstraintFamily: the constraints
+    """
+    rows,cols,vals,rhs = [],[],[],[]
+    index = lambda day: day-offset-1
+    for h in technicians:
+        for day in rest_days[h]:
+            if index(day) < len(q):
+                rows.append(len(rhs)); cols.append(q[index(day)][h].idx); vals.append(1); rhs.append(0)
+        if streak[h] == 0:
+            continue
+        days = 5 - streak[h]
+        for day_off in (first_day+days,first_day+days+1):
+            if index(day_off) < len(q):
+                work = [q[index(first_day+i)][h].idx for i in range(days)] + [q[index(day_off)][h].idx]
+                rows += [len(rhs)]*len(work); cols += work; vals += [1]*len(work); rhs.append(days)
+    return ConstraintFamily("work_streak",None,rows,cols,vals,mip.LESS_OR_EQUAL,rhs)
+###########################################################
+###
+def add_later_arcs(opt_model,arcs,WINDOW_DAYS,costs):
+    """
+    Purpose
+        Allow customers to be delivered or installed after the window: an arc into the customer (for truck or technician -1
+        from the depot) is added to x or y with day index WINDOW_DAYS-1, which is after the last delivery (x) or
+        installation (y) day of the model. The arc is in the customer constraints (delivered and installed once, within the
+        delivery window and at least one day after delivery, so a customer that is delivered later is also installed later)
+        but not in the daily constraints of the trucks and technicians
+    Input
+        opt_model, mip.model: model of the window
+        arcs, ArcVariables: decision variable x or y
+        WINDOW_DAYS, int: number of days in the model of the window
+        costs, dict: customer node (keys) that can be delivered or installed later and the estimated cost of doing so (values)
+    Output
+        later, dict: customer node (keys) and the variable that is 1 if the customer is delivered or installed later (values)
+        c_later, mip.entities.LinExpr: estimated cost of the deliveries or installations after the window
+    """
+    later = {}
+    for j in sorted(costs):
+        later[j] = opt_model.add_var(name="{0}_later_{1}".format(arcs.name,j),var_type=mip.BINARY)
+        arcs.add(WINDOW_DAYS-1,-1,0,j,later[j])
+    c_later = mip.xsum(costs[j]*later[j] for j in later)
+    return later,c_later
+###########################################################
+###
+def run_rolling_horizon(input_file_name,output_file_name,number_of_trucks,max_run_time,solver_config=None,window_days=7,commit_days=3,window_seconds=None):
+    """
+    Purpose
+        Read an instance, solve the MILP for a rolling window of days and write the solution file of the committed schedule
+    Input
+        input_file_name, str: filename of the VeRoLog instance in csv form
+        output_file_name, str: filename of the solution file (without the txt extension)
+        number_of_trucks, int: total number of available trucks in optimization problem
+        max_run_time, float: time limit of all windows in seconds
+        solver_config, dict: solver settings of the windows (see the SolverConfigVeRoLogMip file, None for the default
+            settings), the cutoff is not used because the objective of a window is not the total cost
+        window_days, int: number of days in a window
+        commit_days, int: number of days that are committed after solving a window (the last window commits all days)
+        window_seconds, float: time limit of the optimization of each window (None for the time that is left)
+    Output
+        summary, dict: status, total cost, solution file, number of windows and wall time of the run
+    """
+    start = time.time()
+    name = os.path.splitext(os.path.basename(input_file_name))[0]
+    if solver_config is None:
+        solver_config = default_solver_config()
+    if not 1 <= commit_days <= window_days:
+        raise ValueError("The number of committed days must be between 1 and the number of days in a window")
+    window_config = dict(solver_config,cutoff=None)
+    trace = RunTrace(name,{"input_file_name": input_file_name,"number_of_trucks": number_of_trucks,"max_run_time": max_run_time,"solver_config": solver_config,
+                           "mode": "rolling_horizon","window_days": window_days,"commit_days": commit_days})
+    trace_file_name = output_file_name+'_trace.json'
+    DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position = read_file(input_file_name,number_of_trucks)
+    print("Finished reading data at",time.time()-start)
+    trace.lap("read",input_file_name,days=DAYS,customers=len(customer_nodes),technicians=len(technicians),trucks=len(trucks))
+    #arcs that can never be part of a feasible route are not created
+    truck_arcs,tech_arcs = prune_arcs(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,customer_order_size,machine_size,customer_machine_types,start_delivery_window,end_delivery_window,
+                                      technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,trace)
+
+    home = {h: len(customer_nodes)+1+h for h in technicians}
+    schedule = Schedule(DAYS)
+    delivered = {} #customer node (keys) and committed day of delivery (values)
+    installed = set()
+    first_day = 0
+    windows = 0
+    solved = True
+    while first_day < DAYS:
+        #the model starts the day before the window, the last day of the window is the last installation day
+        last_day = min(first_day+window_days-1,DAYS-1)
+        offset = max(first_day-1,0)
+        WINDOW_DAYS = last_day - offset + 1
+        commit_day = last_day if last_day == DAYS-1 else first_day+commit_days-1
+        carried = {j for j in delivered if j not in installed}
+        new = {j for j in customer_nodes if j not in delivered and start_delivery_window[j-1] <= last_day-1}
+        if not new and not carried:
+            first_day = commit_day + 1
+            continue
+        windows += 1
+        #the data of the window in the days of the model, a carried customer can be installed on every day of the window
+        window_start = [0 if j in carried else max(start_delivery_window[j-1],first_day)-offset for j in customer_nodes]
+        window_end = [max(end_delivery_window[j-1]-offset,0) for j in customer_nodes]
+        window_x_nodes = {i: coordinates for i,coordinates in x_nodes.items() if i == 0 or i in new}
+        window_tech_customers = [[j for j in tech_customers[h] if j in new or j in carried] for h in technicians]
+        window_tech_customer_position = [{j: pos for pos,j in enumerate(window_tech_customers[h])} for h in technicians]
+        opt_model = mip.Model(name="{0}_window_{1}".format(name,first_day),solver_name=mip.CBC)
+        x,y,w,u,v,p,q,z,l = create_decisions_variables(opt_model,WINDOW_DAYS,technicians,trucks,window_x_nodes,window_tech_customers,nodes,technician_nodes,customer_nodes,start,trace,
+                                                       start_delivery_window=window_start,end_delivery_window=window_end,truck_arcs=truck_arcs,tech_arcs=tech_arcs)
+        delivery_day,installation_day = create_customer_expressions(x,y,WINDOW_DAYS,technicians,trucks,customer_nodes,start,trace)
+        for j in carried:
+            delivery_day[j] = delivered[j] - offset
+        #delivery after the window is on the last day of the model, installation after the window on the day after
+        c_later = 0
+        skip = set()
+        if last_day < DAYS-1:
+            truck_costs = {j: TRUCK_DISTANCE_COST*2*int(distance_matrix[0][j]) for j in new if end_delivery_window[j-1] > last_day-1}
+            later_delivery,c_later_delivery = add_later_arcs(opt_model,x,WINDOW_DAYS,truck_costs)
+            tech_costs = {j: TECHNICIAN_DISTANCE_COST*min([2*int(distance_matrix[home[h]][j]) for h in technicians if j in window_tech_customers[h]] + [0]) for j in new|carried}
+            later_installation,c_later_installation = add_later_arcs(opt_model,y,WINDOW_DAYS,tech_costs)
+            for j in later_delivery:
+                delivery_day[j] += (WINDOW_DAYS-1)*later_delivery[j]
+            for j in later_installation:
+                installation_day[j] += WINDOW_DAYS*later_installation[j]
+            c_later = c_later_delivery + c_later_installation
+            skip.add(("end_installation_window",None))
+        costs = create_cost_functions(x,y,u,v,p,q,WINDOW_DAYS,technicians,trucks,distance_matrix,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,
+                                      TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,customer_nodes,customer_machine_types,delivery_day,installation_day,start,trace)
+        for k in {k for t in range(first_day) for k in schedule.truck_routes[t]}:
+            u[k].lb = 1.0
+        for h in {h for t in range(first_day) for h in schedule.tech_routes[t]}:
+            p[h].lb = 1.0
+        opt_model.objective = mip.minimize(mip.xsum(costs) + c_later)
+        apply_solver_config(opt_model,window_config)
+        add_constraints(opt_model,x,y,w,u,v,p,q,z,l,WINDOW_DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,window_start,window_end,
+                        technician_max_visits,technician_max_distance,window_tech_customers,window_tech_customer_position,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,
+                        technician_nodes,nodes,window_x_nodes,distance_matrix,LARGE_NUMBER,start,trace=trace,skip=skip,delivery_customers=new,installation_customers=new|carried)
+        rest_days,streak = work_history(schedule,technicians,first_day)
+        add_constraint_family(opt_model,work_streak_family(q,technicians,rest_days,streak,first_day,offset))
+        update_constraint_list(opt_model)
+        print("Finished building the model of days {0} until {1} ({2} new and {3} carried customers) at".format(first_day,last_day,len(new),len(carried)),time.time()-start)
+
+        time_left = max_run_time - (time.time()-start)
+        with trace.phase("solve","window",first_day,columns=opt_model.num_cols,rows=opt_model.num_rows,nonzeros=opt_model.num_nz) as record:
+            status = opt_model.optimize(max_seconds=time_left if window_seconds is None else min(window_seconds,time_left))
+            record.update(status=status.name,solutions=opt_model.num_solutions,objective_value=opt_model.objective_value,objective_bound=opt_model.objective_bound)
+        logging.info("Window of days {0} until {1}: {2}, objective value {3}".format(first_day,last_day,status.name,opt_model.objective_value))
+        if time_left <= 0 or opt_model.num_solutions == 0:
+            print("No solution found for the window of days {0} until {1}".format(first_day,last_day))
+            solved = False
+            break
+        #commit the routes of the first days of the window
+        for t in range(WINDOW_DAYS-1):
+            if first_day <= offset+t <= commit_day:
+                for k in trucks:
+                    route = solution_route(x.arcs(t,k),0)
+                    if route:
+                        schedule.truck_routes[offset+t][k] = route
+                        delivered.update({j: offset+t for j in route if j != 0})
+            #the index t of y is day t+1
+            if first_day <= offset+t+1 <= commit_day:
+                for h in technicians:
+                    route = [j for j in solution_route(y.arcs(t,h),home[h]) if j != home[h]]
+                    if route:
+                        schedule.tech_routes[offset+t+1][h] = route
+                        installed.update(route)
+        print("Committed days {0} until {1}, {2} customers delivered and {3} installed at".format(first_day,commit_day,len(delivered),len(installed)),time.time()-start)
+        first_day = commit_day + 1
+
+    status = "NO_SOLUTION_FOUND"
+    cost = None
+    if solved and len(installed) == len(customer_nodes):
+        status = "FEASIBLE"
+        cost = schedule.calculate_cost(technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,distance_matrix,
+                                       TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+        with trace.phase("solution_file",output_file_name):
+            schedule.write_solution_file(output_file_name,name+".txt",cost)
+        print("Created a solution file with total cost {0} at".format(cost["TOTAL_COST"]),time.time()-start)
+    else:
+        print('No feasible solution was found')
+    trace.write_json(trace_file_name)
+    print("Wrote the trace of the run to",trace_file_name)
+    return {"instance": input_file_name,"status": status,"objective_value": None if cost is None else cost["TOTAL_COST"],"objective_bound": None,
+            "solution_file": output_file_name+".txt" if cost is not None else None,"windows": windows,"solver_config": solver_config,"wall": time.time()-start}
+###########################################################
+### main
+def main():
+    parser = argparse.ArgumentParser(description="Solve a VeRoLog instance with the MILP over a rolling window of days")
+    parser.add_argument("--input","-i",dest="input_file_name",default="VSC2019_ORTEC_Small_04.csv",help="VeRoLog instance in csv form")
+    parser.add_argument("--output","-o",dest="output_file_name",default="RollingInstance_Small_04",help="solution file (without the txt extension)")
+    parser.add_argument("--trucks","-t",dest="number_of_trucks",type=int,default=2,help="number of trucks")
+    parser.add_argument("--max-seconds","-s",dest="max_run_time",type=float,default=60*60,help="time limit of all windows in seconds")
+    parser.add_argument("--window-days",type=int,default=7,help="number of days in a window")
+    parser.add_argument("--commit-days",type=int,default=3,help="number of days that are committed after solving a window")
+    parser.add_argument("--window-seconds",type=float,help="time limit of the optimization of each window in seconds (default: the time that is left)")
+    add_solver_arguments(parser)
+    args = parser.parse_args()
+    solver_config = solver_config_from_arguments(args)
+    logging.basicConfig(filename=os.path.splitext(args.input_file_name)[0]+'_logs', level=logging.INFO,format='%(asctime)s:%(levelname)s:%(message)s')
+    logging.info("Solver settings: {0}".format(solver_config))
+    summary = run_rolling_horizon(args.input_file_name,args.output_file_name,args.number_of_trucks,args.max_run_time,solver_config,args.window_days,args.commit_days,args.window_seconds)
+    instance_file_name = os.path.splitext(args.input_file_name)[0] + '.txt'
+    if summary["solution_file"] is not None and os.path.exists(instance_file_name):
+        from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+        from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+        solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(instance_file_name))
+        if solution.isValid():
+            print("The solution is valid, cost:",solution.calcCost.Cost)
+        else:
+            print("The solution is not valid:\n\t" + "\n\t".join(solution.errorReport))
+            logging.error("Invalid rolling horizon solution: " + "; ".join(solution.errorReport))
+    return
+
+if __name__ == '__main__':
+    main()
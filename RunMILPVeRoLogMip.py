@@ -9,93 +9,74 @@ Purpose
 """
 ###########################################################
 ### imports
+import argparse
 import logging
 import math as math
-import networkx as nx
+import os
 import numpy as np
 import pandas as pd
 import time
 import mip as mip
 from ReadVeRoLogInstances import * #from local repository
 from WriteSolutionVeRoLogMip import * #from local repository
+from VariableRegistryVeRoLogMip import ArcVariables #from local repository
+from ModelWriterVeRoLogMip import write_model_stream, solve_with_cbc, read_cbc_solution, cbc_solution_found #from local repository
+from InstrumentationVeRoLogMip import RunTrace #from local repository
+from SolverConfigVeRoLogMip import default_solver_config, apply_solver_config, cbc_arguments, add_solver_arguments, solver_config_from_arguments #from local repository
+from CheckpointVeRoLogMip import ModelCheckpoint, model_fingerprint #from local repository
+from ConstraintMatrixVeRoLogMip import ColumnIndex, constraint_families, add_constraint_family, update_constraint_list #from local repository
+from WarmStartVeRoLogMip import start_schedule, schedule_to_values, StartCheck, start_objective_value, set_start #from local repository
+from ArcPruningVeRoLogMip import service_days, prune_arcs #from local repository
+from SymmetryVeRoLogMip import technician_classes, canonical_schedule #from local repository
+from FleetSizingVeRoLogMip import truck_count, fleet_size #from local repository
 ###########################################################
 ### 
-def get_y_for_nodes(y,t,h,outgoing_node,incoming_node):
+def create_customer_expressions(x,y,DAYS,technicians,trucks,customer_nodes,start,trace=None):
     """
     Purpose
-        Get the y variable given the incoming and outgoing node
+        Create the delivery and installation day expressions of each customer exactly once, the expressions are used in
+        the penalty cost of the objective function
     Input
-        y, list, containing all the mip variables for y in the problem
-        t, int: the index of the day
-        h, int: technician under consideration
-        outgoing_node, int: node in graph which is move out from
-        incoming_node, int: node in graph which is entered
-    Output
-        y_var
-    """
-    for i in range(len(y[t][h])):
-        for j in range(len(y[t][h][i])):
-            if int(y[t][h][i][j].name.split("_")[3]) == outgoing_node and int(y[t][h][i][j].name.split("_")[4]) == incoming_node:
-                y_var = y[t][h][i][j]
-                return y_var
-###########################################################
-### 
-def ordersize_tkj(x,t,k,j,x_nodes,customer_order_size,machine_size,customer_machine_types):
-    """
-    Purpose: 
-        Returns the expression which is used to calculate the ordersize for customer j on day t in truck k,
-        based on binary variable x 
-    Input:
-        x, mip.Var: decision variable that indicates if on day t, truck k, drives from node i to j
-        t, int: day on which the ordersize is calculated
-        k, int: truck for which the ordersize is calculated
-        j, int: customer_node for which the ordersize is calculated
-        customer_order_size, list: order size of each customer
-        machine_size, list: machine size of each machine type
-        customer_machine_types, list: type of machine the customer ordered
-        x_nodes, dict: with the nodes used to the x variable
-    Output:
-        ordersize_tkj, mip.entities.LinExpr: linear expression which is used to calculate the ordersize 
-    """
-    ordersize_j = customer_order_size[j-1] * machine_size[customer_machine_types[j-1]]
-    ordersize_tkj = ordersize_j * (mip.xsum(x[t][k][n][j-1] for n in x_nodes if n<j) + mip.xsum(x[t][k][n][j] for n in x_nodes if n>j)) 
-    return  ordersize_tkj
-###########################################################
-### 
-def cust_tech_variables(y,h,selected_customer,t,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types):
-    """
-    Purpose
-        Create a linear expression of all the nodes that go out of a selected customer on a day for a technician
-    Input
-        y, mip.Var: decision variable that indicates if on day t, technician h, drives from node i to j     
-        h, int: technician under consideration
-        selected_customer, int: customer node under consideration
-        t, int: the index of the day
-        technician_skill_set, list: the skillset of each technician
-        technician_nodes, dict: nodes of technicians
-        customer_nodes, dict: nodes of customers
-        customer_machine_types, list: machine type of each customer order/request 
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        trucks, list: trucks in the problem
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        start, float: start time of algorithm
+        trace, RunTrace: the time of creating the expressions is recorded in the trace (None for no trace)
     Output
-        cust_expr, mip.entities.LinExpr: linear expression that sums all nodes that leave the customer node
+        delivery_day, dict: customer node (keys) and the expression of the index of the delivery day (values)
+        installation_day, dict: customer node (keys) and the expression of the index of the installation day (values)
     """
-    g_tech = tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types)
-    if selected_customer in g_tech.nodes:
-#        print(h,selected_customer,t,g_tech.nodes)
-        cust_expr = mip.xsum(y[t][h][tech_node][i] for tech_node in range(len(g_tech.nodes)) for i in range(len(
-                        y[t][h][tech_node])) if int(y[t][h][tech_node][i].name.split('_')[3]) == selected_customer)
-    else:
-        cust_expr = mip.xsum(i for i in range(2) if 1 == 0) #return empty sum
-    return cust_expr
+    if trace is None:
+        trace = RunTrace(None)
+    trace.mark()
+    delivered_terms = {j: [] for j in customer_nodes}
+    installed_terms = {j: [] for j in customer_nodes}
+    for t in range(DAYS-1):
+        for k in trucks:
+            for j in customer_nodes:
+                delivered_terms[j] += [(t,var) for i,var in x.arcs_in(t,k,j)]
+        for h in technicians:
+            for j in customer_nodes:
+                installed_terms[j] += [(t+1,var) for i,var in y.arcs_in(t,h,j)] #the index t of y is day t+1
+    delivery_day = {j: mip.xsum(t*var for t,var in delivered_terms[j]) for j in customer_nodes}
+    installation_day = {j: mip.xsum(t*var for t,var in installed_terms[j]) for j in customer_nodes}
+    print("Finished customer delivery and installation expressions at", time.time()-start)
+    trace.lap("expressions","customer",terms=sum(len(delivery_day[j].expr) + len(installation_day[j].expr) for j in customer_nodes))
+    return delivery_day,installation_day
 ###########################################################
 ### 
-def add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,edges_index,cost_edges,LARGE_NUMBER,start):
+def add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,tech_customers,tech_customer_position,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,LARGE_NUMBER,start,checkpoint=None,trace=None,start_check=None,skip=frozenset(),delivery_customers=None,installation_customers=None,technician_classes=None,compact_linking=False,order_volume=None):
     """
     Purpose
-        Add constraints to the optimization model
+        Add constraints to the optimization model, each constraint family is built as a sparse matrix and its rows are
+        streamed into the solver (see the ConstraintMatrixVeRoLogMip file)
     Input
         opt_model, mip.model: model we are optimizing    
-        x, mip.Var: decision variable that indicates if on day t, truck k, drives from node i to j
-        y, mip.Var: decision variable that indicates if on day t, technician h, drives from node i to j
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
         w, mip.Var: decision variable indicating if on day t technician h has worked for 5 days in a row
         u, mip.Var: decision variable for calculation of the number of trucks used in the problem
         v, mip.Var: decision variable for calculation of the number of truck days in the problem
@@ -115,7 +96,8 @@ def add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines
         end_delivery_window, list: end of the delivery window for each customer
         technician_max_visits, list: maximum number of customers each technician can visit daily
         technician_max_distance, list: maximum distance each technician can drive daily
-        technician_skill_set, list: skill set dummy that indicates if a technician can install a machine
+        tech_customers, list: sorted customer nodes where each technician can install
+        tech_customer_position, list: for each technician the position (values) of each customer node (keys) in tech_customers
         TRUCK_MAX_DISTANCE, int: truck maximum distance
         TRUCK_CAPACITY, int: truck capacity        
         depot_node, dict: node (key) and coordinates (value) of the depot
@@ -123,164 +105,77 @@ def add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines
         technician_nodes, dict: nodes (keys) and coordinates (values) of the technicians
         nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
         x_nodes, dict: nodes (keys) and coordinates (values) related to x variable in the mathematical problem
-        edges_index, dict: containing the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: containing the cost for each edge       
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
         LARGE_NUMBER, int: large number used in one of the constraints (set to 1000)
         start, float: start time of algorithm
+        checkpoint, ModelCheckpoint: every constraint family is appended to the checkpoint, the families that are already in
+            the checkpoint are loaded from it instead of being built (None for no checkpoint)
+        trace, RunTrace: the time, rows and nonzeros of each constraint family are recorded in the trace (None for no trace)
+        start_check, StartCheck: every constraint family is checked for the values of the start solution (None for no start)
+        skip, set: (name,day) of the constraint families that are not added (for example the families of the other stage
+            in the DecompositionVeRoLogMip file)
+        delivery_customers, set: customer nodes that are delivered in the model (None for all customers)
+        installation_customers, set: customer nodes that are installed in the model (None for all customers)
+        technician_classes, list: the classes of equivalent technicians to add the symmetry breaking constraints (see the
+            SymmetryVeRoLogMip file, None for no symmetry breaking constraints)
+        compact_linking, bool: link v and q to the arcs entering each customer and u and p to v and q (see
+            compact_linking_families() in the ConstraintMatrixVeRoLogMip file) instead of linking u, v, p and q to every arc
+        order_volume, numpy array: volume of the order of each customer (None to calculate it from the data)
     Output
         opt_model, mip.model: model we are optimizing
     """
-    #Decision variables used for calculation 
-    for t in range(DAYS-1):
-        for k in trucks:
-            for i in range(len(x[t][k])):
-                for j in range(len(x[t][k][i])):
-                    #u
-                    opt_model += u[k] - x[t][k][i][j] >= 0
-                    #v
-                    opt_model += v[t][k] - x[t][k][i][j] >= 0
-        for h in technicians:
-            for i in range(len(y[t][h])):
-                for j in range(len(y[t][h][i])):
-                    #p
-                    opt_model += p[h] - y[t][h][i][j] >= 0    
-                    #q
-                    opt_model += q[t][h] - y[t][h][i][j] >= 0                        
-    print("Finished decision variables used for calculation constraints at",time.time()-start)                    
-    for t in range(DAYS-1):
-        #truck distance
-        for k in trucks:
-             opt_model += (mip.xsum(x[t][k][i][j] * calc_edge_cost(x,t,k,i,j,edges_index,cost_edges) 
-                            for i in range(len(x[t][k])) for j in range(len(x[t][k][i])))) <= TRUCK_MAX_DISTANCE, "truck_dist"    
-        for h in technicians:
-             #technician distance
-             opt_model += (mip.xsum(y[t][h][i][j] * calc_edge_cost(y,t,h,i,j,edges_index,cost_edges) 
-                            for i in range(len(y[t][h])) for j in range(len(y[t][h][i])))) <= technician_max_distance[h], "tech_dist"    
-             #technician visits
-             opt_model += (mip.xsum(y[t][h][i][j] for i in range(len(y[t][h])) for j in range(len(y[t][h][i]))
-                    if int(y[t][h][i][j].name.split("_")[4]) in customer_nodes)) <=technician_max_visits[h], "tech_visit"     
-    print("Finished truck distance,technician distance and technician visits constraints at",time.time()-start) 
-    #customer delivery (trucks)    
-    for j in customer_nodes:     
-        opt_model += (mip.xsum(x[t][k][i][j-1] for t in range(DAYS-1) for k in trucks for i in x_nodes if i<j) + mip.xsum(x[t][k][i][j] for t in range(DAYS-1) for k in trucks for i in x_nodes if i>j)) == 1 , "cust_delivery"
-    print("Finished customer delivery trucks at",time.time()-start)
-    #customer delivery (technicians)
-    for j in customer_nodes:
-        opt_model += mip.xsum(y[t][h][i][n] for t in range(DAYS-1) for h in technicians for i in range(len(y[t][h])) for n in range(len(y[t][h][i])) if int(y[t][h][i][n].name.split('_')[4]) == j) == 1, "tech_delivery"    
-    print("Finished customer delivery technicians at",time.time()-start)
-    #start delivery window
-    for j in customer_nodes:
-        opt_model += start_delivery_window[j-1] * (mip.xsum(x[t][k][i][j-1] for t in range(DAYS-1) for k in trucks for i in x_nodes if i<j) + mip.xsum(x[t][k][i][j] for t in range(DAYS-1) for k in trucks for i in x_nodes if i>j)) - (mip.xsum(t*x[t][k][i][j-1] for t in range(DAYS-1) for k in trucks for i in x_nodes if i<j) + mip.xsum(t*x[t][k][i][j] for t in range(DAYS-1) for k in trucks for i in x_nodes if i>j)) <= 0, "start_delivery_window"             
-    print("Finished start delivery window at",time.time()-start)
-    #end delivery window
-    for j in customer_nodes:
-        opt_model += (mip.xsum(t*x[t][k][i][j-1] for t in range(DAYS-1) for k in trucks for i in x_nodes if i<j) + mip.xsum(t*x[t][k][i][j] for t in range(DAYS-1) for k in trucks for i in x_nodes if i>j)) - end_delivery_window[j-1] <= 0, "end_delivery_window"    
-    print("Finished end delivery window at",time.time()-start)
-    #start installation window
-    for j in customer_nodes:
-        opt_model += ((mip.xsum(t*x[t][k][i][j-1] for t in range(DAYS-1) for k in trucks for i in x_nodes if i<j) + mip.xsum(t*x[t][k][i][j] for t in range(DAYS-1) for k in trucks for i in x_nodes if i>j)) - (mip.xsum((t+1)*tech_cust_variables(y,h,j,t,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types) for t in range(DAYS-1) for h in technicians)) + 1) <= 0, "start_installation_window"
-    print("Finished start installation window at",time.time()-start)
-    for j in customer_nodes:
-        opt_model += (mip.xsum((t+1)*tech_cust_variables(y,h,j,t,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types) for t in range(DAYS-1) for h in technicians)) - (DAYS-1) <= 0, "end_installation_window"    
-    print("Finished end installation window at",time.time()-start)
-    for t in range(DAYS-1):
-        #node enter leave x
-        for k in trucks:
-            for n in x_nodes:
-                opt_model += ((mip.xsum(x[t][k][i][n-1] for i in x_nodes if i<n) + mip.xsum(x[t][k][i][n] for i in x_nodes if i>n)) - 
-                (mip.xsum(x[t][k][n][j-1]  for j in x_nodes  if n<j) + mip.xsum(x[t][k][n][j]  for j in x_nodes  if n>j))) == 0, 'node_ent_leave_x'  
-        logging.info("Finished node enter and leave x constraints for day {0} at ".format(t) + str(time.time()-start) )
-        #node enter leave y
-        for h in technicians:
-                for n in range(len(y[t][h])):
-                    node_n = int(y[t][h][n][0].name.split("_")[3])
-                    n_in = (mip.xsum(y[t][h][i][j] for i in range(len(y[t][h])) for j in range(len(y[t][h][i])) if int(y[t][h][i][j].name.split('_')[4]) == node_n))
-                    n_out = mip.xsum(y[t][h][n][j] for j in range(len(y[t][h][n])))
-                    opt_model += n_in - n_out == 0, "node_ent_leave_tech"    
-        logging.info("Finished node enter and leave y constraints for day {0} at ".format(t) + str(time.time()-start) )
-    print("Finished node enter and leave constraints at",time.time()-start)
-    #truck capacity
-    for t in range(DAYS-1):
-        for k in trucks:
-            for j in customer_nodes:
-                opt_model += ordersize_tkj(x,t,k,j,x_nodes,customer_order_size,machine_size
-                                           ,customer_machine_types) - z[t][k][j-1] <= 0, "truck_capacity_lower"
-                opt_model += z[t][k][j-1] <= TRUCK_CAPACITY, "truck_capacity_upper"  
-    print("Finished truck capacity constraints at",time.time()-start)            
-    #cumulative load calculation
-    for t in range(DAYS-1):
-        for k in trucks:                 
-            for i in range(len(x[t][k])):
-                for j in range(len(x[t][k][i])):
-                    var_name = x[t][k][i][j].name
-                    var_name_split = var_name.split("_")
-                    outgoing_node = int(var_name_split[3])
-                    incoming_node = int(var_name_split[4])
-                    if (outgoing_node != 0) and (incoming_node != 0) and (outgoing_node != incoming_node):
-                        opt_model += z[t][k][incoming_node-1] - z[t][k][outgoing_node-1] - ordersize_tkj(x,t,k,incoming_node,x_nodes
-                                        ,customer_order_size,machine_size,
-                                        customer_machine_types) + TRUCK_CAPACITY * (1 - x[t][k][i][j]) >= 0, "cumulative_load"                
-        logging.info("Finished cumulative truckload calculation for day {0} at ".format(t) + str(time.time()-start) )
-        #save the model in case the memory runs out
-        try:
-            opt_model.write(opt_model.name+".lp")
-        except:
-            logging.warning("Failed (over)writing the lp model for cumulative truckload calculation for day {0}".format(t))
-    print("Finished cumulative truck load constraints at ",time.time()-start)
-    #technician capacity
-    for t in range(DAYS-1):    
-        for h in technicians:
-            G_tech_h = tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types)
-            count = 0
-            for j in G_tech_h.nodes:
-                if j != len(nodes) - len(technician_nodes) + h: #exclude the technician home
-                    opt_model += tech_cust_variables(y,h,j,t,technician_skill_set,technician_nodes,
-                                              customer_nodes,customer_machine_types) - l[t][h][count] <= 0, "tech_capacity_lower"
-                    count+=1
-            for j in range(len(l[t][h])):
-                opt_model += l[t][h][j] - technician_max_visits[h] <= 0 , "tech_capacity_upper"
-    print("Finished technician capacity constraints at",time.time()-start)
-    #technician cumulative load calculation
-    for t in range(DAYS-1):
-        for h in technicians:
-            for i in range(len(l[t][h])):
-                for j in range(len(l[t][h])):
-                    outgoing_node = int(l[t][h][i].name.split("_")[3])
-                    incoming_node = int(l[t][h][j].name.split("_")[3])
-                    if outgoing_node != incoming_node:
-                        opt_model += l[t][h][j] - l[t][h][i] - tech_cust_variables(y,h,incoming_node,t,technician_skill_set,
-                                technician_nodes,customer_nodes,customer_machine_types) + technician_max_visits[h] * (1 - get_y_for_nodes(y,
-                                t,h,outgoing_node,incoming_node)) >= 0, "tech_cumulative_load"    
-        
-            logging.info("Finished cumulative technician load constraint for technician {0} on day {1} at ".format(h,t)+str(time.time()-start))
-        logging.info("Finished cumulative technician load calculation for day {0} at ".format(t) + str(time.time()-start))
-        #save the model in case the memory runs out
-        try:
-            opt_model.write(opt_model.name+".lp")
-        except:
-            logging.warning("Failed (over)writing the lp model for cumulative technician load calculation for day {0}".format(t))
-    print("Finished cumulative technician load constraints at",time.time()-start)         
-    #consecutive working days technicians
-    if DAYS > 6:
-        for t in range(0,DAYS-6):
-            for h in technicians:
-                opt_model += 4 + w[t][h] - mip.xsum(q[i][h] for i in range(t,t+5)) >= 0, "set_w_to_1"   
-                opt_model += 5*w[t][h] - mip.xsum(q[i][h] for i in range(t,t+5)) <= 0, "set_w_to_0"
-                opt_model += w[t][h] - LARGE_NUMBER*(w[t][h]-1) - (q[t+5][h]+1) >= 0, "consecutive_days_t"                
-        for t in range(0,DAYS-6-1):
-            for h in technicians:
-                opt_model += w[t][h] - LARGE_NUMBER*(w[t][h]-1) - (q[t+6][h]+1) >= 0, "consecutive_days_t+1" 
-    print("Finished consecutive working days constraints at",time.time()-start)         
+    if trace is None:
+        trace = RunTrace(None)
+    trace.mark()
+    done = set(skip)
+    if checkpoint is not None:
+        for family in checkpoint.families():
+            add_constraint_family(opt_model,family)
+            done.add((family.name,family.day))
+            if start_check is not None:
+                start_check.check(family)
+        trace.lap("checkpoint","load",families=len(done)-len(skip))
+        print("Finished loading {0} constraint families from the checkpoint at".format(len(done)-len(skip)),time.time()-start)
+    columns = ColumnIndex(x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,tech_customers,nodes)
+    if order_volume is None:
+        order_volume = np.array([customer_order_size[j-1] * machine_size[customer_machine_types[j-1]] for j in customer_nodes],dtype=np.float64)
+    families = constraint_families(columns,DAYS,technicians,trucks,customer_nodes,order_volume,start_delivery_window,end_delivery_window,
+                                   technician_max_visits,technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,LARGE_NUMBER,done,
+                                   delivery_customers,installation_customers,technician_classes,compact_linking)
+    previous_name = None
+    trace.mark()
+    for family in families:
+        build_wall,build_cpu = trace.split()
+        if previous_name is not None and family.name != previous_name:
+            print("Finished {0} constraints at".format(previous_name),time.time()-start)
+        add_constraint_family(opt_model,family)
+        if start_check is not None:
+            start_check.check(family)
+        load_wall,load_cpu = trace.split()
+        logging.info("Finished {0} constraints for day {1} ({2} rows, {3} nonzeros) at ".format(family.name,family.day,family.num_rows,family.num_nz) + str(time.time()-start))
+        if checkpoint is not None:
+            #save the new rows in case the memory runs out
+            try:
+                checkpoint.append(family)
+            except (IOError,OSError):
+                logging.warning("Failed appending {0} on day {1} to the checkpoint".format(family.name,family.day))
+        checkpoint_wall,checkpoint_cpu = trace.split()
+        trace.add("constraints",family.name,family.day,build_wall+load_wall+checkpoint_wall,build_cpu+load_cpu+checkpoint_cpu,
+                  rows=family.num_rows,nonzeros=family.num_nz,build_wall=build_wall,load_wall=load_wall,checkpoint_wall=checkpoint_wall)
+        previous_name = family.name
+    if previous_name is not None:
+        print("Finished {0} constraints at".format(previous_name),time.time()-start)
+    update_constraint_list(opt_model)
     return opt_model
 ###########################################################
 ### 
-def create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,edges_index,cost_edges,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,technician_skill_set,technician_nodes,customer_nodes,x_nodes,customer_machine_types,start):
+def create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,distance_matrix,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,customer_nodes,customer_machine_types,delivery_day,installation_day,start,trace=None):
     """
     Purpose
         Create the cost components of the objective function
     Input
-        x, mip.Var: decision variable that indicates if on day t, truck k, drives from node i to j
-        y, mip.Var: decision variable that indicates if on day t, technician h, drives from node i to j
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
         u, mip.Var: decision variable for calculation of the number of trucks used in the problem
         v, mip.Var: decision variable for calculation of the number of truck days in the problem
         p, mip.Var: decision variable for calculation of the number of technicians used in the problem
@@ -288,8 +183,7 @@ def create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,edges_index,cost_e
         DAYS, int: number of days in the horizon        
         technicians, list: technicians in the problem        
         trucks, list: trucks in the problem
-        edges_index, dict: indicating the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: indicating the cost for each edge
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
         TRUCK_DISTANCE_COST, int: truck distance cost
         TRUCK_DAY_COST, int: truck day cost
         TRUCK_COST, int: truck cost
@@ -298,12 +192,12 @@ def create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,edges_index,cost_e
         TECHNICIAN_COST, int: technician cost
         machine_penalty, list: daily penalty for idle machines (delivered but not yet installed)
         customer_order_size, list: size of each customer order/request 
-        technician_skill_set, list: the skillset of each technician
-        technician_nodes, dict: nodes of technicians
         customer_nodes, dict: nodes of customers
-        x_nodes, dict: nodes (keys) and coordinates (values) related to x variable in the mathematical problem
         customer_machine_types, list: machine type of each customer order/request     
+        delivery_day, dict: customer node (keys) and the expression of the index of the delivery day (values)
+        installation_day, dict: customer node (keys) and the expression of the index of the installation day (values)
         start, float: start time of algorithm
+        trace, RunTrace: the time and number of terms of each cost component are recorded in the trace (None for no trace)
     Output
         c_truck_distance, mip.entities.LinExpr: total truck distance cost
         c_truck, mip.entities.LinExpr: total truck cost
@@ -313,75 +207,51 @@ def create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,edges_index,cost_e
         c_tech_day, mip.entities.LinExpr: total technician day cost
         c_penalty, mip.entities.LinExpr: total penalty cost   
     """
-    c_truck_distance = TRUCK_DISTANCE_COST * (mip.xsum(x[t][k][i][j] * calc_edge_cost(x,t,k,i,j,edges_index,cost_edges) for t in range(DAYS-1) for k in trucks for i in range(len(x[t][k])) for j in range(len(x[t][k][i]))))
+    if trace is None:
+        trace = RunTrace(None)
+    trace.mark()
+    c_truck_distance = TRUCK_DISTANCE_COST * (mip.xsum(var * calc_edge_cost(i,j,distance_matrix) for t in range(DAYS-1) for k in trucks for i,j,var in x.arcs(t,k)))
     print("Finished truck distance cost formulation at", time.time()-start)
+    trace.lap("objective","truck_distance",terms=len(c_truck_distance.expr))
     c_truck = TRUCK_COST * mip.xsum(u[k] for k in trucks)
     print("Finished truck cost formulation at", time.time()-start)
+    trace.lap("objective","truck",terms=len(c_truck.expr))
     c_truck_day = TRUCK_DAY_COST * mip.xsum(v[t][k] for t in range(DAYS-1) for k in trucks) 
     print("Finished truck day cost formulation at", time.time()-start)
-    c_tech_distance = TECHNICIAN_DISTANCE_COST * mip.xsum(y[t][h][i][j] * calc_edge_cost(y,t,h,i,j,edges_index,cost_edges) for t in range(DAYS-1) for h in technicians for i in range(len(y[t][h])) for j in range(len(y[t][h][i])))
+    trace.lap("objective","truck_day",terms=len(c_truck_day.expr))
+    c_tech_distance = TECHNICIAN_DISTANCE_COST * mip.xsum(var * calc_edge_cost(i,j,distance_matrix) for t in range(DAYS-1) for h in technicians for i,j,var in y.arcs(t,h))
     print("Finished technician distanc cost formulation at", time.time()-start)
+    trace.lap("objective","tech_distance",terms=len(c_tech_distance.expr))
     c_tech = TECHNICIAN_COST * mip.xsum(p[h] for h in technicians) 
     print("Finished technician cost formulation at", time.time()-start)
+    trace.lap("objective","tech",terms=len(c_tech.expr))
     c_tech_day = TECHNICIAN_DAY_COST * mip.xsum(q[t][h] for t in range(0,DAYS-1) for h in technicians)
     print("Finished technician day cost formulation at", time.time()-start)
-    c_penalty = mip.xsum(machine_penalty[customer_machine_types[j-1]] * customer_order_size[j-1] * ((mip.xsum((t+1)*tech_cust_variables(y,h,j,t,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types) for t in range(DAYS-1) for h in technicians))-(mip.xsum(t*x[t][k][i][j] for t in range(DAYS-1) for k in trucks for i in x_nodes if i > j) + mip.xsum(t*x[t][k][i][j-1] for t in range(DAYS-1) for k in trucks for i in x_nodes if i < j)) - 1) for j in customer_nodes)
+    trace.lap("objective","tech_day",terms=len(c_tech_day.expr))
+    c_penalty = mip.xsum(machine_penalty[customer_machine_types[j-1]] * customer_order_size[j-1] * (installation_day[j] - delivery_day[j] - 1) for j in customer_nodes)
     print("Finished penalty cost formulation at", time.time()-start)
+    trace.lap("objective","penalty",terms=len(c_penalty.expr))
     return c_truck_distance,c_truck,c_truck_day,c_tech_distance,c_tech,c_tech_day,c_penalty
 ###########################################################
 ### 
-def tech_cust_variables(y,h,selected_customer,t,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types):
-    """
-    Purpose
-        Create a linear expression of all the nodes that go into a selected customer on a day for a technician
-    Input
-        y, mip.Var: decision variable that indicates if on day t, technician h, drives from node i to j    
-        h, int: technician under consideration
-        selected_customer, int: customer node under consideration
-        t, int: the index of the day
-        technician_skill_set, list: the skillset of each technician
-        technician_nodes, dict: nodes of technicians
-        customer_nodes, dict: nodes of customers
-        customer_machine_types, list: machine type of each customer order/request
-    Output
-        tech_cust_expr, mip.entities.LinExpr: linear expression that sums all nodes that go into a customer node
-    """
-    g_tech = tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types)
-    if selected_customer in g_tech.nodes:
-        #print(h,selected_customer,t,g_tech.nodes)
-        tech_cust_expr = mip.xsum(y[t][h][tech_node][i] for tech_node in range(len(g_tech.nodes)) for i in range(len(
-                            y[t][h][tech_node])) if int(y[t][h][tech_node][i].name.split('_')[4]) == selected_customer)
-    else:
-        tech_cust_expr = mip.xsum(i for i in range(2) if 1 == 0) #return empty sum
-    return tech_cust_expr
-###########################################################
-### 
-def calc_edge_cost(var,t,k_h,i,j,edges_index,cost_edges):
+def calc_edge_cost(i,j,distance_matrix):
     """
     Purpose,
-        Calculate the cost to travel an edge given the variable (x or y) and it's index (t,k or h,i,j)
+        Calculate the cost to travel an edge given the nodes of the edge
     Input,
-        var, mip.Var: the variable we are looking at (x or y)
-        t, int: the index of the day
-        k_h, int, the index of the truck (k) or the technician (h)
-        i, int: the index of the node we are leaving
-        j, int: the index of the node we are entering
-        edges_index, dict: indicating the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: indicating the cost for each edge
+        i, int: the node we are leaving
+        j, int: the node we are entering
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
     Output,
         edge_cost, cost to travel over this edge
     """
-    var_name = var[t][k_h][i][j].name
-    var_name_split = var_name.split('_')
-    outgoing_node =  int(var_name_split[3])
-    incoming_node = int(var_name_split[4])
-    edge_index = edges_index[(outgoing_node,incoming_node)]
-    edge_cost = cost_edges[edge_index[0]][edge_index[1]]
+    edge_cost = int(distance_matrix[i][j])
     
     return edge_cost
 ###########################################################
 ### 
-def create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,technician_skill_set,nodes,technician_nodes,customer_nodes,customer_machine_types,start):
+def create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,tech_customers,nodes,technician_nodes,customer_nodes,start,trace=None,
+                               start_delivery_window=None,end_delivery_window=None,truck_arcs=None,tech_arcs=None,integral_days=False):
     """
     Purpose
         Create the decision variables of the problem
@@ -391,15 +261,24 @@ def create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,technic
         technicians, list: technicians in the problem
         trucks, list: trucks in the problem
         x_nodes, dict: nodes (keys) and coordinates (values) related to x variable in the mathematical problem
-        technician_skill_set, list: skill set dummy that indicates if a technician can install a machine
+        tech_customers, list: sorted customer nodes where each technician can install
         nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
         technician_nodes, dict: nodes (keys) and coordinates (values) of the technicians
         customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
-        customer_machine_types, list: machine type of each customer order/request
         start, float: start time of algorithm
+        trace, RunTrace: the time and number of columns of each decision variable are recorded in the trace (None for no trace)
+        start_delivery_window, list: start of the delivery window for each customer, with the end of the delivery window
+            the arcs of x and y are only created on the days the customer can be delivered or installed (None to create the
+            arcs on every day)
+        end_delivery_window, list: end of the delivery window for each customer (None to create the arcs on every day)
+        truck_arcs, numpy array: boolean matrix, truck_arcs[i][j] is False if the trucks never drive from node i to j (see
+            prune_arcs() in the ArcPruningVeRoLogMip file, None to create all arcs)
+        tech_arcs, list: for each technician a boolean matrix, tech_arcs[h][i][j] is False if technician h never drives from
+            node i to j (None to create all arcs)
+        integral_days, bool: create v and q as binary variables (the compact linking formulation, see add_constraints())
     Output
-        x, mip.Var: decision variable that indicates if on day t, truck k, drives from node i to j
-        y, mip.Var: decision variable that indicates if on day t, technician h, drives from node i to j
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
         w, mip.Var: decision variable indicating if on day t technician h has worked for 5 days in a row
         u, mip.Var: decision variable for calculation of the number of trucks used in the problem
         v, mip.Var: decision variable for calculation of the number of truck days in the problem
@@ -408,100 +287,240 @@ def create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,technic
         z, mip.Var: decision variable for cumulative load on day t, in truck k, delivering to customer j
         l, mip.Var: decision variable for cumulative load on day t, for technician h, installing at  customer j 
     """
+    if trace is None:
+        trace = RunTrace(None)
+    trace.mark()
+    #a customer can only be delivered within its delivery window and installed from the day after the start of the window,
+    #the arcs into and out of the customer on the other days are not created
+    delivery_days,installation_days = service_days(DAYS,customer_nodes,start_delivery_window,end_delivery_window)
     # Binary
     #no connection between technician homes
     #delivery needs to be fullfilled one day before end of the horizon
-    x = [[[[opt_model.add_var(name="x_{0}_{1}_{2}_{3}".format(t,k,i,j),var_type=mip.BINARY) for j in x_nodes if j != i] for i in x_nodes] for k in trucks] for t in range(DAYS-1)]
+    x = ArcVariables("x")
+    for t in range(DAYS-1):
+        day_x_nodes = [i for i in x_nodes if i not in delivery_days or t in delivery_days[i]]
+        for k in trucks:
+            for i in day_x_nodes:
+                for j in day_x_nodes:
+                    if i != j and (truck_arcs is None or truck_arcs[i][j]):
+                        x.add(t,k,i,j,opt_model.add_var(name="x_{0}_{1}_{2}_{3}".format(t,k,i,j),var_type=mip.BINARY))
     print("Finished variable x at", time.time()-start)
+    trace.lap("variables","x",columns=len(x),pruned=(DAYS-1)*len(trucks)*len(x_nodes)*(len(x_nodes)-1)-len(x))
     #installation can only start one day later than delivery, also no connection between technician homes and depot
     # the technicians are disconnected from the customer nodes if their skillset does not allow them to install there
-    y = [[[]for h in technicians] for t in range(1,DAYS)]
+    #the index t of y is the day t+1 in the horizon
+    y = ArcVariables("y")
     for t in range(DAYS-1):
         for h in technicians:
-            count_h = 0
-            G_tech_h = tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types)
-            #note that this will not work if the input file includes a technician that cannot install any of the requests
-            for i in G_tech_h.nodes:
-                y[t][h].append([])
-                for j in G_tech_h.nodes:
-                    if i != j:
-                        y[t][h][count_h].append(opt_model.add_var(name="y_{0}_{1}_{2}_{3}".format(t+1,h,i,j),var_type=mip.BINARY))
-                count_h +=1
+            tech_h_nodes = [len(customer_nodes)+1+h] + [j for j in tech_customers[h] if t in installation_days[j]] #home location first
+            for i in tech_h_nodes:
+                for j in tech_h_nodes:
+                    if i != j and (tech_arcs is None or tech_arcs[h][i][j]):
+                        y.add(t,h,i,j,opt_model.add_var(name="y_{0}_{1}_{2}_{3}".format(t+1,h,i,j),var_type=mip.BINARY))
     print("Finished variable y at", time.time()-start)            
+    trace.lap("variables","y",columns=len(y),pruned=(DAYS-1)*sum((len(tech_customers[h])+1)*len(tech_customers[h]) for h in technicians)-len(y))
     #technician can only have worked for the past 5 consecutive days on the 7th day in the horizon
     if DAYS > 6:
         w = [[opt_model.add_var(name="w_{0}_{1}".format(t,h),var_type=mip.BINARY) for h in technicians] for t in range(6,DAYS)]
     else:
         w = []
     print("Finished variable w at", time.time()-start)
+    trace.lap("variables","w",columns=sum(len(w_t) for w_t in w))
     # # Continuous
     u = [opt_model.add_var(name="u_{0}".format(k),lb=0.0) for k in trucks]
     print("Finished variable u at", time.time()-start)    
-    v = [[opt_model.add_var(name="v_{0}_{1}".format(t,k),lb=0.0) for k in trucks] for t in range(DAYS-1)]
+    trace.lap("variables","u",columns=len(u))
+    day_type = mip.BINARY if integral_days else mip.CONTINUOUS
+    v = [[opt_model.add_var(name="v_{0}_{1}".format(t,k),lb=0.0,var_type=day_type) for k in trucks] for t in range(DAYS-1)]
     print("Finished variable v at", time.time()-start)    
+    trace.lap("variables","v",columns=sum(len(v_t) for v_t in v))
     p = [opt_model.add_var(name="p_{0}".format(h),lb=0.0) for h in technicians]
     print("Finished variable p at", time.time()-start)    
-    q = [[opt_model.add_var(name="q_{0}_{1}".format(t,h),lb=0.0) for h in technicians] for t in range(1,DAYS)]
+    trace.lap("variables","p",columns=len(p))
+    q = [[opt_model.add_var(name="q_{0}_{1}".format(t,h),lb=0.0,var_type=day_type) for h in technicians] for t in range(1,DAYS)]
     print("Finished variable q at", time.time()-start)    
+    trace.lap("variables","q",columns=sum(len(q_t) for q_t in q))
     #delivery needs to be fullfilled one day before end of the horizon
     z = [[[opt_model.add_var(name="z_{0}_{1}_{2}".format(t,k,j),lb=0.0) for j in customer_nodes] for k in trucks] for t in range(DAYS-1)]
     print("Finished variable z at", time.time()-start)
+    trace.lap("variables","z",columns=sum(len(z_tk) for z_t in z for z_tk in z_t))
     #installation can only start one day later than delivery
     #the load only needs to be calculated for customer nodes that the technician can install
     l = [[[]for h in technicians] for t in range(1,DAYS)]
     for t in range(DAYS-1):
         for h in technicians:
-            G_tech_h = tech_graph(h,technician_skill_set,technician_nodes,customer_nodes,customer_machine_types)
-            for j in G_tech_h.nodes:
-                if j != len(nodes) - len(technician_nodes) + h: #exclude the technician home
-                    l[t][h].append(opt_model.add_var(name="l_{0}_{1}_{2}".format(t+1,h,j),lb=0.0)) 
+            for j in tech_customers[h]:
+                l[t][h].append(opt_model.add_var(name="l_{0}_{1}_{2}".format(t+1,h,j),lb=0.0))
     print("Finished variable l at", time.time()-start)
+    trace.lap("variables","l",columns=sum(len(l_th) for l_t in l for l_th in l_t))
     return x,y,w,u,v,p,q,z,l
 ###########################################################
-### main
-def main():
-    #input from user
-    #input_file_name = "VSC2019_ORTEC_Example.csv" #must be csv
-    input_file_name = "VSC2019_ORTEC_Small_04.csv" #must be csv
-    #output_file_name = 'TestSolutionExample'
-    output_file_name = 'SolutionInstance_Small_04'
-    number_of_trucks = 2
-    max_run_time = 36*60*60 #in seconds
+### 
+def write_solution_file(output_file_name,instance_name,objective_func,c_penalty,x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,distance_matrix,values,start,trace):
+    """
+    Purpose
+        Write the solution file (and its JSON and NPZ export) of a run, a solution that is not a set of routes is not
+        written
+    Input
+        output_file_name, str: filename of the solution file (without the txt extension)
+        instance_name, str: name of file of VeRoLog instance
+        objective_func, ..., values: see create_solution_file() in the WriteSolutionVeRoLogMip file
+        start, float: start time of algorithm
+        trace, RunTrace: the time of writing the solution file is recorded in the trace
+    Output
+        written, bool: the solution file was written
+    """
+    try:
+        with trace.phase("solution_file",output_file_name):
+            create_solution_file(output_file_name,instance_name,objective_func,c_penalty,x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,distance_matrix,values,export=True)
+    except ValueError as error:
+        print(error)
+        return False
+    print("Created a solution file at",time.time()-start)
+    return True
+###########################################################
+### 
+def run_instance(input_file_name,output_file_name,number_of_trucks,max_run_time,model_file_name=None,solver_config=None,warm_start=None,instance_file_name=None,symmetry_breaking=False,compact_linking=False):
+    """
+    Purpose
+        Read an instance, build and solve the MILP and write the solution file
+    Input
+        input_file_name, str: filename of the VeRoLog instance in csv form
+        output_file_name, str: filename of the solution file (without the txt extension)
+        number_of_trucks, int: total number of available trucks in optimization problem
+        max_run_time, float: time limit of the optimization in seconds
+        model_file_name, str: stream the model to this file (.lp/.mps, optionally .gz) and solve it with the cbc executable
+            (None to build the model in memory)
+        solver_config, dict: solver settings (see the SolverConfigVeRoLogMip file, None for the default settings)
+        warm_start, str: "greedy" to start the optimization from the schedule of the greedy heuristic, or a solution file
+            or a directory with solution files to start from the best valid solution (None for a cold start)
+        instance_file_name, str: filename of the VeRoLog instance in txt form, used to check the solution files of the
+            warm start (None for input_file_name with the txt extension)
+        symmetry_breaking, bool: add the constraints that order the identical trucks and the equivalent technicians (see the
+            SymmetryVeRoLogMip file)
+        compact_linking, bool: link u, v, p and q with one row per vehicle and customer instead of one row per arc, with v and
+            q binary (see add_constraints())
+    Output
+        summary, dict: status, objective value, bound, solution file, size of the model and wall time of the run (valid is
+            False if the solution is not a set of routes, no solution file is then written)
+    """
     #start of algorithm
     start = time.time()
-    logging.basicConfig(filename=input_file_name.strip('.csv')+'_logs', level=logging.INFO,format='%(asctime)s:%(levelname)s:%(message)s')
-    opt_model = mip.Model(name=input_file_name.strip('.csv'),solver_name=mip.CBC)   
-    DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,edges_index,cost_edges = read_file(input_file_name,number_of_trucks)
+    opt_model = mip.Model(name=os.path.splitext(os.path.basename(input_file_name))[0],solver_name=mip.CBC)   
+    if solver_config is None:
+        solver_config = default_solver_config()
+    #wall time, CPU time and counters of every phase are written to a JSON trace, with the solver settings of the run
+    trace = RunTrace(opt_model.name,{"input_file_name": input_file_name,"number_of_trucks": number_of_trucks,"max_run_time": max_run_time,"solver_config": solver_config,"warm_start": warm_start,
+                                     "symmetry_breaking": symmetry_breaking,"compact_linking": compact_linking})
+    trace_file_name = output_file_name+'_trace.json'
+    DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position = read_file(input_file_name,number_of_trucks)
     print("Finished reading data at",time.time()-start)  
+    trace.lap("read",input_file_name,days=DAYS,customers=len(customer_nodes),technicians=len(technicians),trucks=len(trucks))
+    #arcs that can never be part of a feasible route are not created
+    truck_arcs,tech_arcs = prune_arcs(DAYS,technicians,trucks,x_nodes,tech_customers,customer_nodes,customer_order_size,machine_size,customer_machine_types,start_delivery_window,end_delivery_window,
+                                      technician_max_distance,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,trace)
+    if model_file_name is not None:
+        #the model is never built in memory, the cbc executable solves the model file
+        allocator,x,y,u,v,p,q,objective,objective_const,penalty_objective = write_model_stream(model_file_name,create_decisions_variables,DAYS,technicians,trucks,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,tech_customers,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,start,trace,
+                                          truck_arcs=truck_arcs,tech_arcs=tech_arcs,compact_linking=compact_linking)
+        with trace.phase("solve","cbc") as record:
+            record["returncode"] = solve_with_cbc(model_file_name,output_file_name+".sol",max_run_time,solver_config.get("threads") or 1,options=cbc_arguments(solver_config))
+            if os.path.exists(output_file_name+".sol"):
+                status,values = read_cbc_solution(output_file_name+".sol",allocator.num_cols)
+            else:
+                status,values = "No solution file",np.zeros(allocator.num_cols)
+            record["status"] = status
+        print("Finished optimization at",time.time()-start)
+        print(status)
+        #the objective and penalty cost follow from the objective coefficients of the model file
+        solution_found = cbc_solution_found(status)
+        objective_value = float(objective @ values + objective_const) if solution_found else None
+        if solution_found:
+            print('Route with total cost %g found' % (objective_value))
+            instance_name = os.path.splitext(os.path.basename(input_file_name))[0] + '.txt'
+            solution_found = write_solution_file(output_file_name,instance_name,objective_value,float(penalty_objective @ values + objective_const),x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,distance_matrix,values,start,trace)
+        else:
+            print('No feasible solution was found')
+        trace.write_json(trace_file_name)
+        return {"instance": input_file_name,"status": status,"objective_value": objective_value,"objective_bound": None,
+                "solution_file": output_file_name+".txt" if solution_found else None,"valid": False if cbc_solution_found(status) and not solution_found else None,
+                "columns": allocator.num_cols,"rows": None,"solver_config": solver_config,"wall": time.time()-start}
     
     #decision variables
-    x,y,w,u,v,p,q,z,l = create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,technician_skill_set,nodes,technician_nodes,customer_nodes,customer_machine_types,start)
+    x,y,w,u,v,p,q,z,l = create_decisions_variables(opt_model,DAYS,technicians,trucks,x_nodes,tech_customers,nodes,technician_nodes,customer_nodes,start,trace,
+                                                   start_delivery_window=start_delivery_window,end_delivery_window=end_delivery_window,truck_arcs=truck_arcs,tech_arcs=tech_arcs,
+                                                   integral_days=compact_linking)
     print("Finished creating decision variables at",time.time()-start) 
+    delivery_day,installation_day = create_customer_expressions(x,y,DAYS,technicians,trucks,customer_nodes,start,trace)
     #create objective function
-    c_truck_distance,c_truck,c_truck_day,c_tech_distance,c_tech,c_tech_day,c_penalty = create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,edges_index,cost_edges,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,technician_skill_set,technician_nodes,customer_nodes,x_nodes,customer_machine_types,start)
+    c_truck_distance,c_truck,c_truck_day,c_tech_distance,c_tech,c_tech_day,c_penalty = create_cost_functions(x,y,u,v,p,q,DAYS,technicians,trucks,distance_matrix,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,machine_penalty,customer_order_size,customer_nodes,customer_machine_types,delivery_day,installation_day,start,trace)
     objective_func = c_truck_distance + c_truck + c_truck_day + c_tech_distance + c_tech + c_tech_day + c_penalty
     opt_model.objective = mip.minimize(objective_func)
+    apply_solver_config(opt_model,solver_config)
     print("Finished creating objective function at",time.time()-start)
+    #trucks are always identical, technicians only within their class
+    classes = technician_classes(technicians,customer_nodes,nodes,eligibility,technician_max_visits,technician_max_distance) if symmetry_breaking else None
+    #volume of the order of each customer, used by the start solution and the constraints
+    order_volume = np.array([customer_order_size[j-1] * machine_size[customer_machine_types[j-1]] for j in customer_nodes],dtype=np.float64)
+    #the start solution is checked against every constraint family while the constraints are added
+    start_check = None
+    if warm_start is not None:
+        with trace.phase("warm_start",warm_start) as record:
+            try:
+                if instance_file_name is None:
+                    instance_file_name = os.path.splitext(input_file_name)[0] + '.txt'
+                schedule = start_schedule(warm_start,instance_file_name,DAYS,technicians,trucks,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,
+                                          start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,
+                                          distance_matrix,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,record)
+                if classes is not None:
+                    schedule = canonical_schedule(schedule,classes,order_volume)
+                values = schedule_to_values(schedule,opt_model.num_cols,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,customer_nodes,order_volume,tech_customer_position)
+                start_check = StartCheck(values)
+                record["objective_value"] = start_objective_value(opt_model,values)
+            except ValueError as error:
+                logging.warning("No start solution: {0}".format(error))
+                print("No start solution:",error)
+        print("Finished start solution at",time.time()-start)
+    #the constraints are appended to the checkpoint, a restart continues after the last finished constraint family
+    #(the rows also depend on the instance data and the options that do not change the columns, so they are part of the fingerprint)
+    checkpoint = ModelCheckpoint(opt_model.name+"_checkpoint",model_fingerprint(opt_model,input_file_name,{"symmetry_breaking": symmetry_breaking,"compact_linking": compact_linking}))
+    trace.mark()
     try:
         opt_model.write(opt_model.name+".lp")
     except:
         logging.warning("Failed (over)writing the lp model after objective function")
-    opt_model = add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,edges_index,cost_edges,LARGE_NUMBER,start)
+    trace.lap("write","lp_objective")
+    opt_model = add_constraints(opt_model,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,tech_customers,tech_customer_position,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,LARGE_NUMBER,start,checkpoint,trace,start_check,
+                                technician_classes=classes,compact_linking=compact_linking,order_volume=order_volume)
+    #the model is complete, a next run builds the constraints again
+    checkpoint.clear()
+    if start_check is not None:
+        if start_check.feasible:
+            set_start(opt_model,start_check.values)
+            print("The start solution with objective value {0} satisfies all {1} constraint families".format(start_objective_value(opt_model,start_check.values),start_check.families))
+        else:
+            print("The start solution violates {0} constraint families, the optimization starts without it".format(len(start_check.violations)))
     print("Finished building model, starting optimization at",time.time()-start)
+    trace.mark()
     try:
         opt_model.write(opt_model.name+".lp")
     except:
         logging.warning("Failed (over)writing the lp model before start optimization")
+    trace.lap("write","lp_model",columns=opt_model.num_cols,rows=opt_model.num_rows,nonzeros=opt_model.num_nz)
     
-    status = opt_model.optimize(max_seconds=max_run_time)
+    with trace.phase("solve","cbc",columns=opt_model.num_cols,rows=opt_model.num_rows,nonzeros=opt_model.num_nz) as record:
+        status = opt_model.optimize(max_seconds=max_run_time)
+        record.update(status=status.name,solutions=opt_model.num_solutions,objective_value=opt_model.objective_value,objective_bound=opt_model.objective_bound)
     print("Finished optimization at",time.time()-start)
     
-    if opt_model.num_solutions:
+    solution_found = opt_model.num_solutions > 0
+    #the solution values of all decision variables are read once
+    values = solution_vector(opt_model) if opt_model.num_solutions > 0 else None
+    if solution_found:
         print('Route with total cost %g found' % (opt_model.objective_value))
-        instance_name = input_file_name.strip('csv') + 'txt'
+        instance_name = os.path.splitext(os.path.basename(input_file_name))[0] + '.txt'
         print(instance_name)
-        create_solution_file(output_file_name,instance_name,objective_func,c_penalty,x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,edges_index,cost_edges)
-        print("Created a solution file at",time.time()-start)
+        solution_found = write_solution_file(output_file_name,instance_name,objective_func,c_penalty,x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,distance_matrix,values,start,trace)
     else: 
         print('No feasible solution was found')
         
@@ -515,10 +534,77 @@ def main():
         print('no feasible solution found, lower bound is: {}'.format(opt_model.objective_bound))
     if status == mip.OptimizationStatus.OPTIMAL or status == mip.OptimizationStatus.FEASIBLE:
         print('solution:')
-        for variab in opt_model.vars:
-            if abs(variab.x) > 1e-6: # only printing non-zeros
-                print('{} : {}'.format(variab.name, variab.x))    
+        for col in np.flatnonzero(np.abs(values) > 1e-6): # only printing non-zeros
+            print('{} : {}'.format(opt_model.vars[int(col)].name, values[col]))
+    trace.write_json(trace_file_name)
+    print("Wrote the trace of the run to",trace_file_name)
+    return {"instance": input_file_name,"status": status.name,"objective_value": opt_model.objective_value,"objective_bound": opt_model.objective_bound,
+            "solution_file": output_file_name+".txt" if solution_found else None,"valid": False if opt_model.num_solutions > 0 and not solution_found else None,
+            "columns": opt_model.num_cols,"rows": opt_model.num_rows,
+            "solver_config": solver_config,"wall": time.time()-start}
+###########################################################
+### 
+def run_fleet_sizing(input_file_name,output_file_name,max_run_time,**options):
+    """
+    Purpose
+        Run the MILP with the smallest number of trucks that can be feasible (see the FleetSizingVeRoLogMip file), a truck is
+        added and the MILP is run again in the remaining time only if the MILP is proven infeasible
+    Input
+        input_file_name, str: filename of the VeRoLog instance in csv form
+        output_file_name, str: filename of the solution file (without the txt extension)
+        max_run_time, float: time limit of all runs in seconds
+        options, dict: the other options of run_instance()
+    Output
+        summary, dict: summary of the last run (see run_instance()) with the number of trucks and the bounds
+    """
+    start = time.time()
+    DAYS,technicians,trucks,machines,customers,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,technician_skill_set,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,LARGE_NUMBER,TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,depot_node,customer_nodes,technician_nodes,nodes,x_nodes,distance_matrix,eligibility,tech_customers,tech_customer_position = read_file(input_file_name,1)
+    lower_bound,upper_bound = fleet_size(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                                         end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                                         TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST)
+    print("Finished fleet sizing at",time.time()-start)
+    #without a greedy schedule every customer can get its own truck
+    max_trucks = upper_bound if upper_bound is not None else max(len(customer_nodes),1)
+    number_of_trucks = lower_bound
+    while True:
+        summary = run_instance(input_file_name,output_file_name,number_of_trucks,max(max_run_time-(time.time()-start),1),**options)
+        summary.update(trucks=number_of_trucks,fleet_lower_bound=lower_bound,fleet_upper_bound=upper_bound)
+        #the status of the cbc executable (model file) is the first line of its solution file
+        infeasible = summary["status"] == mip.OptimizationStatus.INFEASIBLE.name or str(summary["status"]).startswith("Infeasible")
+        if not infeasible or number_of_trucks >= max_trucks or time.time()-start >= max_run_time:
+            break
+        print("The MILP with {0} trucks is infeasible, running it with {1} trucks".format(number_of_trucks,number_of_trucks+1))
+        logging.info("Fleet sizing: the MILP with {0} trucks is infeasible".format(number_of_trucks))
+        number_of_trucks += 1
+    summary["wall"] = time.time()-start
+    return summary
+###########################################################
+### main
+def main():
+    #input from user, the defaults can be changed on the command line
+    #input_file_name = "VSC2019_ORTEC_Example.csv" #must be csv
+    #output_file_name = 'TestSolutionExample'
+    parser = argparse.ArgumentParser(description="Run the VeRoLog MILP for one instance")
+    parser.add_argument("--input","-i",dest="input_file_name",default="VSC2019_ORTEC_Small_04.csv",help="VeRoLog instance in csv form")
+    parser.add_argument("--output","-o",dest="output_file_name",default="SolutionInstance_Small_04",help="solution file (without the txt extension)")
+    parser.add_argument("--trucks","-t",dest="number_of_trucks",type=truck_count,default=2,help="number of trucks, or auto to choose the smallest number of trucks that can be feasible")
+    parser.add_argument("--max-seconds","-s",dest="max_run_time",type=float,default=36*60*60,help="time limit of the optimization in seconds")
+    parser.add_argument("--model-file",dest="model_file_name",help="stream the model to this file (.lp/.mps, optionally .gz) and solve it with the cbc executable, for example Instance_Small_04.mps.gz")
+    parser.add_argument("--warm-start",help="start the optimization from the schedule of the greedy heuristic (greedy) or from the best valid solution in a solution file or directory of solution files")
+    parser.add_argument("--symmetry-breaking",action="store_true",help="order the identical trucks and the equivalent technicians")
+    parser.add_argument("--compact-linking",action="store_true",help="link u, v, p and q with one row per vehicle and customer instead of one row per arc")
+    add_solver_arguments(parser)
+    args = parser.parse_args()
+    solver_config = solver_config_from_arguments(args)
+    logging.basicConfig(filename=os.path.splitext(args.input_file_name)[0]+'_logs', level=logging.INFO,format='%(asctime)s:%(levelname)s:%(message)s')
+    logging.info("Solver settings: {0}".format(solver_config))
+    options = {"model_file_name": args.model_file_name,"solver_config": solver_config,"warm_start": args.warm_start,"symmetry_breaking": args.symmetry_breaking,
+               "compact_linking": args.compact_linking}
+    if args.number_of_trucks is None:
+        run_fleet_sizing(args.input_file_name,args.output_file_name,args.max_run_time,**options)
+    else:
+        run_instance(args.input_file_name,args.output_file_name,args.number_of_trucks,args.max_run_time,**options)
     return
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    A schedule of a VeRoLog instance as routes per day for the trucks and the technicians, in the nodes of the MILP (0 is
+    the depot, 1 until the number of customers are the customers and the technician homes follow). The cost of a schedule
+    is calculated as in the challenge and it is written in the same format as create_solution_file() of the
+    WriteSolutionVeRoLogMip file, so it can be checked by the SolutionVerolog2019 file. Schedules are created by the greedy
+    heuristic (GreedyHeuristicVeRoLog file) or read from an existing solution file and can be used as a start of the MILP.
+"""
+###########################################################
+### imports
+import logging
+import os
+from WriteSolutionVeRoLogMip import atomic_write #from local repository
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+###########################################################
+###
+class Schedule(object):
+    """
+    Purpose
+        Routes per day of the trucks and technicians. Days are numbered from 0 (the first day of the horizon) until DAYS-1.
+        A truck route is the list of customer nodes that are delivered in this order, 0 in the route means the truck returns
+        to the depot to load again, the route starts and ends at the depot. A technician route is the list of customer nodes
+        that are installed in this order, the route starts and ends at the home of the technician
+    Input
+        DAYS, int: number of days in the horizon
+    """
+    def __init__(self,DAYS):
+        self.DAYS = DAYS
+        self.truck_routes = [{} for t in range(DAYS)] #day (index), truck (keys) and route (values)
+        self.tech_routes = [{} for t in range(DAYS)] #day (index), technician (keys) and route (values)
+
+    def delivery_days(self):
+        """
+        Purpose
+            Get the day each customer is delivered
+        Output
+            delivery_day, dict: customer node (keys) and day of delivery (values)
+        """
+        return {j: t for t in range(self.DAYS) for route in self.truck_routes[t].values() for j in route if j != 0}
+
+    def installation_days(self):
+        """
+        Purpose
+            Get the day each customer is installed
+        Output
+            installation_day, dict: customer node (keys) and day of installation (values)
+        """
+        return {j: t for t in range(self.DAYS) for route in self.tech_routes[t].values() for j in route}
+
+    def truck_trips(self,t,k):
+        """
+        Purpose
+            Split the route of truck k on day t in trips that start and end at the depot
+        Input
+            t, int: day
+            k, int: truck
+        Output
+            trips, list: customer nodes of each trip
+        """
+        trips = [[]]
+        for j in self.truck_routes[t].get(k,[]):
+            if j == 0:
+                trips.append([])
+            else:
+                trips[-1].append(j)
+        return [trip for trip in trips if trip]
+
+    def truck_distance(self,t,k,distance_matrix):
+        """
+        Purpose
+            Distance of truck k on day t (from the depot, along the route and back to the depot)
+        """
+        route = [0] + self.truck_routes[t].get(k,[]) + [0]
+        return int(sum(distance_matrix[route[n]][route[n+1]] for n in range(len(route)-1)))
+
+    def tech_distance(self,t,h,home,distance_matrix):
+        """
+        Purpose
+            Distance of technician h on day t (from home, along the route and back home)
+        """
+        route = [home] + self.tech_routes[t].get(h,[]) + [home]
+        return int(sum(distance_matrix[route[n]][route[n+1]] for n in range(len(route)-1)))
+
+    def calculate_cost(self,technicians,customer_nodes,customer_machine_types,machine_penalty,customer_order_size,distance_matrix,
+                       TRUCK_DISTANCE_COST,TRUCK_DAY_COST,TRUCK_COST,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST):
+        """
+        Purpose
+            Calculate the cost of the schedule as in the challenge
+        Input
+            technicians, list: technicians in the problem
+            customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+            customer_machine_types, list: machine type of each customer order/request
+            machine_penalty, list: daily penalty for idle machines (delivered but not yet installed)
+            customer_order_size, list: size of each customer order/request
+            distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+            TRUCK_DISTANCE_COST, ..., TECHNICIAN_COST, int: the costs of the instance
+        Output
+            cost, dict: the cost items of the solution file (keys) and their value (values)
+        """
+        truck_distance = sum(self.truck_distance(t,k,distance_matrix) for t in range(self.DAYS) for k in self.truck_routes[t])
+        truck_days = sum(len(self.truck_routes[t]) for t in range(self.DAYS))
+        trucks_used = max([len(self.truck_routes[t]) for t in range(self.DAYS)] + [0])
+        home = {h: len(customer_nodes)+1+h for h in technicians}
+        tech_distance = sum(self.tech_distance(t,h,home[h],distance_matrix) for t in range(self.DAYS) for h in self.tech_routes[t])
+        tech_days = sum(len(self.tech_routes[t]) for t in range(self.DAYS))
+        techs_used = len({h for t in range(self.DAYS) for h in self.tech_routes[t]})
+        delivery_day = self.delivery_days()
+        installation_day = self.installation_days()
+        idle_cost = sum((installation_day[j]-delivery_day[j]-1) * machine_penalty[customer_machine_types[j-1]] * customer_order_size[j-1]
+                        for j in installation_day if j in delivery_day)
+        total = (truck_distance*TRUCK_DISTANCE_COST + truck_days*TRUCK_DAY_COST + trucks_used*TRUCK_COST + tech_distance*TECHNICIAN_DISTANCE_COST
+                 + tech_days*TECHNICIAN_DAY_COST + techs_used*TECHNICIAN_COST + idle_cost)
+        return {"TRUCK_DISTANCE": truck_distance,"NUMBER_OF_TRUCK_DAYS": truck_days,"NUMBER_OF_TRUCKS_USED": trucks_used,
+                "TECHNICIAN_DISTANCE": tech_distance,"NUMBER_OF_TECHNICIAN_DAYS": tech_days,"NUMBER_OF_TECHNICIANS_USED": techs_used,
+                "IDLE_MACHINE_COSTS": idle_cost,"TOTAL_COST": total}
+
+    def write_solution_file(self,file_name,instance,cost):
+        """
+        Purpose
+            Write the schedule as solution file (same format as create_solution_file() of the WriteSolutionVeRoLogMip file),
+            the trucks and technicians are numbered from 1
+        Input
+            file_name, str: name of the solution file (without the txt extension)
+            instance, str: name of file of VeRoLog instance
+            cost, dict: the cost items of the solution file (see calculate_cost())
+        Output
+        """
+        lines = ['DATASET = VeRoLog solver challenge 2019','NAME = ' + instance]
+        lines += [item + ' = ' + str(int(cost[item])) for item in ("TRUCK_DISTANCE","NUMBER_OF_TRUCK_DAYS","NUMBER_OF_TRUCKS_USED","TECHNICIAN_DISTANCE",
+                                                                  "NUMBER_OF_TECHNICIAN_DAYS","NUMBER_OF_TECHNICIANS_USED","IDLE_MACHINE_COSTS","TOTAL_COST")]
+        #in solution file the day numbering starts at 1
+        for t in range(self.DAYS):
+            lines.append('')
+            lines.append('DAY = '+str(t+1))
+            lines.append('NUMBER_OF_TRUCKS = '+str(len(self.truck_routes[t])))
+            lines += [' '.join(str(node) for node in [k+1]+self.truck_routes[t][k]) for k in sorted(self.truck_routes[t])]
+            lines.append('NUMBER_OF_TECHNICIANS = '+str(len(self.tech_routes[t])))
+            lines += [' '.join(str(node) for node in [h+1]+self.tech_routes[t][h]) for h in sorted(self.tech_routes[t])]
+        #an interrupted run never leaves a partially written solution file
+        atomic_write(file_name+".txt",lambda file: file.write('\n'.join(lines)+'\n'))
+###########################################################
+###
+def schedule_from_solution(solution):
+    """
+    Purpose
+        Create the schedule of a solution that was read by the SolutionVerolog2019 file. The request ids in the routes are the
+        customer nodes of the MILP, the trucks of a day are numbered from 0 in the order of their id (so the number of
+        trucks used is the maximum number of trucks on a day) and technician id h+1 is technician h
+    Input
+        solution, SolutionVerolog2019: a valid solution
+    Output
+        schedule, Schedule: the truck and technician routes of the solution
+    """
+    schedule = Schedule(solution.Instance.Days)
+    for day in solution.Days:
+        t = day.dayNumber - 1
+        for k,truck in enumerate(sorted(day.TruckRoutes,key=lambda truck: truck.ID)):
+            #a return to the depot at the start or end of the route or twice in a row is not an arc
+            route = []
+            for node in truck.Route:
+                if node != 0 or (route and route[-1] != 0):
+                    route.append(node)
+            schedule.truck_routes[t][k] = route[:-1] if route and route[-1] == 0 else route
+        for technician in day.TechnicianRoutes:
+            schedule.tech_routes[t][technician.ID-1] = list(technician.Route)
+    return schedule
+###########################################################
+###
+def read_solution_schedule(solution_files,instance_file):
+    """
+    Purpose
+        Read solution files with the SolutionVerolog2019 file and get the schedule of the valid solution with the lowest cost
+    Input
+        solution_files, list: solution files (txt) or directories with solution files (including their subdirectories),
+            files that are not a valid solution of the instance are skipped
+        instance_file, str: VeRoLog instance (txt)
+    Output
+        schedule, Schedule: the truck and technician routes of the best solution (None if there is no valid solution)
+        solution_file, str: the file of the best solution (None if there is no valid solution)
+        cost, int: the cost of the best solution (None if there is no valid solution)
+    """
+    files = []
+    for path in ([solution_files] if isinstance(solution_files,str) else solution_files):
+        if os.path.isdir(path):
+            for directory,subdirectories,names in sorted(os.walk(path)):
+                files += [os.path.join(directory,name) for name in sorted(names) if name.endswith(".txt")]
+        else:
+            files.append(path)
+    best = (None,None,None)
+    instance = InstanceVerolog2019(instance_file)
+    for solution_file in files:
+        if os.path.abspath(solution_file) == os.path.abspath(instance_file):
+            continue
+        #the parse errors are reported in errorReport, only a truncated (TypeError) or binary file crashes the parser
+        try:
+            solution = SolutionVerolog2019(solution_file,instance)
+        except (TypeError,UnicodeDecodeError) as error:
+            logging.info("Skipped solution file {0}: {1}".format(solution_file,error))
+            continue
+        if not solution.isValid():
+            logging.info("Skipped solution file {0}: {1}".format(solution_file,"; ".join(solution.errorReport)))
+            continue
+        if best[2] is None or solution.calcCost.Cost < best[2]:
+            best = (schedule_from_solution(solution),solution_file,solution.calcCost.Cost)
+    return best
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Configure the performance settings of the CBC solver: the number of threads, the search emphasis, the relative and
+    absolute gap, the objective cutoff, the cut and preprocessing levels and the node and solution limits. The settings
+    are read from a JSON config file and/or from command line options (the command line overrides the file), applied to
+    the python-mip model or translated to options of the cbc executable, and recorded in the trace of the run.
+
+    Example config file
+        {"threads": 8, "emphasis": "feasibility", "max_mip_gap": 0.01, "cuts": 2}
+"""
+###########################################################
+### imports
+import json
+import mip as mip
+
+#setting (keys) and type, help text of the command line option (values), None means the default of the solver
+SOLVER_SETTINGS = {
+    "threads": (int,"number of threads of CBC (-1 for all cores)"),
+    "emphasis": (str,"search emphasis: default, feasibility or optimality"),
+    "max_mip_gap": (float,"relative gap at which the search stops"),
+    "max_mip_gap_abs": (float,"absolute gap at which the search stops"),
+    "cutoff": (float,"upper limit of the objective value, solutions that are not better are discarded"),
+    "cuts": (int,"cut generation level: -1 automatic, 0 off, 1 to 3 increasingly aggressive"),
+    "preprocess": (int,"preprocessing level: -1 automatic, 0 off, 1 on"),
+    "max_nodes": (int,"maximum number of nodes in the search tree"),
+    "max_solutions": (int,"maximum number of solutions found during the search"),
+}
+EMPHASIS = {"default": mip.SearchEmphasis.DEFAULT,"feasibility": mip.SearchEmphasis.FEASIBILITY,"optimality": mip.SearchEmphasis.OPTIMALITY}
+###########################################################
+###
+def default_solver_config():
+    """
+    Purpose
+        Get the default solver settings: one thread, all other settings are left to the solver
+    Input
+    Output
+        config, dict: setting (keys) and value (values)
+    """
+    config = {setting: None for setting in SOLVER_SETTINGS}
+    config["threads"] = 1
+    return config
+###########################################################
+###
+def check_solver_config(config):
+    """
+    Purpose
+        Check the names, types and values of the solver settings
+    Input
+        config, dict: setting (keys) and value (values)
+    Output
+        config, dict: the settings converted to their type
+    """
+    checked = {}
+    for setting,value in config.items():
+        if setting not in SOLVER_SETTINGS:
+            raise ValueError("Unknown solver setting: {0}".format(setting))
+        if value is not None:
+            value = SOLVER_SETTINGS[setting][0](value)
+        checked[setting] = value
+    if checked.get("emphasis") is not None and checked["emphasis"] not in EMPHASIS:
+        raise ValueError("Unknown search emphasis: {0}".format(checked["emphasis"]))
+    if checked.get("cuts") is not None and checked["cuts"] not in (-1,0,1,2,3):
+        raise ValueError("The cut level must be -1, 0, 1, 2 or 3")
+    if checked.get("preprocess") is not None and checked["preprocess"] not in (-1,0,1):
+        raise ValueError("The preprocessing level must be -1, 0 or 1")
+    return checked
+###########################################################
+###
+def read_solver_config(file_name):
+    """
+    Purpose
+        Read the solver settings from a JSON config file
+    Input
+        file_name, str: name of the config file
+    Output
+        config, dict: setting (keys) and value (values)
+    """
+    with open(file_name) as config_file:
+        return check_solver_config(json.load(config_file))
+###########################################################
+###
+def add_solver_arguments(parser):
+    """
+    Purpose
+        Add the command line options of the solver settings and the config file to an argument parser
+    Input
+        parser, argparse.ArgumentParser: the argument parser
+    Output
+    """
+    group = parser.add_argument_group("solver settings")
+    group.add_argument("--solver-config",help="JSON file with solver settings (overridden by the options below)")
+    for setting,(setting_type,help_text) in SOLVER_SETTINGS.items():
+        group.add_argument("--"+setting.replace("_","-"),dest=setting,type=setting_type,help=help_text)
+###########################################################
+###
+def solver_config_from_arguments(args,defaults=None):
+    """
+    Purpose
+        Combine the default solver settings, the config file and the command line options
+    Input
+        args, argparse.Namespace: parsed command line (see add_solver_arguments())
+        defaults, dict: settings that are used if they are not in the config file or the options (None for default_solver_config())
+    Output
+        config, dict: setting (keys) and value (values)
+    """
+    config = default_solver_config() if defaults is None else dict(defaults)
+    if args.solver_config:
+        config.update(read_solver_config(args.solver_config))
+    config.update({setting: getattr(args,setting) for setting in SOLVER_SETTINGS if getattr(args,setting) is not None})
+    return check_solver_config(config)
+###########################################################
+###
+def apply_solver_config(opt_model,config):
+    """
+    Purpose
+        Apply the solver settings to a python-mip model, settings that are None are left to the solver. CBC compares the
+        cutoff with the objective function without its constant, so the settings are applied after the objective function
+        is set
+    Input
+        opt_model, mip.Model: the model
+        config, dict: setting (keys) and value (values)
+    Output
+    """
+    config = check_solver_config(config)
+    for setting,value in config.items():
+        if value is None:
+            continue
+        if setting == "emphasis":
+            opt_model.emphasis = EMPHASIS[value]
+        elif setting == "cutoff":
+            opt_model.cutoff = value - opt_model.objective.const
+        else:
+            setattr(opt_model,setting,value)
+###########################################################
+###
+def cbc_arguments(config):
+    """
+    Purpose
+        Translate the solver settings to command line options of the cbc executable, the threads are passed separately
+        (see solve_with_cbc() in the ModelWriterVeRoLogMip file)
+    Input
+        config, dict: setting (keys) and value (values)
+    Output
+        arguments, list: options of the cbc executable
+    """
+    config = check_solver_config(config)
+    arguments = []
+    if config.get("emphasis") == "feasibility":
+        arguments += ["-passF","50","-proximity","on"]
+    elif config.get("emphasis") == "optimality":
+        arguments += ["-strong","10","-trust","20","-lagomory","endonly","-latwomir","endonly"]
+    if config.get("max_mip_gap") is not None:
+        arguments += ["-ratioGap",str(config["max_mip_gap"])]
+    if config.get("max_mip_gap_abs") is not None:
+        arguments += ["-allowableGap",str(config["max_mip_gap_abs"])]
+    if config.get("cutoff") is not None:
+        arguments += ["-cutoff",str(config["cutoff"])]
+    if config.get("cuts") == 0:
+        arguments += ["-cuts","off"]
+    elif config.get("cuts") is not None and config["cuts"] >= 1:
+        arguments += ["-cuts","on"]
+        if config["cuts"] >= 2:
+            arguments += ["-lagomory","endcleanroot","-latwomir","endcleanroot","-passCuts","-25" if config["cuts"] == 2 else "-35"]
+        if config["cuts"] >= 3:
+            arguments += ["-lift","ifmove"]
+    if config.get("preprocess") == 0:
+        arguments += ["-preprocess","off"]
+    elif config.get("preprocess") == 1:
+        arguments += ["-preprocess","sos"]
+    if config.get("max_nodes") is not None:
+        arguments += ["-maxNodes",str(config["max_nodes"])]
+    if config.get("max_solutions") is not None:
+        arguments += ["-maxSolutions",str(config["max_solutions"])]
+    return arguments
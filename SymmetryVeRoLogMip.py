@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Break the symmetry of the MILP. The trucks are identical, so every schedule of the trucks appears once for every
+    numbering of the trucks on every day. Technicians with the same home location, skill set, maximum number of visits and
+    maximum distance are interchangeable over the whole horizon (not per day, because of the consecutive working days).
+    The symmetry breaking constraint families (see symmetry_families() in the ConstraintMatrixVeRoLogMip file) order the
+    trucks by use (u and v) and by the order volume they deliver on a day and the equivalent technicians by use (p) and by
+    the number of working days (q), so branch-and-bound does not explore the mirrored schedules. A start solution is
+    renumbered in the same order with canonical_schedule().
+
+    Example
+        python RunMILPVeRoLogMip.py -i VSC2019_ORTEC_Example.csv -o SolutionExample -t 2 --symmetry-breaking
+"""
+###########################################################
+### imports
+from ScheduleVeRoLog import Schedule #from local repository
+###########################################################
+###
+def technician_classes(technicians,customer_nodes,nodes,eligibility,technician_max_visits,technician_max_distance):
+    """
+    Purpose
+        Find the classes of equivalent technicians: the same home location, skill set (eligibility), maximum number of visits
+        and maximum distance
+    Input
+        technicians, list: technicians in the problem
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem
+        eligibility, numpy array: boolean matrix, eligibility[h][c] indicates if technician h can install at customer c (node c+1)
+        technician_max_visits, list: maximum number of customers each technician can visit daily
+        technician_max_distance, list: maximum distance each technician can drive daily
+    Output
+        classes, list: the sorted technicians of each class with at least two technicians
+    """
+    classes = {}
+    for h in technicians:
+        key = (tuple(nodes[len(customer_nodes)+1+h]),tuple(bool(e) for e in eligibility[h]),technician_max_visits[h],technician_max_distance[h])
+        classes.setdefault(key,[]).append(h)
+    return [members for members in classes.values() if len(members) > 1]
+###########################################################
+###
+def canonical_schedule(schedule,classes,order_volume):
+    """
+    Purpose
+        Renumber the trucks and technicians of a schedule so it satisfies the symmetry breaking constraints: on every day the
+        trucks are numbered from 0 by decreasing order volume and the technicians of a class by decreasing number of working
+        days
+    Input
+        schedule, Schedule: routes per day of the trucks and technicians
+        classes, list: the classes of equivalent technicians (see technician_classes())
+        order_volume, numpy array: ordersize times machine size of each customer
+    Output
+        canonical, Schedule: the renumbered schedule
+    """
+    canonical = Schedule(schedule.DAYS)
+    for t in range(schedule.DAYS):
+        routes = sorted(schedule.truck_routes[t].items(),key=lambda item: (-sum(order_volume[j-1] for j in item[1] if j != 0),item[0]))
+        canonical.truck_routes[t] = {k: list(route) for k,(old,route) in enumerate(routes)}
+    working_days = {}
+    for t in range(schedule.DAYS):
+        for h in schedule.tech_routes[t]:
+            working_days[h] = working_days.get(h,0) + 1
+    renumber = {}
+    for members in classes:
+        ordered = sorted(members,key=lambda h: (-working_days.get(h,0),h))
+        renumber.update(zip(ordered,members))
+    for t in range(schedule.DAYS):
+        canonical.tech_routes[t] = {renumber.get(h,h): list(route) for h,route in schedule.tech_routes[t].items()}
+    return canonical
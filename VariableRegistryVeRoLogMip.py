@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Registry for the arc decision variables (x and y) of the MILP. Instead of finding an arc by parsing the names of the
+    mip variables, the registry maps the index (t, k or h, i, j) to the mip variable and back in O(1) and keeps the arcs
+    that enter and leave each node. Note that the registry is filled in create_decisions_variables() of the RunMILPVeRoLogMip
+    file and is used when the constraints, the cost functions and the solution file are created.
+"""
+###########################################################
+### imports
+import numpy as np
+###########################################################
+###
+class ArcVariables(object):
+    """
+    Purpose
+        Store the arc variables of one decision variable (x or y), indexed by t (index of the day), k_h (truck or technician)
+        and the nodes i (node we are leaving) and j (node we are entering)
+    """
+    def __init__(self,name):
+        self.name = name
+        self.vars = {} #(t,k_h,i,j) -> mip.Var
+        self.keys = {} #index of the mip.Var in the model -> (t,k_h,i,j)
+        self.out_arcs = {} #(t,k_h,i) -> list of (j,mip.Var)
+        self.in_arcs = {} #(t,k_h,j) -> list of (i,mip.Var)
+        self.vehicle_arcs = {} #(t,k_h) -> list of (i,j,mip.Var)
+        self.vehicle_nodes = {} #(t,k_h) -> nodes (keys) in the order they were added
+
+    def add(self,t,k_h,i,j,var):
+        """
+        Purpose
+            Register the variable of arc (i,j) on day t for truck or technician k_h
+        """
+        self.vars[(t,k_h,i,j)] = var
+        self.keys[var.idx] = (t,k_h,i,j)
+        self.out_arcs.setdefault((t,k_h,i),[]).append((j,var))
+        self.in_arcs.setdefault((t,k_h,j),[]).append((i,var))
+        self.vehicle_arcs.setdefault((t,k_h),[]).append((i,j,var))
+        vehicle_nodes = self.vehicle_nodes.setdefault((t,k_h),{})
+        vehicle_nodes.setdefault(i)
+        vehicle_nodes.setdefault(j)
+
+    def get(self,t,k_h,i,j):
+        """
+        Purpose
+            Get the variable of arc (i,j) on day t for truck or technician k_h, None if the arc does not exist
+        """
+        return self.vars.get((t,k_h,i,j))
+
+    def index(self,var):
+        """
+        Purpose
+            Get the index (t,k_h,i,j) of a variable
+        """
+        return self.keys[var.idx]
+
+    def arcs(self,t,k_h):
+        """
+        Purpose
+            Get all arcs (i,j,mip.Var) of truck or technician k_h on day t
+        """
+        return self.vehicle_arcs.get((t,k_h),[])
+
+    def arcs_out(self,t,k_h,i):
+        """
+        Purpose
+            Get the arcs (j,mip.Var) that leave node i for truck or technician k_h on day t
+        """
+        return self.out_arcs.get((t,k_h,i),[])
+
+    def arcs_in(self,t,k_h,j):
+        """
+        Purpose
+            Get the arcs (i,mip.Var) that enter node j for truck or technician k_h on day t
+        """
+        return self.in_arcs.get((t,k_h,j),[])
+
+    def nodes(self,t,k_h):
+        """
+        Purpose
+            Get the nodes that truck or technician k_h can visit on day t
+        """
+        return list(self.vehicle_nodes.get((t,k_h),{}))
+
+    def arrays(self):
+        """
+        Purpose
+            Get the arcs as numpy arrays (t, k_h, i, j, index of the mip.Var in the model), in the order they were added
+        """
+        keys = np.array(list(self.vars.keys()),dtype=np.int64).reshape(-1,4)
+        cols = np.array([var.idx for var in self.vars.values()],dtype=np.int64)
+        return keys[:,0],keys[:,1],keys[:,2],keys[:,3],cols
+
+    def __len__(self):
+        return len(self.vars)
+
+    def __iter__(self):
+        return iter(self.vars.items())
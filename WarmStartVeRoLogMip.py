@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Start the MILP from a feasible schedule instead of a cold start. A schedule (routes per day of the trucks and the
+    technicians, see the ScheduleVeRoLog file) is translated into values of all decision variables (x, y, u, v, p, q, z, l
+    and w) through the variable structures of create_decisions_variables() of the RunMILPVeRoLogMip file. Every constraint
+    family is checked for these values while it is added to the model (see add_constraints() of the RunMILPVeRoLogMip
+    file) and the values are only given to the solver (opt_model.start) if no constraint is violated.
+"""
+###########################################################
+### imports
+import logging
+import os
+import numpy as np
+import mip as mip
+from GreedyHeuristicVeRoLog import greedy_schedule #from local repository
+from ScheduleVeRoLog import read_solution_schedule #from local repository
+###########################################################
+###
+def start_schedule(warm_start,instance_file_name,DAYS,technicians,trucks,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,
+                   start_delivery_window,end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,
+                   distance_matrix,TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,record=None):
+    """
+    Purpose
+        Get the schedule to start the optimization from, the input is the output of read_file()
+    Input
+        warm_start, str: "greedy" for the schedule of the greedy heuristic, or a solution file or a directory with solution
+            files for the best valid solution
+        instance_file_name, str: filename of the VeRoLog instance in txt form, used to check the solution files
+        DAYS, ..., TECHNICIAN_COST: the data of the instance (see greedy_schedule() in the GreedyHeuristicVeRoLog file)
+        record, dict: the solution file and its cost are added to this record of the trace (None for no record)
+    Output
+        schedule, Schedule: the truck and technician routes, a ValueError is raised if there is no schedule
+    """
+    if warm_start == "greedy":
+        return greedy_schedule(DAYS,technicians,customer_nodes,customer_machine_types,machine_size,machine_penalty,customer_order_size,start_delivery_window,
+                               end_delivery_window,technician_max_visits,technician_max_distance,eligibility,TRUCK_MAX_DISTANCE,TRUCK_CAPACITY,distance_matrix,
+                               TECHNICIAN_DISTANCE_COST,TECHNICIAN_DAY_COST,TECHNICIAN_COST,len(trucks))
+    if not os.path.exists(warm_start):
+        raise ValueError("Unknown warm start: {0}".format(warm_start))
+    schedule,solution_file,cost = read_solution_schedule(warm_start,instance_file_name)
+    if schedule is None:
+        raise ValueError("No valid solution of {0} in {1}".format(instance_file_name,warm_start))
+    print("Start from solution file {0} with cost {1}".format(solution_file,cost))
+    if record is not None:
+        record.update(solution_file=solution_file,cost=cost)
+    return schedule
+###########################################################
+###
+def schedule_to_values(schedule,num_cols,x,y,w,u,v,p,q,z,l,DAYS,technicians,trucks,customer_nodes,order_volume,tech_customer_position):
+    """
+    Purpose
+        Translate a schedule into the values of the decision variables of the MILP
+    Input
+        schedule, Schedule: routes per day of the trucks and technicians
+        num_cols, int: number of columns (decision variables) of the model
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
+        w, mip.Var: decision variable indicating if on day t technician h has worked for 5 days in a row
+        u, mip.Var: decision variable for calculation of the number of trucks used in the problem
+        v, mip.Var: decision variable for calculation of the number of truck days in the problem
+        p, mip.Var: decision variable for calculation of the number of technicians used in the problem
+        q, mip.Var: decision variable for calculation of the number of technician days in the problem
+        z, mip.Var: decision variable for cumulative load on day t, in truck k, delivering to customer j
+        l, mip.Var: decision variable for cumulative load on day t, for technician h, installing at customer j
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        trucks, list: trucks in the problem
+        customer_nodes, dict: nodes (keys) and coordinates (values) of the customers
+        order_volume, numpy array: ordersize times machine size of each customer
+        tech_customer_position, list: for each technician the position (values) of each customer node (keys) in tech_customers
+    Output
+        values, numpy array: value of each decision variable (indexed by column index)
+    """
+    values = np.zeros(num_cols)
+    if schedule.truck_routes[DAYS-1] or schedule.tech_routes[0]:
+        raise ValueError("The schedule delivers on the last day or installs on the first day")
+    for t in range(DAYS-1):
+        for k,route in schedule.truck_routes[t].items():
+            if k not in trucks:
+                raise ValueError("Truck {0} on day {1} is not in the model ({2} trucks)".format(k+1,t+1,len(trucks)))
+            path = [0] + list(route) + [0]
+            load = 0
+            for a,b in zip(path[:-1],path[1:]):
+                var = x.get(t,k,a,b)
+                if var is None:
+                    raise ValueError("Truck {0} drives from {1} to {2} on day {3}, this arc is not in the model".format(k+1,a,b,t+1))
+                values[var.idx] = 1
+                load = 0 if b == 0 else load + order_volume[b-1]
+                if b != 0:
+                    values[z[t][k][b-1].idx] = load
+            values[u[k].idx] = 1
+            values[v[t][k].idx] = 1
+    home = {h: len(customer_nodes)+1+h for h in technicians}
+    worked = np.zeros((DAYS-1,len(technicians)))
+    #the index t of y, q and l is the day t+1 in the horizon
+    for t in range(DAYS-1):
+        for h,route in schedule.tech_routes[t+1].items():
+            path = [home[h]] + list(route) + [home[h]]
+            for a,b in zip(path[:-1],path[1:]):
+                var = y.get(t,h,a,b)
+                if var is None:
+                    raise ValueError("Technician {0} drives from {1} to {2} on day {3}, this arc is not in the model".format(h+1,a,b,t+2))
+                values[var.idx] = 1
+            for visits,j in enumerate(route):
+                values[l[t][h][tech_customer_position[h][j]].idx] = visits + 1
+            values[p[h].idx] = 1
+            values[q[t][h].idx] = 1
+            worked[t,h] = 1
+    for t in range(len(w)):
+        for h in technicians:
+            values[w[t][h].idx] = 1 if worked[t:t+5,h].sum() == 5 else 0
+    return values
+###########################################################
+###
+def family_violations(family,values,tolerance=1e-6):
+    """
+    Purpose
+        Find the rows of a constraint family that are violated by the values of the decision variables
+    Input
+        family, ConstraintFamily: the constraint family
+        values, numpy array: value of each decision variable (indexed by column index)
+        tolerance, float: allowed violation
+    Output
+        rows, numpy array: the violated rows of the family
+    """
+    activity = family.activity(values)
+    if family.sense == mip.LESS_OR_EQUAL:
+        return np.flatnonzero(activity > family.rhs + tolerance)
+    if family.sense == mip.GREATER_OR_EQUAL:
+        return np.flatnonzero(activity < family.rhs - tolerance)
+    return np.flatnonzero(np.abs(activity - family.rhs) > tolerance)
+###########################################################
+###
+class StartCheck(object):
+    """
+    Purpose
+        Check the values of a start solution against every constraint family that is added to the model
+    Input
+        values, numpy array: value of each decision variable (indexed by column index)
+    """
+    def __init__(self,values):
+        self.values = values
+        self.violations = {} #(name,day) of the family -> violated rows
+        self.families = 0
+
+    def check(self,family):
+        """
+        Purpose
+            Check a constraint family, the violated rows are logged and stored
+        """
+        self.families += 1
+        rows = family_violations(family,self.values)
+        if len(rows):
+            self.violations[(family.name,family.day)] = rows
+            logging.warning("The start solution violates {0} rows of {1} (for example {2})".format(len(rows),family.row_prefix(),family.row_names()[rows[0]]))
+
+    @property
+    def feasible(self):
+        return not self.violations
+###########################################################
+###
+def start_objective_value(opt_model,values):
+    """
+    Purpose
+        Calculate the objective value of the start solution
+    Input
+        opt_model, mip.model: model we are optimizing (with the objective function)
+        values, numpy array: value of each decision variable (indexed by column index)
+    Output
+        objective_value, float: value of the objective function
+    """
+    return opt_model.objective.const + sum(coefficient*values[var.idx] for var,coefficient in opt_model.objective.expr.items())
+###########################################################
+###
+def set_start(opt_model,values):
+    """
+    Purpose
+        Give the values of the integer decision variables to the solver as start solution (the continuous variables are
+        calculated by the solver)
+    Input
+        opt_model, mip.model: model we are optimizing
+        values, numpy array: value of each decision variable (indexed by column index)
+    Output
+    """
+    opt_model.start = [(opt_model.vars[int(i)],float(values[i])) for i in np.flatnonzero(values) if opt_model.vars[int(i)].var_type != mip.CONTINUOUS]
@@ -4,141 +4,250 @@ Created on Fri Apr  9 00:42:29 2021
 
 Purpose
     Create a solution file for the MILP for a given VeRoLog instance. Note that the functions in this file will be called
-    from the RunMILPVeRoLog file.
+    from the RunMILPVeRoLog file. The solution values of all decision variables are read once into numpy arrays, the cost
+    items and the routes are calculated from these arrays, the files are written atomically and the solution can also be
+    exported as JSON (cost items and routes) and NPZ (solution arrays) file.
 
 @author: 31640
 """
 ###########################################################
 ### imports
-import mip as mip
+import json
+import logging
+import os
+import numpy as np
 ###########################################################
 ### 
-def add_nodes_to_route(t,k_h,var,outgoing_node,route, route_length, home):
+def solution_vector(opt_model):
     """
     Purpose
-        Add nodes to the route by recursively calling this function, the function tries to find the node where the
-        outgoing node is travelling to, it will add it to the route and will repeat the same thing for this node, untill
-        the route surpasses the total length of the route on the day (function is called in find_truck_route()
-        and find_tech_route())
+        Read the solution values of all decision variables of the model in one pass
     Input
-        t, int: index of day under consideration
-        k_h, int: truck or technician under consideration
-        var, list: containing the solution of all the mip variables for x or y in the problem        
-        outgoing_node, str: node were the truck or technician is departing from
-        route, str: (partial) route for truck k or technician h on day t
-        route_length, float: length of the route
-        home, int: home location of technician or depot in case of trucks
+        opt_model, mip.model: the optimized model
+    Output
+        values, numpy array: solution value of each column of the model (0 if the model has no solution)
+    """
+    return np.array([0.0 if var.x is None else var.x for var in opt_model.vars],dtype=np.float64)
+###########################################################
+### 
+def arc_values(var,values):
+    """
+    Purpose
+        Get the solution values of all arcs of x or y
+    Input
+        var, ArcVariables: the mip variables for x or y in the problem
+        values, numpy array: solution value of each column of the model (see solution_vector())
+    Output
+        t, k_h, i, j, numpy array: index of the day, truck or technician and the nodes of each arc
+        values, numpy array: solution value of each arc
+    """
+    t,k_h,i,j,cols = var.arrays()
+    return t,k_h,i,j,values[cols]
+###########################################################
+### 
+def solution_arrays(values,x,y,u,v,p,q,DAYS,technicians,trucks):
+    """
+    Purpose
+        Lay out the solution values of the decision variables as numpy arrays, the arcs of x and y as arrays of
+        (t, k or h, i, j, value)
+    Input
+        values, numpy array: solution value of each column of the model (see solution_vector())
+        x, ..., q: the decision variables (see create_solution_file())
+        DAYS, int: number of days in the horizon
+        technicians, list: technicians in the problem
+        trucks, list: trucks in the problem
     Output
-        route, str: (partial) route for truck k or technician h on day t
-    """
-    for i in range(len(var[t][k_h])):
-        break_second_loop = 0
-        for j in range(len(var[t][k_h][i])): #if edge (i,j) was travelled, then j will be the new outgoing node
-            if var[t][k_h][i][j].x > 0.99 and var[t][k_h][i][j].name.split("_")[3] == outgoing_node:
-                #filter out nodes that have been visited before (unless it's the home location)
-                if var[t][k_h][i][j].name.split("_")[4] not in route[len(str(k_h)):] or var[t][k_h][i][j].name.split("_")[4] == str(home):
-                    outgoing_node = var[t][k_h][i][j].name.split("_")[4]
-                    break_second_loop = 1
-                    break
-        if break_second_loop == 1:
-            break        
-              
-    route += outgoing_node + " "
-    if len(route.split(" ")) < route_length+2: #route length + technician/truck id + home location/depot
-        route = add_nodes_to_route(t,k_h,var,outgoing_node,route,route_length,home)
-    
-    return route
+        arrays, dict: name (keys) and numpy array (values) of the solution, x_t, x_k, x_i, x_j, x_value, y_t, y_h, y_i, y_j,
+            y_value, u (truck), v (day, truck), p (technician) and q (day, technician)
+    """
+    arrays = {}
+    for name,vehicle,var in (("x","k",x),("y","h",y)):
+        for key,array in zip(("t",vehicle,"i","j","value"),arc_values(var,values)):
+            arrays[name+"_"+key] = array
+    arrays["u"] = values[np.array([var.idx for var in u],dtype=np.int64)]
+    arrays["v"] = values[np.array([[var.idx for var in v_t] for v_t in v],dtype=np.int64).reshape(DAYS-1,len(trucks))]
+    arrays["p"] = values[np.array([var.idx for var in p],dtype=np.int64)]
+    arrays["q"] = values[np.array([[var.idx for var in q_t] for q_t in q],dtype=np.int64).reshape(DAYS-1,len(technicians))]
+    return arrays
 ###########################################################
 ### 
-def find_tech_route(t,h,y,tech_home):
+def expression_value(expression,values):
     """
     Purpose
-        Find the route of technician h on day t, note that the technician will be indexed starting from 1 instead of 0 and that 
-        the technicians must start and end each route at home so this is not explicitely mentioned in the solution format
+        Calculate the value of a linear expression in the solution
     Input
-        t, int: index of day under consideration
-        h, int: technician under consideration
-        y, list: containing the solution of all the mip variables for y in the problem
-        tech_home, int: technicians home location
+        expression, mip.entities.LinExpr: linear expression of decision variables (or its value, for example calculated
+            from the objective coefficients of a model file)
+        values, numpy array: solution value of each column of the model (see solution_vector())
     Output
-        tech_route, str: route for technician h on day t
-    """
-    outgoing_node = str(tech_home) #start at the home location
-    tech_route = str(h+1) + " " #the route start with the technician id (indexing starts at 1 in solution file)
-    route_length = mip.xsum(y[t][h][i][j] for i in range(len(y[t][h])) for j in range(len(y[t][h][i]))).x
-   # print(t,h,outgoing_node,tech_route,route_length)
-    if route_length >= 2:
-        tech_route = add_nodes_to_route(t,h,y,outgoing_node,tech_route,route_length,tech_home)
-        #remove home location from route, if a feasible solution was found where the technician does travel home before moving to the next customer, the total cost calculated in the algorithm can be different from the cost calculated by the SolutionVerolog2019.py file, because the intermediate visit to home has been skipped such that the maximum number of visits is not exceeded in the solution
-        #this is not cosidered a problem because in an optimal route the technician will not visit home before moving to the next customer, since it is highly inefficient
-        tech_route = tech_route.replace(str(tech_home)+" ","") 
-    else:
-        print("Warning, this route makes no sense. Technician: ",h,"Day: ",t)
-    
-    return tech_route
+        value, float: value of the expression
+    """
+    if not hasattr(expression,"expr"):
+        return float(expression)
+    cols = np.array([var.idx for var in expression.expr],dtype=np.int64)
+    coefficients = np.array(list(expression.expr.values()),dtype=np.float64)
+    return float(coefficients @ values[cols] + expression.const)
 ###########################################################
 ### 
-def find_truck_route(t,k,x):
+def solution_kpis(arrays,distance_matrix,objective_value,penalty_value):
     """
     Purpose
-        Find the route of truck k on day t, note that the truck will be indexed starting from 1 instead of 0 and 
-        that the trucks must start and end each route at the depot so this is not explicitely mentioned in the solution format
+        Calculate the cost items of the solution file from the solution arrays
     Input
-        t, int: index of day under consideration
-        k, int: truck under consideration
-        x, list: containing the solution of all the mip variables for x in the problem
+        arrays, dict: the solution arrays (see solution_arrays())
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        objective_value, float: value of the objective function
+        penalty_value, float: value of the total penalty cost
     Output
-        truck_route, str: route for truck k on day t
-    """
-    outgoing_node = str(0) #start at the depot
-    truck_route = str(k+1) + " " #the route start with the truck index (indexing starts at 1 in solution file)
-    route_length = mip.xsum(x[t][k][i][j] for i in range(len(x[t][k])) for j in range(len(x[t][k][i]))).x
-    
-    if route_length >= 2:  
-        truck_route = add_nodes_to_route(t,k,x,outgoing_node,truck_route,route_length,0)
-        truck_route = truck_route[0:len(truck_route)-len(" 0")] #remove depot at the end
-    else:
-        print("Warning, this route makes no sense. Truck: ",k,"Day: ",t)
-    
-    return truck_route
+        kpis, dict: the cost items of the solution file (the same keys as calculate_cost() of the ScheduleVeRoLog file)
+    """
+    distances = np.asarray(distance_matrix)
+    return {"TRUCK_DISTANCE": int(round(arrays["x_value"] @ distances[arrays["x_i"],arrays["x_j"]])),
+            "NUMBER_OF_TRUCK_DAYS": int(round(arrays["v"].sum())),"NUMBER_OF_TRUCKS_USED": int(round(arrays["u"].sum())),
+            "TECHNICIAN_DISTANCE": int(round(arrays["y_value"] @ distances[arrays["y_i"],arrays["y_j"]])),
+            "NUMBER_OF_TECHNICIAN_DAYS": int(round(arrays["q"].sum())),"NUMBER_OF_TECHNICIANS_USED": int(round(arrays["p"].sum())),
+            "IDLE_MACHINE_COSTS": int(round(penalty_value)),"TOTAL_COST": int(round(objective_value))}
 ###########################################################
 ### 
-def calc_edge_cost(var,t,k_h,i,j,edges_index,cost_edges):
-    """
-    Purpose,
-        Calculate the cost to travel an edge given the variable (x or y) and it's index (t,k or h,i,j)
-    Input,
-        var, mip.Var: the variable we are looking at (x or y)
-        t, int: the index of the day
-        k_h, int, the index of the truck (k) or the technician (h)
-        i, int: the index of the node we are leaving
-        j, int: the index of the node we are entering
-        edges_index, dict: indicating the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: indicating the cost for each edge
-    Output,
-        edge_cost, cost to travel over this edge
-    """
-    var_name = var[t][k_h][i][j].name
-    var_name_split = var_name.split('_')
-    outgoing_node =  int(var_name_split[3])
-    incoming_node = int(var_name_split[4])
-    edge_index = edges_index[(outgoing_node,incoming_node)]
-    edge_cost = cost_edges[edge_index[0]][edge_index[1]]
-    
-    return edge_cost
+def vehicle_routes(arcs,name,num_nodes,start_nodes,tolerance=1e-4):
+    """
+    Purpose
+        Find the routes of all trucks or technicians on all days. The arcs in the solution give a successor array per truck
+        or technician and day, every trip is followed from the depot or home until it returns there. Fractional arcs,
+        nodes that are left twice, trips that do not return and subtours (arcs in the solution that are not reached from
+        the depot or home) are reported as problems instead of being written as a route
+    Input
+        arcs, tuple: t, k_h, i, j and values of the arcs of x or y (see arc_values())
+        name, str: "x" or "y"
+        num_nodes, int: number of nodes in the problem
+        start_nodes, numpy array: depot or home location of each truck or technician
+        tolerance, float: an arc with a value further than the tolerance from 0 and 1 is fractional
+    Output
+        routes, dict: (t,k_h) (keys) and the visited nodes (values) of each truck or technician that drives on a day, the
+            trips of a truck are separated by the depot
+        problems, list: description of each problem in the solution
+    """
+    t,k_h,i,j,values = arcs
+    problems = ["fractional arc {0}_{1}_{2}_{3}_{4} = {5:g}".format(name,*arc,value)
+                for *arc,value in zip(t.tolist(),k_h.tolist(),i.tolist(),j.tolist(),values.tolist()) if tolerance < value < 1-tolerance]
+    used = values > 0.5
+    t,k_h,i,j = t[used],k_h[used],i[used],j[used]
+    order = np.lexsort((k_h,t))
+    t,k_h,i,j = t[order],k_h[order],i[order],j[order]
+    #first arc of each truck or technician and day, no routes if no arc is in the solution
+    bounds = np.flatnonzero(np.r_[len(t) > 0,(t[1:] != t[:-1]) | (k_h[1:] != k_h[:-1]),True])
+    routes = {}
+    successor = np.full(num_nodes,-1,dtype=np.int64)
+    for first,last in zip(bounds[:-1],bounds[1:]):
+        day,vehicle = int(t[first]),int(k_h[first])
+        start_node = int(start_nodes[vehicle])
+        tails,heads = i[first:last],j[first:last]
+        at_start = tails == start_node
+        twice = np.flatnonzero(np.bincount(tails[~at_start],minlength=num_nodes) > 1)
+        if len(twice):
+            problems.append("{0}_{1}_{2} leaves nodes {3} more than once".format(name,day,vehicle,twice.tolist()))
+        successor[tails[~at_start]] = heads[~at_start]
+        visited = set()
+        route = []
+        for node in heads[at_start].tolist():
+            trip = []
+            while node != start_node and node >= 0 and node not in visited:
+                visited.add(node)
+                trip.append(node)
+                node = int(successor[node])
+            if node != start_node:
+                problems.append("{0}_{1}_{2} does not return to node {3} after nodes {4}".format(name,day,vehicle,start_node,trip))
+            route += ([start_node] if route else []) + trip
+        subtour = sorted(set(tails[~at_start].tolist()) - visited)
+        if subtour:
+            problems.append("{0}_{1}_{2} has a subtour with nodes {3}".format(name,day,vehicle,subtour))
+        successor[tails] = -1
+        if route:
+            routes[(day,vehicle)] = route
+    return routes,problems
 ###########################################################
 ### 
-def create_solution_file(file_name,instance,objective_func,c_penalty,x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,edges_index,cost_edges):
+def format_route(k_h,route,start_node,keep_start):
     """
     Purpose
-        Create a solution file for the optimized model
+        Write the route of a truck or technician in the format of the solution file, note that the truck or technician is
+        indexed starting from 1 instead of 0 and that the route starts and ends at the depot or home, so this is not
+        explicitely mentioned in the solution format
+    Input
+        k_h, int: truck or technician under consideration
+        route, list: visited nodes (see vehicle_routes())
+        start_node, int: depot or home location
+        keep_start, bool: keep the returns to the depot between the trips of a truck, a technician that travels home
+            before moving to the next customer is written without the intermediate visit to home (this is never optimal)
+    Output
+        route, str: route for truck k or technician h on a day
+    """
+    return " ".join(str(node) for node in [k_h+1] + [node for node in route if keep_start or node != start_node])
+###########################################################
+### 
+def atomic_write(file_name,write,binary=False):
+    """
+    Purpose
+        Write a file atomically: the content is written to a temporary file in the same directory, which replaces the file
+        when it is complete, so a reader never sees a partially written file
+    Input
+        file_name, str: name of the file
+        write, function: writes the content to the (buffered) file object
+        binary, bool: open the file in binary mode
+    Output
+    """
+    temporary_file_name = file_name + ".tmp"
+    try:
+        with open(temporary_file_name,"wb" if binary else "w") as file:
+            write(file)
+        os.replace(temporary_file_name,file_name)
+    finally:
+        if os.path.exists(temporary_file_name):
+            os.remove(temporary_file_name)
+###########################################################
+### 
+def export_solution(file_name,instance,arrays,kpis,truck_routes,tech_routes,tolerance=1e-6):
+    """
+    Purpose
+        Export the solution for other tools: a JSON file with the cost items and the routes of each day and a compressed
+        NPZ file with the solution arrays (only the arcs with a positive value)
+    Input
+        file_name, str: name of the solution file (without extension)
+        instance, str: name of file of VeRoLog instance
+        arrays, dict: the solution arrays (see solution_arrays())
+        kpis, dict: the cost items of the solution file (see solution_kpis())
+        truck_routes, tech_routes, dict: the routes of the trucks and technicians (see vehicle_routes())
+        tolerance, float: smallest value of an arc that is exported
+    Output
+    """
+    days = {}
+    for (t,k),route in sorted(truck_routes.items()):
+        days.setdefault(t+1,{"trucks": {},"technicians": {}})["trucks"][k+1] = [int(node) for node in route]
+    for (t,h),route in sorted(tech_routes.items()):
+        days.setdefault(t+2,{"trucks": {},"technicians": {}})["technicians"][h+1] = [int(node) for node in route]
+    solution = {"instance": instance,"cost": kpis,"days": {day: days[day] for day in sorted(days)}}
+    atomic_write(file_name+".json",lambda file: json.dump(solution,file,separators=(",",":")))
+    export = {}
+    for name in ("x","y"):
+        positive = arrays[name+"_value"] > tolerance
+        export.update({key: array[positive] for key,array in arrays.items() if key.startswith(name+"_")})
+    export.update({key: arrays[key] for key in ("u","v","p","q")})
+    atomic_write(file_name+".npz",lambda file: np.savez_compressed(file,**export),binary=True)
+###########################################################
+### 
+def create_solution_file(file_name,instance,objective_func,c_penalty,x,y,u,v,p,q,DAYS,technicians,trucks,technician_nodes,nodes,distance_matrix,values,export=False):
+    """
+    Purpose
+        Create a solution file for the optimized model, the cost items and the routes are calculated from the solution
+        values of the decision variables. If the solution is not a set of routes (see vehicle_routes()) no solution file
+        is written and a ValueError is raised
     Input
         file_name, str: name of the solution file
         instance, name of file of VeRoLog instance
-        objective_func, mip.entities.LinExpr: the objective funtion that was optimized
-        c_penalty, mip.entities.LinExpr: total penalty cost          
-        x, mip.Var: decision variable that indicates if on day t, truck k, drives from node i to j
-        y, mip.Var: decision variable that indicates if on day t, technician h, drives from node i to j
+        objective_func, mip.entities.LinExpr: the objective funtion that was optimized (or its value)
+        c_penalty, mip.entities.LinExpr: total penalty cost (or its value)
+        x, ArcVariables: decision variable that indicates if on day t, truck k, drives from node i to j
+        y, ArcVariables: decision variable that indicates if on day t, technician h, drives from node i to j
         u, mip.Var: decision variable for calculation of the number of trucks used in the problem
         v, mip.Var: decision variable for calculation of the number of truck days in the problem
         p, mip.Var: decision variable for calculation of the number of technicians used in the problem
@@ -148,56 +257,43 @@ def create_solution_file(file_name,instance,objective_func,c_penalty,x,y,u,v,p,q
         trucks, list: trucks in the problem        
         technician_nodes, dict: nodes (keys) and coordinates (values) of the technicians
         nodes, dict: nodes (keys) and coordinates (values) of all nodes in the problem        
-        edges_index, dict: indicating the index in cost_edges (values) for each edge (keys)
-        cost_edges, list: indicating the cost for each edge        
+        distance_matrix, numpy array: the cost to travel from node i to node j is distance_matrix[i][j]
+        values, numpy array: solution value of each column of the model (see solution_vector(), or the values of a cbc
+            solution file)
+        export, bool: also export the solution as JSON and NPZ file (see export_solution())
     Output
+        kpis, dict: the cost items of the solution file
     """
-    file= open(file_name +".txt", 'w')
-    file.write('DATASET = VeRoLog solver challenge 2019\n')
-    file.write('NAME = ' + instance + '\n')
-    
-    TruckDistance = int((mip.xsum(x[t][k][i][j] * calc_edge_cost(x,t,k,i,j,edges_index,cost_edges) for t in range(DAYS-1) for k in trucks for i in range(len(x[t][k])) for j in range(len(x[t][k][i])))).x)
-    TruckDays = int(mip.xsum(v[t][k] for t in range(DAYS-1) for k in trucks).x) 
-    TrucksUsed = int(mip.xsum(u[k] for k in trucks).x)
-    TechDistance = int(mip.xsum(y[t][h][i][j] * calc_edge_cost(y,t,h,i,j,edges_index,cost_edges) for t in range(DAYS-1) for h in technicians for i in range(len(y[t][h])) for j in range(len(y[t][h][i]))).x)
-    TechDays = int(mip.xsum(q[t][h] for t in range(0,DAYS-1) for h in technicians).x)
-    TechsUsed = int(mip.xsum(p[h] for h in technicians).x)
-    IdleMachineCost = int(c_penalty.x)
-    TotalCost = int(objective_func.x)
-    
-    file.write('TRUCK_DISTANCE = '+ str(TruckDistance) +'\n')
-    file.write('NUMBER_OF_TRUCK_DAYS = '+ str(TruckDays) +'\n')
-    file.write('NUMBER_OF_TRUCKS_USED = '+ str(TrucksUsed) +'\n')
-    file.write('TECHNICIAN_DISTANCE = '+ str(TechDistance) +'\n')
-    file.write('NUMBER_OF_TECHNICIAN_DAYS = '+ str(TechDays) +'\n')
-    file.write('NUMBER_OF_TECHNICIANS_USED = '+ str(TechsUsed) +'\n')
-    file.write('IDLE_MACHINE_COSTS = '+ str(IdleMachineCost) +'\n')
-    file.write('TOTAL_COST = '+ str(TotalCost) +'\n')
-    
+    arrays = solution_arrays(values,x,y,u,v,p,q,DAYS,technicians,trucks)
+    kpis = solution_kpis(arrays,distance_matrix,expression_value(objective_func,values),expression_value(c_penalty,values))
+    lines = ['DATASET = VeRoLog solver challenge 2019','NAME = ' + instance]
+    lines += [item + ' = ' + str(value) for item,value in kpis.items()]
+
+    #routes of all trucks and technicians from the successors of the arcs in the solution
+    tech_home = np.array([len(nodes)-len(technician_nodes)+h for h in technicians],dtype=np.int64)
+    truck_routes,truck_problems = vehicle_routes(tuple(arrays["x_"+key] for key in ("t","k","i","j","value")),"x",len(nodes),np.zeros(len(trucks),dtype=np.int64))
+    tech_routes,tech_problems = vehicle_routes(tuple(arrays["y_"+key] for key in ("t","h","i","j","value")),"y",len(nodes),tech_home)
+    problems = truck_problems + tech_problems
+    for problem in problems:
+        print("The solution is not a set of routes:",problem)
+        logging.error("Solution file {0}: {1}".format(file_name,problem))
+    if problems:
+        raise ValueError("The solution of {0} is not a set of routes ({1} problems)".format(file_name,len(problems)))
 
-    #in solution file the day numbering starts at 1
-    for t in range(DAYS-1):
-        file.write('\n')
-        file.write('DAY = '+str(t+1)+'\n')
-        file.write('NUMBER_OF_TRUCKS = '+str(int(mip.xsum(v[t][k] for k in trucks).x))+'\n')
-        for k in trucks:
-            if v[t][k].x > 0.99:
-                file.write(find_truck_route(t,k,x)+'\n')
-        if t > 0:
-            file.write('NUMBER_OF_TECHNICIANS = '+str(int(mip.xsum(q[t-1][h] for h in technicians).x))+'\n')
-            for h in technicians:
-                if q[t-1][h].x > 0.99:
-                    file.write(find_tech_route(t-1,h,y,len(nodes)-len(technician_nodes)+h)+'\n')            
-        else:
-            file.write('NUMBER_OF_TECHNICIANS = 0'+'\n') #never installation of first day
-    file.write('\n')        
-    file.write('DAY = '+str(DAYS)+'\n')
-    file.write('NUMBER_OF_TRUCKS = 0'+'\n') #never delivery on last day
-    file.write('NUMBER_OF_TECHNICIANS = '+ str(int(mip.xsum(q[DAYS-2][h] for h in technicians).x))+'\n')
-    for h in technicians:
-        if q[DAYS-2][h].x > 0.99:
-            file.write(find_tech_route(DAYS-2,h,y,len(nodes)-len(technician_nodes)+h)+'\n')      
-    
+    #in solution file the day numbering starts at 1, the installations of index t are on day t+2
+    for day in range(1,DAYS+1):
+        lines.append('')
+        lines.append('DAY = '+str(day))
+        trucks_day = [k for k in trucks if (day-1,k) in truck_routes] #never delivery on last day
+        lines.append('NUMBER_OF_TRUCKS = '+str(len(trucks_day)))
+        lines += [format_route(k,truck_routes[(day-1,k)],0,True) for k in trucks_day]
+        technicians_day = [h for h in technicians if (day-2,h) in tech_routes] #never installation on first day
+        lines.append('NUMBER_OF_TECHNICIANS = '+str(len(technicians_day)))
+        lines += [format_route(h,tech_routes[(day-2,h)],tech_home[h],False) for h in technicians_day]
+    atomic_write(file_name+".txt",lambda file: file.write('\n'.join(lines)+'\n'))
+    if export:
+        export_solution(file_name,instance,arrays,kpis,truck_routes,tech_routes)
+    return kpis
 ###########################################################
 ### main
 def main():
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Shared fixtures of the tests. The tests run on the small test instance in the data directory (2 trucks, optimal total
+    cost 1955) or on small seeded instances of the InstanceGeneratorVeRoLog file and import the python files of the
+    repository from the parent directory
+
+    Example
+        python -m pytest -q tests
+"""
+###########################################################
+### imports
+import os
+import sys
+import pytest
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ReadVeRoLogInstances import read_file #from local repository
+from InstanceGeneratorVeRoLog import generate_instance, write_generated_instance #from local repository
+###########################################################
+###
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),"data")
+#names of the output of read_file()
+READ_FILE_OUTPUT = ("DAYS","technicians","trucks","machines","customers","customer_machine_types","machine_size","machine_penalty","customer_order_size",
+                    "start_delivery_window","end_delivery_window","technician_max_visits","technician_max_distance","technician_skill_set","TRUCK_MAX_DISTANCE",
+                    "TRUCK_CAPACITY","LARGE_NUMBER","TRUCK_DISTANCE_COST","TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST",
+                    "TECHNICIAN_COST","depot_node","customer_nodes","technician_nodes","nodes","x_nodes","distance_matrix","eligibility","tech_customers",
+                    "tech_customer_position")
+###########################################################
+###
+@pytest.fixture
+def test_instance():
+    """
+    Purpose
+        Get the filenames of the test instance in txt and csv form
+    """
+    return os.path.join(DATA_DIR,"testInstance.txt"),os.path.join(DATA_DIR,"testInstance.csv")
+
+@pytest.fixture
+def read_instance():
+    """
+    Purpose
+        Get a function that reads an instance with read_file() into a dict with the names of the output of read_file()
+    """
+    def read(csv_file,number_of_trucks=2):
+        return dict(zip(READ_FILE_OUTPUT,read_file(csv_file,number_of_trucks)))
+    return read
+
+@pytest.fixture
+def generated_instance(tmp_path):
+    """
+    Purpose
+        Get a function that generates a seeded instance (see generate_instance()) and returns its txt and csv filenames
+    """
+    def generate(number_of_requests,number_of_technicians,number_of_machine_types=2,days=5,seed=3,**options):
+        instance = generate_instance(number_of_requests,number_of_technicians,number_of_machine_types,days,seed,**options)
+        return write_generated_instance(instance,str(tmp_path / (instance.Name+".txt")))
+    return generate
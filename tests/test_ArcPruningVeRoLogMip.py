@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the arc pruning of the ArcPruningVeRoLogMip file: the arcs that are removed by the delivery windows, the
+    distance (triangle inequality) and the capacity, and the arcs of feasible routes that must be kept
+"""
+###########################################################
+### imports
+import numpy as np
+import pytest
+from GreedyHeuristicVeRoLog import greedy_schedule #from local repository
+from ArcPruningVeRoLogMip import service_days, feasible_truck_arcs, feasible_tech_arcs, prune_arcs #from local repository
+###########################################################
+###
+PRUNING_DATA = ("DAYS","technicians","trucks","x_nodes","tech_customers","customer_nodes","customer_order_size","machine_size","customer_machine_types",
+                "start_delivery_window","end_delivery_window","technician_max_distance","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","distance_matrix")
+GREEDY_DATA = ("DAYS","technicians","customer_nodes","customer_machine_types","machine_size","machine_penalty","customer_order_size","start_delivery_window",
+               "end_delivery_window","technician_max_visits","technician_max_distance","eligibility","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","distance_matrix",
+               "TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+#depot (node 0) and customers 1 to 3 on a line at 0, 1, 2 and 5, the home of technician 0 (node 4) at 3
+POSITION = np.array([0,1,2,5,3])
+DISTANCE_MATRIX = np.abs(POSITION[:,None] - POSITION[None,:])
+
+def test_service_days():
+    delivery_days,installation_days = service_days(6,{1: None,2: None},[0,2],[1,4])
+    assert delivery_days == {1: range(0,2),2: range(2,5)}
+    assert installation_days == {1: range(0,5),2: range(2,5)}
+    delivery_days,installation_days = service_days(6,{1: None,2: None})
+    assert delivery_days == installation_days == {1: range(5),2: range(5)}
+
+def test_truck_arcs_over_distance_and_capacity():
+    within_distance,within_capacity = feasible_truck_arcs(DISTANCE_MATRIX,3,[2,3,1],10,4)
+    assert within_distance.shape == within_capacity.shape == (4,4)
+    #every trip to customer 3 is 10 long, from customer 1 or 2 to customer 3 and back to the depot is 10 as well
+    assert within_distance.all()
+    within_distance,within_capacity = feasible_truck_arcs(DISTANCE_MATRIX,3,[2,3,1],9,4)
+    assert within_distance[:3,:3].all() and not within_distance[0,3] and not within_distance[3,1]
+    #customers 1 and 2 together (volume 5) do not fit in the truck
+    assert not within_capacity[1,2] and not within_capacity[2,1]
+    assert within_capacity[1,3] and within_capacity[0,2] and within_capacity[2,3]
+
+def test_tech_arcs_over_distance():
+    within_distance = feasible_tech_arcs(DISTANCE_MATRIX,[0],3,[6])
+    assert len(within_distance) == 1 and within_distance[0].shape == (5,5)
+    #home, 3, home is 4 and home, 1, home is 4, home, 1, 3, home is 10
+    assert within_distance[0][4,3] and within_distance[0][4,1] and within_distance[0][2,1]
+    assert not within_distance[0][1,3] and not within_distance[0][3,1]
+
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_routes_of_greedy_schedule_are_kept(generated_instance,read_instance,seed):
+    txt_file,csv_file = generated_instance(30,10,2,10,seed)
+    data = read_instance(csv_file)
+    truck_arcs,tech_arcs = prune_arcs(*[data[name] for name in PRUNING_DATA])
+    num_customers = len(data["customer_nodes"])
+    assert not truck_arcs.all()
+    schedule = greedy_schedule(*[data[name] for name in GREEDY_DATA])
+    for t in range(data["DAYS"]):
+        for k,route in schedule.truck_routes[t].items():
+            route = [0] + route + [0]
+            assert all(truck_arcs[route[n],route[n+1]] for n in range(len(route)-1))
+        for h,route in schedule.tech_routes[t].items():
+            home = num_customers+1+h
+            route = [home] + route + [home]
+            assert all(tech_arcs[h][route[n],route[n+1]] for n in range(len(route)-1))
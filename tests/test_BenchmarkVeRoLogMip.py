@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the BenchmarkVeRoLogMip file: the stages of the test instance and the fit of the scaling exponents
+"""
+###########################################################
+### imports
+import pytest
+from BenchmarkVeRoLogMip import benchmark_instance, fit_scaling_exponents #from local repository
+###########################################################
+###
+def scaled_result(customers,technicians,days):
+    """
+    Purpose
+        Result of benchmark_instance() with the wall time 0.01 * customers^1.5 * days of the constraints stage
+    """
+    return {"customers": customers,"technicians": technicians,"days": days,"stages": {"constraints": {"wall": 0.01 * customers**1.5 * days}}}
+
+def test_exponent_of_one_feature():
+    results = [scaled_result(customers,5,10) for customers in (10,20,40,80)]
+    exponents = fit_scaling_exponents(results,"constraints")
+    assert exponents["customers"] == pytest.approx(1.5)
+    assert "technicians" not in exponents and "days" not in exponents
+    assert exponents["joint"] == {"customers": pytest.approx(1.5)}
+
+def test_joint_exponents():
+    results = [scaled_result(customers,5,days) for customers,days in ((10,5),(20,5),(20,10),(40,20),(80,10))]
+    exponents = fit_scaling_exponents(results,"constraints")
+    assert exponents["joint"] == {"customers": pytest.approx(1.5),"days": pytest.approx(1.0)}
+
+def test_too_few_results():
+    assert fit_scaling_exponents([scaled_result(10,5,10)],"constraints") == {}
+    assert fit_scaling_exponents([scaled_result(10,5,10),scaled_result(20,5,10)],"solve") == {}
+
+def test_benchmark_of_test_instance(tmp_path,test_instance):
+    txt_file,csv_file = test_instance
+    result = benchmark_instance(txt_file,2,60,str(tmp_path))
+    assert (result["customers"],result["technicians"],result["days"],result["trucks"]) == (4,2,6,2)
+    assert result["status"] == "OPTIMAL" and result["objective_value"] == pytest.approx(1955)
+    assert result["valid"] is True
+    assert result["stages"]["validation"]["cost"] == 1955
+    assert {"read","variables","objective","constraints","solve","solution_file"} <= set(result["stages"])
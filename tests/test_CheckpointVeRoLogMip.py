@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the append-only checkpoint of the CheckpointVeRoLogMip file, including the recovery of a checkpoint that was
+    truncated while a constraint family was written
+"""
+###########################################################
+### imports
+import os
+import mip as mip
+import numpy as np
+from ConstraintMatrixVeRoLogMip import ConstraintFamily #from local repository
+from CheckpointVeRoLogMip import ModelCheckpoint, model_fingerprint #from local repository
+from ModelWriterVeRoLogMip import ColumnAllocator #from local repository
+###########################################################
+###
+FAMILIES = [ConstraintFamily("first",0,[0,0,1],[0,2,1],[1.0,2.0,-1.0],mip.LESS_OR_EQUAL,[3.0,0.0]),
+            ConstraintFamily("second",None,[0,1,1,2],[1,0,2,2],[1.0,1.0,1.0,5.0],mip.EQUAL,[1.0,2.0,4.0])]
+
+def same_family(family,other):
+    return ((family.name,family.day,family.sense) == (other.name,other.day,other.sense) and np.array_equal(family.indptr,other.indptr)
+            and np.array_equal(family.indices,other.indices) and np.array_equal(family.data,other.data) and np.array_equal(family.rhs,other.rhs))
+
+def write_checkpoint(directory):
+    checkpoint = ModelCheckpoint(directory,"fingerprint")
+    for family in FAMILIES:
+        checkpoint.append(family)
+    return checkpoint
+
+def test_families_are_read_back(tmp_path):
+    directory = str(tmp_path / "checkpoint")
+    write_checkpoint(directory)
+    checkpoint = ModelCheckpoint(directory,"fingerprint")
+    assert checkpoint.keys() == {("first",0),("second",None)}
+    families = list(checkpoint.families())
+    assert len(families) == 2 and all(same_family(family,other) for family,other in zip(families,FAMILIES))
+
+def test_truncated_family_is_removed(tmp_path):
+    directory = str(tmp_path / "checkpoint")
+    checkpoint = write_checkpoint(directory)
+    #the process stopped while the arrays of the second family were written
+    with open(checkpoint.data_file,"ab") as data:
+        data.truncate(checkpoint.entries[1]["offset"] + 10)
+    recovered = ModelCheckpoint(directory,"fingerprint")
+    assert recovered.keys() == {("first",0)}
+    assert os.path.getsize(recovered.data_file) == recovered.entries[0]["bytes"]
+    with open(recovered.manifest_file) as manifest:
+        assert len(manifest.readlines()) == 1
+    #the build continues after the last complete family
+    recovered.append(FAMILIES[1])
+    families = list(ModelCheckpoint(directory,"fingerprint").families())
+    assert len(families) == 2 and all(same_family(family,other) for family,other in zip(families,FAMILIES))
+
+def test_unfinished_manifest_line_is_removed(tmp_path):
+    directory = str(tmp_path / "checkpoint")
+    checkpoint = write_checkpoint(directory)
+    with open(checkpoint.manifest_file) as manifest:
+        lines = manifest.readlines()
+    with open(checkpoint.manifest_file,"w") as manifest:
+        manifest.write(lines[0] + lines[1][:20])
+    recovered = ModelCheckpoint(directory,"fingerprint")
+    assert recovered.keys() == {("first",0)}
+    assert os.path.getsize(recovered.data_file) == recovered.entries[0]["bytes"]
+
+def test_checkpoint_of_other_model_is_not_resumed(tmp_path):
+    directory = str(tmp_path / "checkpoint")
+    write_checkpoint(directory)
+    checkpoint = ModelCheckpoint(directory,"other fingerprint")
+    assert checkpoint.keys() == set() and list(checkpoint.families()) == []
+    checkpoint.clear()
+    assert not os.path.exists(directory)
+
+def test_fingerprint_of_columns_instance_and_options(tmp_path):
+    allocator = ColumnAllocator("model")
+    for name in "abc":
+        allocator.add_var(name)
+    instance_file = tmp_path / "instance.txt"
+    instance_file.write_text("DAYS = 5\n")
+    fingerprint = model_fingerprint(allocator,str(instance_file),{"symmetry_breaking": False})
+    assert fingerprint == model_fingerprint(allocator,str(instance_file),{"symmetry_breaking": False})
+    assert fingerprint != model_fingerprint(allocator,str(instance_file),{"symmetry_breaking": True})
+    instance_file.write_text("DAYS = 6\n")
+    assert fingerprint != model_fingerprint(allocator,str(instance_file),{"symmetry_breaking": False})
+    columns = model_fingerprint(allocator)
+    allocator.add_var("d")
+    assert columns != model_fingerprint(allocator)
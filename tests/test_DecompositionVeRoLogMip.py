@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the two stage decomposition of the DecompositionVeRoLogMip file, the solution of the test instance is checked
+    with the SolutionVerolog2019 file
+"""
+###########################################################
+### imports
+import json
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from DecompositionVeRoLogMip import DELIVERY_FAMILIES, INSTALLATION_FAMILIES, stage_skip, run_decomposition #from local repository
+###########################################################
+###
+def test_stage_skip():
+    skip = stage_skip(DELIVERY_FAMILIES,4)
+    assert ("truck_day",None) not in skip and ("truck_day",2) not in skip
+    assert {("tech_day",None),("tech_day",0),("tech_day",2),("start_installation_window",1)} <= skip
+    assert ("tech_day",3) not in skip
+    skip = stage_skip(INSTALLATION_FAMILIES,4)
+    assert ("truck_day",0) in skip and ("tech_day",0) not in skip and ("start_installation_window",0) in skip
+
+def test_decomposition_of_test_instance(tmp_path,monkeypatch,test_instance):
+    txt_file,csv_file = test_instance
+    monkeypatch.chdir(tmp_path)
+    output_file_name = str(tmp_path / "decomposition")
+    summary = run_decomposition(csv_file,output_file_name,2,60,instance_file_name=txt_file)
+    assert summary["status"] == "FEASIBLE" and summary["solution_file"] == output_file_name+".txt"
+    solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(txt_file))
+    assert solution.isValid()
+    assert solution.calcCost.Cost == summary["objective_value"] >= 1955
+    with open(output_file_name+"_trace.json") as trace_file:
+        assert json.load(trace_file)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the fleet sizing of the FleetSizingVeRoLogMip file: the lower bound of the number of truck days is checked with
+    hand calculated values and the bounds of the number of trucks with the greedy schedule and the MILP
+"""
+###########################################################
+### imports
+import argparse
+import numpy as np
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from FleetSizingVeRoLogMip import truck_count, truck_days_needed, fleet_lower_bound, fleet_size #from local repository
+from RunMILPVeRoLogMip import run_fleet_sizing #from local repository
+###########################################################
+###
+FLEET_DATA = ("DAYS","technicians","customer_nodes","customer_machine_types","machine_size","machine_penalty","customer_order_size","start_delivery_window",
+              "end_delivery_window","technician_max_visits","technician_max_distance","eligibility","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","distance_matrix",
+              "TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+
+def test_truck_count():
+    assert truck_count("auto") is None
+    assert truck_count("3") == 3
+    for value in ("0","-1","two"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            truck_count(value)
+
+def test_truck_days_needed():
+    assert truck_days_needed(np.array([]),np.array([]),100,5) == 0
+    #3 trips (no two orders fit together) of 20
+    assert truck_days_needed(np.array([3.0,3.0,3.0]),np.array([10.0,10.0,10.0]),100,5) == 1
+    assert truck_days_needed(np.array([3.0,3.0,3.0]),np.array([10.0,10.0,10.0]),50,5) == 2
+    #1 trip of at least 20 (the nearest customer)
+    assert truck_days_needed(np.array([1.0,1.0]),np.array([40.0,10.0]),50,10) == 1
+    #the radial distance 2*50*10/10 + 2*50*10/10 is 200
+    assert truck_days_needed(np.array([10.0,10.0]),np.array([50.0,50.0]),100,10) == 2
+
+def test_fleet_lower_bound():
+    #customers 1 and 2 are delivered on day 0 and need 2 trips of 20, customer 3 is delivered on day 1 or 2
+    lower_bound,daily = fleet_lower_bound(4,{1: None,2: None,3: None},np.array([3.0,3.0,1.0]),[0,0,1],[0,0,2],20,5,np.array([[0,10,10,10]]))
+    assert (lower_bound,daily) == (2,[2,1,1])
+
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_bounds_of_generated_instance(generated_instance,read_instance,seed):
+    txt_file,csv_file = generated_instance(30,10,2,10,seed)
+    lower_bound,upper_bound = fleet_size(*[read_instance(csv_file,1)[name] for name in FLEET_DATA])
+    assert upper_bound is not None and 1 <= lower_bound <= upper_bound
+
+def test_fleet_sizing_of_test_instance(tmp_path,monkeypatch,test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    lower_bound,upper_bound = fleet_size(*[read_instance(csv_file,1)[name] for name in FLEET_DATA])
+    assert 1 <= lower_bound <= upper_bound <= 2
+    monkeypatch.chdir(tmp_path)
+    summary = run_fleet_sizing(csv_file,str(tmp_path / "solution"),60)
+    assert lower_bound <= summary["trucks"] <= upper_bound
+    solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(txt_file))
+    assert solution.isValid() and solution.calcCost.Cost == pytest.approx(summary["objective_value"])
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the greedy heuristic of the GreedyHeuristicVeRoLog file, the schedules are checked with the SolutionVerolog2019
+    file
+"""
+###########################################################
+### imports
+import os
+import numpy as np
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from GreedyHeuristicVeRoLog import cheapest_insertion, greedy_schedule #from local repository
+###########################################################
+###
+GREEDY_DATA = ("DAYS","technicians","customer_nodes","customer_machine_types","machine_size","machine_penalty","customer_order_size","start_delivery_window",
+               "end_delivery_window","technician_max_visits","technician_max_distance","eligibility","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","distance_matrix",
+               "TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+COST_DATA = ("technicians","customer_nodes","customer_machine_types","machine_penalty","customer_order_size","distance_matrix","TRUCK_DISTANCE_COST",
+             "TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+
+def check_greedy_schedule(txt_file,data,directory,max_trucks=None):
+    """
+    Purpose
+        Write the greedy schedule of an instance and check that it is valid with the cost of calculate_cost()
+    """
+    schedule = greedy_schedule(*[data[name] for name in GREEDY_DATA],max_trucks)
+    cost = schedule.calculate_cost(*[data[name] for name in COST_DATA])
+    solution_file = os.path.join(directory,"greedy")
+    schedule.write_solution_file(solution_file,os.path.basename(txt_file),cost)
+    solution = SolutionVerolog2019(solution_file+".txt",InstanceVerolog2019(txt_file))
+    assert solution.isValid()
+    assert solution.calcCost.Cost == cost["TOTAL_COST"]
+    return schedule,cost
+
+def test_cheapest_insertion():
+    #nodes on a line at 0, 1, 2, ..., the depot is node 0
+    position = np.arange(6)
+    distance_matrix = np.abs(position[:,None] - position[None,:])
+    assert cheapest_insertion([],3,0,0,distance_matrix) == (0,6)
+    assert cheapest_insertion([1,4],2,0,0,distance_matrix) == (1,0)
+    assert cheapest_insertion([1,2],5,0,0,distance_matrix) == (1,6)
+
+def test_greedy_schedule_of_test_instance(tmp_path,test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    schedule,cost = check_greedy_schedule(txt_file,read_instance(csv_file),str(tmp_path))
+    assert cost["TOTAL_COST"] >= 1955
+
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_greedy_schedule_of_generated_instance(tmp_path,generated_instance,read_instance,seed):
+    txt_file,csv_file = generated_instance(30,10,2,10,seed)
+    data = read_instance(csv_file)
+    schedule,cost = check_greedy_schedule(txt_file,data,str(tmp_path))
+    #with a maximum number of trucks on a day
+    max_trucks = cost["NUMBER_OF_TRUCKS_USED"]
+    schedule,cost = check_greedy_schedule(txt_file,data,str(tmp_path),max_trucks)
+    assert cost["NUMBER_OF_TRUCKS_USED"] <= max_trucks
+
+def test_too_few_trucks(test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    data = read_instance(csv_file)
+    #all customers are delivered on the first day and a truck can only drive to the furthest customer and back
+    data["start_delivery_window"] = [0]*len(data["customer_nodes"])
+    data["end_delivery_window"] = [0]*len(data["customer_nodes"])
+    data["TRUCK_MAX_DISTANCE"] = max(2*data["distance_matrix"][0][j] for j in data["customer_nodes"])
+    with pytest.raises(ValueError):
+        greedy_schedule(*[data[name] for name in GREEDY_DATA],1)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the seeded instance generator of the InstanceGeneratorVeRoLog file
+"""
+###########################################################
+### imports
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from InstanceGeneratorVeRoLog import generate_instance #from local repository
+###########################################################
+###
+def read_text(file_name):
+    with open(file_name) as instance_file:
+        return instance_file.read()
+
+def test_same_seed_gives_same_instance(generated_instance,tmp_path):
+    txt_file,csv_file = generated_instance(12,4,distribution="clustered")
+    txt,csv = read_text(txt_file),read_text(csv_file)
+    other = tmp_path / "other"
+    other.mkdir()
+    instance = generate_instance(12,4,2,5,3,distribution="clustered")
+    instance.writeInstance(str(other / "same.txt"),False)
+    assert read_text(str(other / "same.txt")) == txt
+    txt_file,csv_file = generated_instance(12,4,seed=4,distribution="clustered")
+    assert read_text(txt_file) != txt and read_text(csv_file) != csv
+
+@pytest.mark.parametrize("distribution",["uniform","clustered"])
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_generated_instance_is_valid(generated_instance,read_instance,distribution,seed):
+    txt_file,csv_file = generated_instance(20,5,3,7,seed,distribution=distribution,skill_density=0.2)
+    instance = InstanceVerolog2019(txt_file)
+    assert instance.isValid()
+    assert (len(instance.Requests),len(instance.Technicians),len(instance.Machines),instance.Days) == (20,5,3,7)
+    data = read_instance(csv_file)
+    #every order fits in a truck and every customer can be reached by a truck and by an eligible technician
+    distances = data["distance_matrix"]
+    for j in data["customer_nodes"]:
+        assert data["customer_order_size"][j-1] * data["machine_size"][data["customer_machine_types"][j-1]] <= data["TRUCK_CAPACITY"]
+        assert 2*distances[0][j] <= data["TRUCK_MAX_DISTANCE"]
+        #the delivery window (index of the day) has at least 2 days and ends before the last day
+        assert 0 <= data["start_delivery_window"][j-1] < data["end_delivery_window"][j-1] < data["DAYS"]-1
+        assert any(j in data["tech_customers"][h] for h in data["technicians"])
+
+def test_too_few_days():
+    with pytest.raises(ValueError):
+        generate_instance(5,2,2,2,0)
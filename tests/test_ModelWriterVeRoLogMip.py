@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the LP and MPS stream writers of the ModelWriterVeRoLogMip file: a small model is read back by python-mip and
+    the model of the test instance is solved with the cbc executable
+"""
+###########################################################
+### imports
+import shutil
+import time
+import mip as mip
+import numpy as np
+import pytest
+from ConstraintMatrixVeRoLogMip import ConstraintFamily #from local repository
+from ModelWriterVeRoLogMip import ColumnAllocator, LPStreamWriter, MPSStreamWriter, write_model_stream, solve_with_cbc, read_cbc_solution #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables #from local repository
+###########################################################
+###
+WRITE_MODEL_DATA = ("DAYS","technicians","trucks","customer_machine_types","machine_size","machine_penalty","customer_order_size","start_delivery_window",
+                    "end_delivery_window","technician_max_visits","technician_max_distance","tech_customers","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","LARGE_NUMBER",
+                    "TRUCK_DISTANCE_COST","TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST","customer_nodes",
+                    "technician_nodes","nodes","x_nodes","distance_matrix")
+
+def write_small_model(writer):
+    """
+    Purpose
+        Write min -3a - 2b + c + 10 with a binary, b integer in [0,5] and c in [1,4], subject to a + b + c <= 6 and
+        c - b >= -2 (the second family also has an empty row 0 >= -1), the optimum is a = 1, b = 3, c = 1 with objective 2
+    """
+    allocator = ColumnAllocator("small")
+    allocator.add_var("a",var_type=mip.BINARY)
+    allocator.add_var("b",ub=5,var_type=mip.INTEGER)
+    allocator.add_var("c",lb=1,ub=4)
+    writer.write_objective(np.array([-3.0,-2.0,1.0]),10.0,allocator.col_names)
+    writer.write_family(ConstraintFamily("capacity",None,[0,0,0],[0,1,2],[1.0,1.0,1.0],mip.LESS_OR_EQUAL,[6.0]))
+    writer.write_family(ConstraintFamily("order",0,[0,0],[1,2],[-1.0,1.0],mip.GREATER_OR_EQUAL,[-2.0,-1.0]))
+    writer.write_columns(allocator.var_types,allocator.lower_bounds,allocator.upper_bounds)
+    writer.close()
+    return writer
+
+@pytest.mark.parametrize("extension,writer_class",[(".lp",LPStreamWriter),(".mps",MPSStreamWriter),(".mps.gz",MPSStreamWriter)])
+def test_small_model_is_read_back(tmp_path,extension,writer_class):
+    file_name = str(tmp_path / ("small"+extension))
+    writer = write_small_model(writer_class(file_name,"small"))
+    assert (writer.num_rows,writer.num_nz) == (3,5)
+    if extension.endswith(".gz"):
+        with open(file_name,"rb") as model_file:
+            assert model_file.read(2) == b"\x1f\x8b"
+        return
+    opt_model = mip.Model(solver_name=mip.CBC)
+    opt_model.verbose = 0
+    opt_model.read(file_name)
+    assert (opt_model.num_cols,opt_model.num_rows,opt_model.num_int) == (3,3,2)
+    assert opt_model.optimize() == mip.OptimizationStatus.OPTIMAL
+    #python-mip does not read the constant of the objective function
+    assert opt_model.objective_value + 10 == pytest.approx(2.0)
+    assert [opt_model.var_by_name(name).x for name in "abc"] == pytest.approx([1.0,3.0,1.0])
+
+def test_mps_columns_over_several_buckets(tmp_path):
+    file_name = str(tmp_path / "small.mps")
+    write_small_model(MPSStreamWriter(file_name,"small",cols_per_bucket=2))
+    with open(file_name) as mps_file:
+        lines = mps_file.read().splitlines()
+    columns = lines[lines.index("COLUMNS")+1:lines.index("RHS")]
+    #the entries are sorted by column and the integer columns are within the markers
+    assert [line.split()[0] for line in columns] == ["MARKER","a","a","b","b","b","MARKER","c","c","c"]
+    assert "    RHS OBJROW -10" in lines
+
+@pytest.mark.skipif(shutil.which("cbc") is None,reason="the cbc executable is not installed")
+@pytest.mark.parametrize("extension",[".lp",".mps"])
+def test_model_file_of_test_instance(tmp_path,test_instance,read_instance,extension):
+    txt_file,csv_file = test_instance
+    data = read_instance(csv_file)
+    model_file = str(tmp_path / ("testInstance"+extension))
+    allocator = write_model_stream(model_file,create_decisions_variables,*[data[name] for name in WRITE_MODEL_DATA],time.time())[0]
+    assert solve_with_cbc(model_file,str(tmp_path / "testInstance.sol"),60) == 0
+    status,values = read_cbc_solution(str(tmp_path / "testInstance.sol"),allocator.num_cols)
+    assert status.startswith("Optimal")
+    assert float(status.split()[-1]) == pytest.approx(1955)
+    assert len(values) == allocator.num_cols
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the rolling horizon of the RollingHorizonVeRoLogMip file, the solution of the test instance is checked with the
+    SolutionVerolog2019 file
+"""
+###########################################################
+### imports
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from ScheduleVeRoLog import Schedule #from local repository
+from RollingHorizonVeRoLogMip import work_history, run_rolling_horizon #from local repository
+###########################################################
+###
+def test_work_history():
+    schedule = Schedule(10)
+    #technician 0 works on days 0 to 4, technician 1 on days 5 and 6
+    for t in range(5):
+        schedule.tech_routes[t][0] = [1]
+    for t in (5,6):
+        schedule.tech_routes[t][1] = [2]
+    assert work_history(schedule,[0,1],5) == ({0: [5,6],1: []},{0: 0,1: 0})
+    assert work_history(schedule,[0,1],6) == ({0: [6],1: []},{0: 0,1: 1})
+    assert work_history(schedule,[0,1],3) == ({0: [],1: []},{0: 3,1: 0})
+
+@pytest.mark.parametrize("window_days,commit_days",[(3,2),(7,3)])
+def test_rolling_horizon_of_test_instance(tmp_path,monkeypatch,test_instance,window_days,commit_days):
+    txt_file,csv_file = test_instance
+    monkeypatch.chdir(tmp_path)
+    summary = run_rolling_horizon(csv_file,str(tmp_path / "rolling"),2,60,window_days=window_days,commit_days=commit_days)
+    assert summary["status"] == "FEASIBLE"
+    solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(txt_file))
+    assert solution.isValid()
+    assert solution.calcCost.Cost == summary["objective_value"] >= 1955
+
+def test_commit_days_of_window(tmp_path,test_instance):
+    txt_file,csv_file = test_instance
+    with pytest.raises(ValueError):
+        run_rolling_horizon(csv_file,str(tmp_path / "rolling"),2,60,window_days=3,commit_days=4)
+    with pytest.raises(ValueError):
+        run_rolling_horizon(csv_file,str(tmp_path / "rolling"),2,60,window_days=3,commit_days=0)
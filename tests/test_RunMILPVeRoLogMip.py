@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the MILP of the RunMILPVeRoLogMip file: the arcs that are created for the delivery windows and the solution of
+    the test instance with the arc and the compact linking, which is checked with the SolutionVerolog2019 file
+"""
+###########################################################
+### imports
+import time
+import mip as mip
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables, run_instance #from local repository
+###########################################################
+###
+VARIABLE_DATA = ("DAYS","technicians","trucks","x_nodes","tech_customers","nodes","technician_nodes","customer_nodes")
+
+def check_solution(summary,txt_file):
+    """
+    Purpose
+        Check that the solution file of run_instance() is valid with the objective value as total cost
+    """
+    solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(txt_file))
+    assert solution.isValid()
+    assert solution.calcCost.Cost == pytest.approx(summary["objective_value"])
+    return solution
+
+@pytest.mark.parametrize("seed",[0,1])
+def test_arcs_within_delivery_window(generated_instance,read_instance,seed):
+    txt_file,csv_file = generated_instance(8,3,2,6,seed)
+    data = read_instance(csv_file)
+    opt_model = mip.Model(solver_name=mip.CBC)
+    opt_model.verbose = 0
+    x,y = create_decisions_variables(opt_model,*[data[name] for name in VARIABLE_DATA],time.time(),
+                                     start_delivery_window=data["start_delivery_window"],end_delivery_window=data["end_delivery_window"])[:2]
+    full_model = mip.Model(solver_name=mip.CBC)
+    full_model.verbose = 0
+    full_x,full_y = create_decisions_variables(full_model,*[data[name] for name in VARIABLE_DATA],time.time())[:2]
+    assert len(x) < len(full_x) and len(y) < len(full_y)
+    for j in data["customer_nodes"]:
+        start,end = data["start_delivery_window"][j-1],data["end_delivery_window"][j-1]
+        for k in data["trucks"]:
+            for t in range(data["DAYS"]-1):
+                delivered = len(x.arcs_in(t,k,j)) > 0 and len(x.arcs_out(t,k,j)) > 0
+                assert delivered == (start <= t <= end)
+        for h in data["technicians"]:
+            for t in range(data["DAYS"]-1):
+                if j in data["tech_customers"][h]:
+                    assert (len(y.arcs_in(t,h,j)) > 0) == (t >= start)
+                else:
+                    assert len(y.arcs_in(t,h,j)) == 0
+
+def test_run_test_instance(tmp_path,monkeypatch,test_instance):
+    txt_file,csv_file = test_instance
+    monkeypatch.chdir(tmp_path)
+    summary = run_instance(csv_file,str(tmp_path / "solution"),2,60)
+    assert summary["objective_value"] == pytest.approx(1955)
+    check_solution(summary,txt_file)
+
+@pytest.mark.parametrize("symmetry_breaking",[False,True])
+def test_compact_linking_of_test_instance(tmp_path,monkeypatch,test_instance,symmetry_breaking):
+    txt_file,csv_file = test_instance
+    monkeypatch.chdir(tmp_path)
+    summary = run_instance(csv_file,str(tmp_path / "arc_linking"),2,60,symmetry_breaking=symmetry_breaking)
+    compact = run_instance(csv_file,str(tmp_path / "compact_linking"),2,60,symmetry_breaking=symmetry_breaking,compact_linking=True)
+    assert compact["rows"] < summary["rows"]
+    assert compact["objective_value"] == pytest.approx(1955)
+    check_solution(compact,txt_file)
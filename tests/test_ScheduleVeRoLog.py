@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of reading the best solution file of a directory with the ScheduleVeRoLog file (used by the warm start)
+"""
+###########################################################
+### imports
+import os
+import shutil
+from GreedyHeuristicVeRoLog import greedy_schedule #from local repository
+from ScheduleVeRoLog import read_solution_schedule #from local repository
+###########################################################
+###
+GREEDY_DATA = ("DAYS","technicians","customer_nodes","customer_machine_types","machine_size","machine_penalty","customer_order_size","start_delivery_window",
+               "end_delivery_window","technician_max_visits","technician_max_distance","eligibility","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","distance_matrix",
+               "TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+COST_ITEMS = ("technicians","customer_nodes","customer_machine_types","machine_penalty","customer_order_size","distance_matrix","TRUCK_DISTANCE_COST",
+              "TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+
+def test_best_solution_of_directory(tmp_path,test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    data = read_instance(csv_file)
+    schedule = greedy_schedule(*[data[name] for name in GREEDY_DATA])
+    cost = schedule.calculate_cost(*[data[name] for name in COST_ITEMS])
+    schedule.write_solution_file(str(tmp_path / "greedy"),"testInstance.txt",cost)
+    #files that are not a valid solution: truncated after a day, binary, an instance and a route that delivers a request twice
+    (tmp_path / "truncated.txt").write_text("DATASET = VeRoLog solver challenge 2019\nNAME = testInstance.txt\n\nDAY = 1\nNUMBER_OF_TRUCKS = 1\n")
+    (tmp_path / "binary.txt").write_bytes(bytes(range(128,256)))
+    shutil.copy(txt_file,str(tmp_path / "instance.txt"))
+    with open(str(tmp_path / "greedy.txt")) as solution_file:
+        lines = solution_file.read().splitlines()
+    truck = next(n+1 for n,line in enumerate(lines) if line.startswith("NUMBER_OF_TRUCKS = ") and line != "NUMBER_OF_TRUCKS = 0")
+    lines[truck] = lines[truck] + " 1"
+    (tmp_path / "subdirectory").mkdir()
+    (tmp_path / "subdirectory" / "twice.txt").write_text("\n".join(lines)+"\n")
+    best,solution_file,best_cost = read_solution_schedule(str(tmp_path),txt_file)
+    assert solution_file == os.path.join(str(tmp_path),"greedy.txt")
+    assert best_cost == cost["TOTAL_COST"]
+    assert best.calculate_cost(*[data[name] for name in COST_ITEMS]) == cost
+    assert read_solution_schedule([str(tmp_path / "truncated.txt"),str(tmp_path / "binary.txt")],txt_file) == (None,None,None)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the symmetry breaking of the SymmetryVeRoLogMip file: the classes of equivalent technicians, the renumbering of
+    a schedule and the solution of the test instance with the symmetry breaking constraints
+"""
+###########################################################
+### imports
+import numpy as np
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from ScheduleVeRoLog import Schedule #from local repository
+from SymmetryVeRoLogMip import technician_classes, canonical_schedule #from local repository
+from RunMILPVeRoLogMip import run_instance #from local repository
+###########################################################
+###
+def test_technician_classes():
+    #2 customers (nodes 1 and 2), technicians 0 to 3 at nodes 3 to 6
+    nodes = {0: (0,0),1: (1,1),2: (2,2),3: (5,5),4: (5,5),5: (5,5),6: (5,5)}
+    eligibility = np.array([[1,0],[1,0],[1,1],[1,0]],dtype=bool)
+    classes = technician_classes([0,1,2,3],{1: (1,1),2: (2,2)},nodes,eligibility,[2,2,2,2],[50,50,50,50])
+    assert classes == [[0,1,3]]
+    #technician 3 has a different maximum distance, technician 2 is the only one with its skill set
+    assert technician_classes([0,1,2,3],{1: (1,1),2: (2,2)},nodes,eligibility,[2,2,2,2],[50,50,50,60]) == [[0,1]]
+    nodes[4] = (6,6)
+    assert technician_classes([0,1,2,3],{1: (1,1),2: (2,2)},nodes,eligibility,[2,2,2,2],[50,50,50,60]) == []
+
+def test_canonical_schedule():
+    order_volume = np.array([1,4,2,3])
+    schedule = Schedule(3)
+    schedule.truck_routes[0] = {0: [1],1: [2,0,3],2: [4]}
+    schedule.truck_routes[1] = {1: [3],2: [1,0,1]}
+    schedule.tech_routes[1] = {0: [1],2: [2]}
+    schedule.tech_routes[2] = {2: [3,4],1: [1]}
+    canonical = canonical_schedule(schedule,[[0,1,2]],order_volume)
+    #volumes 1, 6 and 3 on day 0, the trucks with the same volume 2 on day 1 keep their order
+    assert canonical.truck_routes[0] == {0: [2,0,3],1: [4],2: [1]}
+    assert canonical.truck_routes[1] == {0: [3],1: [1,0,1]}
+    #technician 2 works 2 days, technicians 0 and 1 work 1 day
+    assert canonical.tech_routes[1] == {1: [1],0: [2]}
+    assert canonical.tech_routes[2] == {0: [3,4],2: [1]}
+    assert canonical.delivery_days() == schedule.delivery_days()
+    assert canonical.installation_days() == schedule.installation_days()
+
+@pytest.mark.parametrize("warm_start",[None,"greedy"])
+def test_symmetry_breaking_of_test_instance(tmp_path,monkeypatch,test_instance,warm_start):
+    txt_file,csv_file = test_instance
+    monkeypatch.chdir(tmp_path)
+    summary = run_instance(csv_file,str(tmp_path / "solution"),2,60,warm_start=warm_start,instance_file_name=txt_file,symmetry_breaking=True)
+    assert summary["objective_value"] == pytest.approx(1955)
+    solution = SolutionVerolog2019(summary["solution_file"],InstanceVerolog2019(txt_file))
+    assert solution.isValid() and solution.calcCost.Cost == 1955
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the warm start of the WarmStartVeRoLogMip file: the values of a schedule are checked against every constraint
+    family while the constraints of the test instance are added
+"""
+###########################################################
+### imports
+import time
+import mip as mip
+import numpy as np
+import pytest
+from ConstraintMatrixVeRoLogMip import ConstraintFamily #from local repository
+from GreedyHeuristicVeRoLog import greedy_schedule #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables, create_customer_expressions, create_cost_functions, add_constraints #from local repository
+from WarmStartVeRoLogMip import schedule_to_values, family_violations, StartCheck, start_objective_value, set_start #from local repository
+###########################################################
+###
+VARIABLE_DATA = ("DAYS","technicians","trucks","x_nodes","tech_customers","nodes","technician_nodes","customer_nodes")
+COST_DATA = ("DAYS","technicians","trucks","distance_matrix","TRUCK_DISTANCE_COST","TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST",
+             "TECHNICIAN_DAY_COST","TECHNICIAN_COST","machine_penalty","customer_order_size","customer_nodes","customer_machine_types")
+CONSTRAINT_DATA = ("DAYS","technicians","trucks","machines","customers","customer_machine_types","machine_size","customer_order_size","start_delivery_window",
+                   "end_delivery_window","technician_max_visits","technician_max_distance","tech_customers","tech_customer_position","TRUCK_MAX_DISTANCE",
+                   "TRUCK_CAPACITY","depot_node","customer_nodes","technician_nodes","nodes","x_nodes","distance_matrix","LARGE_NUMBER")
+GREEDY_DATA = ("DAYS","technicians","customer_nodes","customer_machine_types","machine_size","machine_penalty","customer_order_size","start_delivery_window",
+               "end_delivery_window","technician_max_visits","technician_max_distance","eligibility","TRUCK_MAX_DISTANCE","TRUCK_CAPACITY","distance_matrix",
+               "TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+COST_ITEMS = ("technicians","customer_nodes","customer_machine_types","machine_penalty","customer_order_size","distance_matrix","TRUCK_DISTANCE_COST",
+              "TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST","TECHNICIAN_DAY_COST","TECHNICIAN_COST")
+
+def build_model(data):
+    """
+    Purpose
+        Create the decision variables and the objective function of the MILP (the constraints are added by the tests)
+    """
+    start = time.time()
+    opt_model = mip.Model(solver_name=mip.CBC)
+    opt_model.verbose = 0
+    variables = create_decisions_variables(opt_model,*[data[name] for name in VARIABLE_DATA],start)
+    x,y,w,u,v,p,q,z,l = variables
+    delivery_day,installation_day = create_customer_expressions(x,y,data["DAYS"],data["technicians"],data["trucks"],data["customer_nodes"],start)
+    costs = create_cost_functions(x,y,u,v,p,q,*[data[name] for name in COST_DATA],delivery_day,installation_day,start)
+    opt_model.objective = mip.minimize(mip.xsum(costs))
+    return opt_model,variables
+
+def greedy_values(data,opt_model,variables):
+    """
+    Purpose
+        Get the greedy schedule with the number of trucks of the MILP, its cost and the values of the decision variables
+    """
+    schedule = greedy_schedule(*[data[name] for name in GREEDY_DATA],len(data["trucks"]))
+    cost = schedule.calculate_cost(*[data[name] for name in COST_ITEMS])
+    order_volume = np.array([data["customer_order_size"][j-1] * data["machine_size"][data["customer_machine_types"][j-1]] for j in data["customer_nodes"]])
+    values = schedule_to_values(schedule,opt_model.num_cols,*variables,data["DAYS"],data["technicians"],data["trucks"],data["customer_nodes"],order_volume,
+                                data["tech_customer_position"])
+    return cost,values
+
+def test_family_violations():
+    for sense,violated in ((mip.LESS_OR_EQUAL,[1]),(mip.GREATER_OR_EQUAL,[0]),(mip.EQUAL,[0,1])):
+        #rows x0 + x1 (activity 2.5) and 2 x1 (activity 4) with right hand side 3
+        family = ConstraintFamily("family",0,[0,0,1],[0,1,1],[1.0,1.0,2.0],sense,[3.0,3.0])
+        assert family_violations(family,np.array([0.5,2.0])).tolist() == violated
+    assert family_violations(family,np.array([1.0,1.5])).tolist() == [0]
+
+def test_greedy_start_is_feasible(test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    data = read_instance(csv_file)
+    opt_model,variables = build_model(data)
+    cost,values = greedy_values(data,opt_model,variables)
+    start_check = StartCheck(values)
+    add_constraints(opt_model,*variables,*[data[name] for name in CONSTRAINT_DATA],time.time(),start_check=start_check)
+    assert start_check.families > 0 and start_check.feasible
+    assert start_objective_value(opt_model,values) == pytest.approx(cost["TOTAL_COST"])
+    set_start(opt_model,values)
+    assert opt_model.optimize(max_seconds=60) == mip.OptimizationStatus.OPTIMAL
+    assert opt_model.objective_value == pytest.approx(1955)
+
+def test_violated_start_is_reported(test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    data = read_instance(csv_file)
+    opt_model,variables = build_model(data)
+    cost,values = greedy_values(data,opt_model,variables)
+    #without the truck arcs no customer is delivered
+    x = variables[0]
+    values[x.arrays()[4]] = 0
+    start_check = StartCheck(values)
+    add_constraints(opt_model,*variables,*[data[name] for name in CONSTRAINT_DATA],time.time(),start_check=start_check)
+    assert not start_check.feasible
+    assert all(len(rows) > 0 for rows in start_check.violations.values())
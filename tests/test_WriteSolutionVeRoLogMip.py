@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose
+    Tests of the solution writer of the WriteSolutionVeRoLogMip file: the routes of the arcs in a solution, the problems of
+    a solution that is not a set of routes, the solution file of the test instance and the atomic writes of the files
+"""
+###########################################################
+### imports
+import json
+import os
+import time
+import mip as mip
+import numpy as np
+import pytest
+from InstanceVerolog2019 import InstanceVerolog2019 #from local repository
+from SolutionVerolog2019 import SolutionVerolog2019 #from local repository
+from RunMILPVeRoLogMip import create_decisions_variables, create_customer_expressions, create_cost_functions, add_constraints #from local repository
+from WriteSolutionVeRoLogMip import vehicle_routes, atomic_write, create_solution_file, solution_vector #from local repository
+###########################################################
+###
+VARIABLE_DATA = ("DAYS","technicians","trucks","x_nodes","tech_customers","nodes","technician_nodes","customer_nodes")
+COST_DATA = ("DAYS","technicians","trucks","distance_matrix","TRUCK_DISTANCE_COST","TRUCK_DAY_COST","TRUCK_COST","TECHNICIAN_DISTANCE_COST",
+             "TECHNICIAN_DAY_COST","TECHNICIAN_COST","machine_penalty","customer_order_size","customer_nodes","customer_machine_types")
+CONSTRAINT_DATA = ("DAYS","technicians","trucks","machines","customers","customer_machine_types","machine_size","customer_order_size","start_delivery_window",
+                   "end_delivery_window","technician_max_visits","technician_max_distance","tech_customers","tech_customer_position","TRUCK_MAX_DISTANCE",
+                   "TRUCK_CAPACITY","depot_node","customer_nodes","technician_nodes","nodes","x_nodes","distance_matrix","LARGE_NUMBER")
+SOLUTION_DATA = ("DAYS","technicians","trucks","technician_nodes","nodes","distance_matrix")
+
+def routes_of_arcs(arcs,start_nodes,num_nodes=8):
+    """
+    Purpose
+        Run vehicle_routes() for a list of arcs (t,k,i,j,value)
+    """
+    t,k,i,j,values = (np.array(column) for column in zip(*arcs))
+    return vehicle_routes((t,k,i,j,values.astype(np.float64)),"x",num_nodes,np.array(start_nodes))
+
+def test_routes_with_trips():
+    #truck 0 drives 2 trips on day 0, truck 1 drives on day 1, arcs with value 0 are not in the solution
+    routes,problems = routes_of_arcs([(0,0,0,1,1),(0,0,1,2,1),(0,0,2,0,1),(0,0,0,3,1),(0,0,3,0,1),(1,1,0,4,1),(1,1,4,0,1),(1,0,0,5,0),(1,0,5,0,0)],[0,0])
+    assert problems == []
+    assert len(routes) == 2 and routes[(0,0)] in ([1,2,0,3],[3,0,1,2]) and routes[(1,1)] == [4]
+
+def test_routes_from_home():
+    routes,problems = routes_of_arcs([(2,1,7,1,1),(2,1,1,3,1),(2,1,3,7,1)],[6,7])
+    assert (routes,problems) == ({(2,1): [1,3]},[])
+
+@pytest.mark.parametrize("arcs,problem",[
+    ([(0,0,0,1,0.5),(0,0,1,0,0.5)],"fractional arc x_0_0_0_1 = 0.5"),
+    ([(0,0,0,1,1),(0,0,1,0,1),(0,0,2,3,1),(0,0,3,2,1)],"x_0_0 has a subtour with nodes [2, 3]"),
+    ([(0,0,0,1,1),(0,0,1,2,1)],"x_0_0 does not return to node 0 after nodes [1, 2]"),
+    ([(0,0,0,1,1),(0,0,1,0,1),(0,0,1,2,1),(0,0,2,0,1)],"x_0_0 leaves nodes [1] more than once")])
+def test_route_problems(arcs,problem):
+    routes,problems = routes_of_arcs(arcs,[0])
+    assert problem in problems
+
+def test_no_arcs_in_solution():
+    assert routes_of_arcs([(0,0,0,1,0),(0,0,1,0,0)],[0]) == ({},[])
+
+def test_solution_file_of_test_instance(tmp_path,test_instance,read_instance):
+    txt_file,csv_file = test_instance
+    data = read_instance(csv_file)
+    start = time.time()
+    opt_model = mip.Model(solver_name=mip.CBC)
+    opt_model.verbose = 0
+    variables = create_decisions_variables(opt_model,*[data[name] for name in VARIABLE_DATA],start)
+    x,y,w,u,v,p,q,z,l = variables
+    delivery_day,installation_day = create_customer_expressions(x,y,data["DAYS"],data["technicians"],data["trucks"],data["customer_nodes"],start)
+    costs = create_cost_functions(x,y,u,v,p,q,*[data[name] for name in COST_DATA],delivery_day,installation_day,start)
+    objective_func = mip.xsum(costs)
+    opt_model.objective = mip.minimize(objective_func)
+    add_constraints(opt_model,*variables,*[data[name] for name in CONSTRAINT_DATA],start)
+    assert opt_model.optimize(max_seconds=60) == mip.OptimizationStatus.OPTIMAL
+    values = solution_vector(opt_model)
+    solution_file = str(tmp_path / "solution")
+    kpis = create_solution_file(solution_file,"testInstance.txt",objective_func,costs[-1],x,y,u,v,p,q,*[data[name] for name in SOLUTION_DATA],values,
+                                export=True)
+    assert kpis["TOTAL_COST"] == 1955
+    with open(solution_file+".json") as json_file:
+        assert json.load(json_file)["cost"] == kpis
+    assert (np.load(solution_file+".npz")["x_value"] > 0).all()
+    solution = SolutionVerolog2019(solution_file+".txt",InstanceVerolog2019(txt_file))
+    assert solution.isValid() and solution.calcCost.Cost == 1955
+    #a subtour between two customers of an unused truck on the first day
+    k = next(k for k in data["trucks"] if values[[var.idx for j,var in x.arcs_out(0,k,0)]].max() < 0.5)
+    values[x.get(0,k,1,2).idx] = values[x.get(0,k,2,1).idx] = 1
+    with pytest.raises(ValueError):
+        create_solution_file(str(tmp_path / "subtour"),"testInstance.txt",objective_func,costs[-1],x,y,u,v,p,q,*[data[name] for name in SOLUTION_DATA],values)
+    assert not os.path.exists(str(tmp_path / "subtour.txt"))
+
+def test_atomic_write(tmp_path):
+    file_name = str(tmp_path / "solution.txt")
+    atomic_write(file_name,lambda file: file.write("first\n"))
+    atomic_write(file_name,lambda file: file.write("second\n"))
+    with open(file_name) as file:
+        assert file.read() == "second\n"
+    def interrupted(file):
+        file.write("partial")
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        atomic_write(file_name,interrupted)
+    with open(file_name) as file:
+        assert file.read() == "second\n"
+    atomic_write(str(tmp_path / "arrays.npz"),lambda file: np.savez_compressed(file,a=np.arange(3)),binary=True)
+    assert np.load(str(tmp_path / "arrays.npz"))["a"].tolist() == [0,1,2]
+    assert sorted(os.listdir(str(tmp_path))) == ["arrays.npz","solution.txt"]